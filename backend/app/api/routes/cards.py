@@ -1,29 +1,54 @@
 # backend/app/api/routes/cards.py
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_user_id
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, get_async_db
+from app.core.metrics import REVIEWS, LEVEL_CHANGES
+from app.core.responses import fast_json
+from app.services.deck_versions import bump_content_version, bump_progress_version
 from app.models.card import Card
 from app.models.card_level import CardLevel
 from app.models.card_progress import CardProgress
-from app.models.card_review_history import CardReviewHistory
-from app.models.user_learning_settings import UserLearningSettings
-from app.schemas.card_review import CardForReview, ReviewRequest, ReviewResponse
+from app.schemas.card_review import CardForReview, ReviewRequest, ReviewResponse, ReviewQueuePage
+from app.schemas.card_review import BatchReviewRequest, BatchReviewResponse, BatchReviewItemResult
+from app.schemas.card_review import SyncReviewRequest, SyncReviewResponse, SyncReviewItemResult
 from app.schemas.cards import CardForReviewWithLevels, CardLevelContent
-from app.services.review_service import ReviewService
-from app.schemas.cards import CreateCardRequest
+from app.services.learning_settings import get_learning_settings
+from app.domain.review.dto import LearningSettingsSnapshot
+from app.services.review_writes import (
+    ReviewInput,
+    apply_review_batch,
+    apply_review_sync,
+    normalize_reviewed_at,
+    applied_review_card_id,
+    apply_single_review,
+    current_review_state,
+    CardNotFound,
+    CardHasNoLevelZero,
+)
+from app.services.review_queue import (
+    load_due_cards,
+    load_levels_by_card,
+    count_due_cards,
+    decode_cursor,
+    split_page,
+)
+from app.schemas.cards import CreateCardRequest, CreateCardsBatchRequest, CreateCardsBatchResponse
+from app.services.card_content import validate_card, typed_level_content, CardValidationError
+from app.services.card_writes import card_rows, insert_cards
 from app.schemas.cards import CreateCardResponse
 from starlette import status
 from app.models import Deck
 from app.schemas.cards import CardSummary
 from app.schemas.cards import ReplaceLevelsRequest
 
-from app.schemas.cards import QaContentIn, McqContentIn
 
 router = APIRouter()
 
@@ -35,18 +60,7 @@ def get_db():
     finally:
         db.close()
 
-def _ensure_settings(db: Session, user_id: UUID) -> UserLearningSettings:
-    settings = db.query(UserLearningSettings).filter_by(user_id=user_id).first()
-    if settings:
-        return settings
-    settings = UserLearningSettings(user_id=user_id)
-    db.add(settings)
-    db.commit()
-    db.refresh(settings)
-    return settings
-
-
-def _ensure_active_progress(db: Session, *, user_id: UUID, card: Card, settings: UserLearningSettings) -> CardProgress:
+def _ensure_active_progress(db: Session, *, user_id: UUID, card: Card, settings: LearningSettingsSnapshot) -> CardProgress:
     # найти активный уровень
     progress = (
         db.query(CardProgress)
@@ -73,8 +87,7 @@ def _ensure_active_progress(db: Session, *, user_id: UUID, card: Card, settings:
         next_review=now,
     )
     db.add(progress)
-    db.commit()
-    db.refresh(progress)
+    db.flush()
     return progress
 
 
@@ -93,126 +106,201 @@ def create_card(
     if deck.owner_id != userid:
         raise HTTPException(status_code=403, detail="Deck not accessible")  # owner-only
 
-    # 3) validate minimal invariants
-    title = payload.title.strip()
-    if not title:
-        raise HTTPException(status_code=422, detail="Title is required")
-    if not payload.levels:
-        raise HTTPException(status_code=422, detail="At least 1 level is required")
+    # 3) validate (те же правила, что и у импорта колоды)
+    try:
+        title, contents = validate_card(payload.title, payload.type, payload.levels)
+    except CardValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
     # 4) create card (ORM uses deckid/maxlevel) [file:151]
     card = Card(
         deck_id=payload.deck_id,
         title=title,
         type=payload.type,
-        max_level=len(payload.levels) - 1,
+        max_level=len(contents) - 1,
         settings=None,
     )
     db.add(card)
     db.flush()  # получаем card.id до insert levels
 
     # 5) create levels (ORM uses cardid/levelindex/content)
-    levels_to_add = []
-
-    for i, lvl in enumerate(payload.levels):
-        q = (lvl.question or "").strip()
-        if not q:
-            raise HTTPException(status_code=422, detail=f"Level {i + 1}: question is required")
-
-        if payload.type == "flashcard":
-            a = (lvl.answer or "").strip()
-            if not a:
-                raise HTTPException(status_code=422, detail=f"Level {i + 1}: answer is required for flashcard")
-
-            content = {"question": q, "answer": a}
-
-        elif payload.type == "multiple_choice":
-            options = lvl.options or []
-            if len(options) < 2:
-                raise HTTPException(status_code=422, detail=f"Level {i + 1}: at least 2 options required")
-
-            # trim option texts
-            options_norm = [{"id": o.id, "text": (o.text or "").strip()} for o in options]
-            non_empty = [o for o in options_norm if o["text"]]
-            if len(non_empty) < 2:
-                raise HTTPException(status_code=422, detail=f"Level {i + 1}: at least 2 non-empty options required")
-
-            correct_id = (lvl.correctOptionId or "").strip()
-            if not correct_id:
-                raise HTTPException(status_code=422, detail=f"Level {i + 1}: correctOptionId is required")
-
-            correct = next((o for o in options_norm if o["id"] == correct_id), None)
-            if not correct or not correct["text"]:
-                raise HTTPException(status_code=422,
-                                    detail=f"Level {i + 1}: correctOptionId must point to a non-empty option")
-
-            timer = lvl.timerSec
-            if timer is not None and (timer < 1 or timer > 3600):
-                raise HTTPException(status_code=422, detail=f"Level {i + 1}: timerSec must be 1..3600")
-
-            content = {
-                "question": q,
-                "options": options_norm,
-                "correctOptionId": correct_id,
-                "explanation": (lvl.explanation or "").strip() or None,
-                "timerSec": timer,
-            }
-
-        else:
-            raise HTTPException(status_code=422, detail=f"Unsupported card type: {payload.type}")
-
-        levels_to_add.append(
-            CardLevel(
-                card_id=card.id,
-                level_index=i,
-                content=content,
-            )
-        )
+    levels_to_add = [
+        CardLevel(card_id=card.id, level_index=i, content=content)
+        for i, content in enumerate(contents)
+    ]
 
     db.add_all(levels_to_add)
+    bump_content_version(db, deck.id)
 
     db.commit()
 
     return CreateCardResponse(card_id=card.id, deck_id=payload.deck_id)
 
+@router.post("/batch", response_model=CreateCardsBatchResponse, status_code=status.HTTP_201_CREATED)
+def create_cards_batch(
+    payload: CreateCardsBatchRequest,
+    userid: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Много карточек в одну колоду: все проверяются до записи, запись — одной транзакцией."""
+    deck = db.get(Deck, payload.deck_id)
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    if deck.owner_id != userid:
+        raise HTTPException(status_code=403, detail="Deck not accessible")  # owner-only
+
+    validated = []
+    errors = []
+    for i, item in enumerate(payload.cards):
+        try:
+            validated.append((item.type, *validate_card(item.title, item.type, item.levels)))
+        except CardValidationError as e:
+            errors.append({"index": i, "error": str(e)})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    # created_at по порядку запроса — колода покажет карточки в том же порядке
+    now = datetime.now(timezone.utc)
+    cards, levels = [], []
+    for i, (card_type, title, contents) in enumerate(validated):
+        card, card_levels = card_rows(
+            deck_id=deck.id,
+            title=title,
+            card_type=card_type,
+            contents=contents,
+            created_at=now + timedelta(microseconds=i),
+        )
+        cards.append(card)
+        levels.extend(card_levels)
+
+    insert_cards(db, cards, levels)
+    bump_content_version(db, deck.id)
+    db.commit()
+
+    return CreateCardsBatchResponse(deck_id=deck.id, card_ids=[c["id"] for c in cards])
+
+
+def _applied_card_ids(outcomes) -> list[UUID]:
+    return [o.card_id for o in outcomes if o.ok and not o.duplicate]
+
+
+def _count_reviews(items, outcomes) -> None:
+    for item, outcome in zip(items, outcomes):
+        if outcome.ok and not outcome.duplicate:
+            REVIEWS.inc(item.rating.value)
+
+
+# Горячие списки собираются из строк БД простыми dict-ами (форма CardForReview и т.д.):
+# с fast_json они сериализуются pydantic-core без построения моделей,
+# без него — валидируются response_model как обычно.
+
+def _review_queue(db: Session, *, user_id: UUID, limit: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    rows = load_due_cards(db, user_id=user_id, now=now, limit=limit)
+    return [dict(row._mapping) for row in rows]
+
+
+def _review_queue_page(db: Session, *, user_id: UUID, cursor: Optional[str], limit: int) -> dict:
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    now = datetime.now(timezone.utc)
+    rows = load_due_cards(db, user_id=user_id, now=now, limit=limit + 1, after=after)
+    rows, next_cursor, has_more = split_page(rows, limit)
+
+    return {
+        "items": [dict(row._mapping) for row in rows],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "total_due": count_due_cards(db, user_id=user_id, now=now),
+    }
+
+
+def _replayed_review(db: Session, *, user_id: UUID, card_id: UUID, applied_card_id: UUID) -> ReviewResponse:
+    # id уже принят для другой карточки или прогресс с тех пор сброшен — отдать нечего
+    outcome = current_review_state(db, user_id=user_id, card_id=card_id) if applied_card_id == card_id else None
+    if outcome is None:
+        raise HTTPException(status_code=409, detail="client_review_id already used")
+    return ReviewResponse(**vars(outcome))
+
+
+def _submit_review(db: Session, *, user_id: UUID, card_id: UUID, request: ReviewRequest) -> ReviewResponse:
+    settings = get_learning_settings(db, user_id)
+
+    # повтор уже принятого запроса (ретрай клиента) — ничего не применяем заново
+    if request.client_review_id is not None:
+        applied_card_id = applied_review_card_id(db, user_id=user_id, client_review_id=request.client_review_id)
+        if applied_card_id is not None:
+            return _replayed_review(db, user_id=user_id, card_id=card_id, applied_card_id=applied_card_id)
+
+    try:
+        outcome = apply_single_review(
+            db,
+            user_id=user_id,
+            card_id=card_id,
+            rating=request.rating,
+            settings=settings,
+            now=datetime.now(timezone.utc),
+            client_review_id=request.client_review_id,
+        )
+        bump_progress_version(db, user_id=user_id, card_ids=[card_id])
+        db.commit()
+        REVIEWS.inc(request.rating.value)
+    except CardNotFound:
+        raise HTTPException(status_code=404, detail="Card not found")
+    except CardHasNoLevelZero:
+        raise HTTPException(status_code=500, detail="Card has no level 0")
+    except IntegrityError:
+        # параллельный ретрай с тем же client_review_id успел раньше (uq_review_history_client_id)
+        db.rollback()
+        if request.client_review_id is None:
+            raise
+        applied_card_id = applied_review_card_id(db, user_id=user_id, client_review_id=request.client_review_id)
+        if applied_card_id is None:
+            raise
+        return _replayed_review(db, user_id=user_id, card_id=card_id, applied_card_id=applied_card_id)
+
+    return ReviewResponse(**vars(outcome))
+
+
+def _review_queue_with_levels(db: Session, *, user_id: UUID, limit: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    rows = load_due_cards(db, user_id=user_id, now=now, limit=limit)
+    levels_by_card = load_levels_by_card(db, [row.card_id for row in rows])
+
+    return [
+        {
+            **row._mapping,
+            "levels": [
+                {"level_index": l.level_index, "content": l.content}
+                for l in levels_by_card.get(row.card_id, [])
+            ],
+        }
+        for row in rows
+    ]
+
+
 @router.get("/review", response_model=list[CardForReview])
 def get_cards_for_review(
     user_id: UUID = Depends(get_current_user_id),
     limit: int = 20,
     db: Session = Depends(get_db),
 ):
-    user_uuid = user_id
-    now = datetime.now(timezone.utc)
+    return fast_json(_review_queue(db, user_id=user_id, limit=limit))
 
-    progress_list = (
-        db.query(CardProgress)
-        .filter(CardProgress.user_id == user_uuid)
-        .filter(CardProgress.is_active == True)
-        .filter(CardProgress.next_review <= now)
-        .order_by(CardProgress.next_review.asc())
-        .limit(limit)
-        .all()
-    )
 
-    result: list[CardForReview] = []
-    for progress in progress_list:
-        card = db.get(Card, progress.card_id)
-        level = db.get(CardLevel, progress.card_level_id)
-        result.append(
-            CardForReview(
-                card_id=card.id,
-                deck_id=card.deck_id,
-                title=card.title,
-                type=card.type,
-                card_level_id=level.id,
-                level_index=level.level_index,
-                content=level.content,
-                stability=progress.stability,
-                difficulty=progress.difficulty,
-                next_review=progress.next_review,
-            )
-        )
-    return result
+@router.get("/review/page", response_model=ReviewQueuePage)
+def get_review_queue_page(
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=200),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    return fast_json(_review_queue_page(db, user_id=user_id, cursor=cursor, limit=limit))
 
 
 @router.post("/{card_id}/review", response_model=ReviewResponse)
@@ -222,49 +310,72 @@ def review_card(
     user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    user_uuid = user_id
+    return _submit_review(db, user_id=user_id, card_id=card_id, request=request)
 
-    card = db.get(Card, card_id)
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
 
-    settings = _ensure_settings(db, user_uuid)
-    progress = _ensure_active_progress(db, user_id=user_uuid, card=card, settings=settings)
+@router.post("/reviews:sync", response_model=SyncReviewResponse)
+def sync_reviews(
+    request: SyncReviewRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    settings = get_learning_settings(db, user_id)
+    now = datetime.now(timezone.utc)
 
-    updated = ReviewService.review(
-        progress=progress,
-        rating=request.rating.value,
+    outcomes = apply_review_sync(
+        db,
+        user_id=user_id,
+        items=[
+            ReviewInput(
+                card_id=item.card_id,
+                rating=item.rating,
+                reviewed_at=normalize_reviewed_at(item.reviewed_at, now),
+                client_review_id=item.client_review_id,
+            )
+            for item in request.items
+        ],
         settings=settings,
     )
+    bump_progress_version(db, user_id=user_id, card_ids=_applied_card_ids(outcomes))
+    db.commit()
+    _count_reviews(request.items, outcomes)
 
-    # применяем результат к ORM progress
-    progress.stability = updated.stability
-    progress.difficulty = updated.difficulty
-    progress.last_reviewed = updated.last_reviewed
-    progress.next_review = updated.next_review
-    db.add(progress)
-
-    history_entry = CardReviewHistory(
-        user_id=user_uuid,
-        card_id=card.id,
-        card_level_id=progress.card_level_id,
-        rating=request.rating,
-        interval_minutes=int((progress.next_review - progress.last_reviewed).total_seconds() // 60),
-        reviewed_at=progress.last_reviewed,
+    return SyncReviewResponse(
+        results=[
+            SyncReviewItemResult(**vars(o), client_review_id=item.client_review_id)
+            for item, o in zip(request.items, outcomes)
+        ]
     )
-    db.add(history_entry)
 
+
+@router.post("/reviews:batch", response_model=BatchReviewResponse)
+def review_cards_batch(
+    request: BatchReviewRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    settings = get_learning_settings(db, user_id)
+    now = datetime.now(timezone.utc)
+
+    outcomes = apply_review_batch(
+        db,
+        user_id=user_id,
+        items=[
+            ReviewInput(
+                card_id=item.card_id,
+                rating=item.rating,
+                reviewed_at=normalize_reviewed_at(item.answered_at, now),
+            )
+            for item in request.items
+        ],
+        settings=settings,
+    )
+    bump_progress_version(db, user_id=user_id, card_ids=_applied_card_ids(outcomes))
     db.commit()
-    db.refresh(progress)
+    _count_reviews(request.items, outcomes)
 
-    level = db.get(CardLevel, progress.card_level_id)
-    return ReviewResponse(
-        card_id=card.id,
-        card_level_id=level.id,
-        level_index=level.level_index,
-        stability=progress.stability,
-        difficulty=progress.difficulty,
-        next_review=progress.next_review,
+    return BatchReviewResponse(
+        results=[BatchReviewItemResult(**vars(o)) for o in outcomes]
     )
 
 
@@ -279,7 +390,7 @@ def level_up(
     if not card:
         raise HTTPException(404, "Card not found")
 
-    settings = _ensure_settings(db, user_uuid)
+    settings = get_learning_settings(db, user_uuid)
     current = (
         db.query(CardProgress)
         .filter_by(user_id=user_uuid, card_id=card_id, is_active=True)
@@ -313,13 +424,17 @@ def level_up(
 
     now = datetime.now(timezone.utc)
     if not next_progress:
+        stability = current.stability * settings.promote_stability_multiplier
+        difficulty = current.difficulty + settings.promote_difficulty_delta
         next_progress = CardProgress(
             user_id=user_uuid,
             card_id=card_id,
             card_level_id=next_level.id,
             is_active=True,
-            stability=current.stability * settings.promote_stability_multiplier,
-            difficulty=current.difficulty + settings.promote_difficulty_delta,
+            stability=stability,
+            difficulty=difficulty,
+            start_stability=stability,
+            start_difficulty=difficulty,
             last_reviewed=now,
             next_review=now,  # можно сделать now + 10 минут, если хочешь "контрольный" повтор
         )
@@ -328,7 +443,9 @@ def level_up(
         next_progress.is_active = True
         db.add(next_progress)
 
+    bump_progress_version(db, user_id=user_uuid, deck_id=card.deck_id)
     db.commit()
+    LEVEL_CHANGES.inc("up")
     return {"active_level_index": next_level.level_index, "active_card_level_id": str(next_level.id)}
 
 
@@ -349,7 +466,8 @@ def level_down(
         .first()
     )
     if not current:
-        raise HTTPException(404, "Active progress not found")
+        # прогресса ещё нет — карточка на виртуальном уровне 0
+        raise HTTPException(400, "Already at level 0")
 
     current_card_level = db.get(CardLevel, current.card_level_id)
     prev_level_index = current_card_level.level_index - 1
@@ -376,7 +494,7 @@ def level_down(
     )
     if not prev_progress:
         # если раньше не учил этот уровень — создаём
-        settings = _ensure_settings(db, user_uuid)
+        settings = get_learning_settings(db, user_uuid)
         now = datetime.now(timezone.utc)
         prev_progress = CardProgress(
             user_id=user_uuid,
@@ -385,6 +503,8 @@ def level_down(
             is_active=True,
             stability=settings.initial_stability,
             difficulty=settings.initial_difficulty,
+            start_stability=settings.initial_stability,
+            start_difficulty=settings.initial_difficulty,
             last_reviewed=now,
             next_review=now,
         )
@@ -393,7 +513,9 @@ def level_down(
         prev_progress.is_active = True
         db.add(prev_progress)
 
+    bump_progress_version(db, user_id=user_uuid, deck_id=card.deck_id)
     db.commit()
+    LEVEL_CHANGES.inc("down")
     return {"active_level_index": prev_level.level_index, "active_card_level_id": str(prev_level.id)}
 
 
@@ -403,54 +525,7 @@ def get_cards_for_review_with_levels(
     limit: int = 20,
     db: Session = Depends(get_db),
 ):
-    user_uuid = user_id
-    now = datetime.now(timezone.utc)
-
-    progress_list = (
-        db.query(CardProgress)
-        .filter(CardProgress.user_id == user_uuid)
-        .filter(CardProgress.is_active == True)
-        .filter(CardProgress.next_review <= now)
-        .order_by(CardProgress.next_review.asc())
-        .limit(limit)
-        .all()
-    )
-
-    card_ids = [p.card_id for p in progress_list]
-    levels_all = (
-        db.query(CardLevel)
-        .filter(CardLevel.card_id.in_(card_ids))
-        .order_by(CardLevel.card_id.asc(), CardLevel.level_index.asc())
-        .all()
-    )
-    levels_by_card: dict[UUID, list[CardLevel]] = {}
-    for lvl in levels_all:
-        levels_by_card.setdefault(lvl.card_id, []).append(lvl)
-
-    result: list[CardForReviewWithLevels] = []
-    for progress in progress_list:
-        card = db.get(Card, progress.card_id)
-        level = db.get(CardLevel, progress.card_level_id)
-
-        result.append(
-            CardForReviewWithLevels(
-                card_id=card.id,
-                deck_id=card.deck_id,
-                title=card.title,
-                type=card.type,
-                card_level_id=level.id,
-                level_index=level.level_index,
-                content=level.content,
-                stability=progress.stability,
-                difficulty=progress.difficulty,
-                next_review=progress.next_review,
-                levels=[
-                    CardLevelContent(level_index=l.level_index, content=l.content)
-                    for l in levels_by_card.get(card.id, [])
-                ],
-            )
-        )
-    return result
+    return fast_json(_review_queue_with_levels(db, user_id=user_id, limit=limit))
 
 
 @router.put("/{card_id}/levels", response_model=CardSummary)
@@ -482,61 +557,22 @@ def update_card_levels(
         if lvl.level_index != expected_idx:
             raise HTTPException(status_code=422, detail="level_index must be sequential starting from 0")
 
+    try:
+        contents = [typed_level_content(lvl.content, idx) for idx, lvl in enumerate(incoming)]
+    except CardValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     # Полная замена: удаляем старые и пишем новые (так поддерживается изменение количества уровней)
     db.query(CardLevel).filter(CardLevel.card_id == card_id).delete(synchronize_session=False)
     db.flush()
 
-    new_rows: List[CardLevel] = []
-
-    for idx, lvl in enumerate(incoming):
-        c = lvl.content
-
-        if isinstance(c, QaContentIn):
-            q = (c.question or "").strip()
-            a = (c.answer or "").strip()
-            if not q or not a:
-                raise HTTPException(status_code=422, detail="QA level question/answer must be non-empty")
-
-            content: Dict[str, Any] = {"question": q, "answer": a}
-
-        elif isinstance(c, McqContentIn):
-            q = (c.question or "").strip()
-            if not q:
-                raise HTTPException(status_code=422, detail="MCQ question must be non-empty")
-
-            options = [{"id": str(o.id), "text": (o.text or "").strip()} for o in (c.options or [])]
-            options = [o for o in options if o["text"]]
-
-            if len(options) < 2:
-                raise HTTPException(status_code=422, detail="MCQ must have at least 2 non-empty options")
-
-            ids = [o["id"] for o in options]
-            if len(set(ids)) != len(ids):
-                raise HTTPException(status_code=422, detail="MCQ option ids must be unique")
-
-            correct_id = str(c.correctOptionId)
-            if correct_id not in set(ids):
-                raise HTTPException(status_code=422, detail="MCQ correctOptionId must match one of options")
-
-            content = {
-                "question": q,
-                "options": options,
-                "correctOptionId": correct_id,
-                "explanation": (c.explanation or "").strip(),
-                "timerSec": int(c.timerSec or 0),
-            }
-
-        else:
-            raise HTTPException(status_code=422, detail="Unsupported level content")
-
-        row = CardLevel(
-            card_id=card_id,
-            level_index=idx,
-            content=content,
-        )
-        new_rows.append(row)
+    new_rows: List[CardLevel] = [
+        CardLevel(card_id=card_id, level_index=idx, content=content)
+        for idx, content in enumerate(contents)
+    ]
 
     db.add_all(new_rows)
+    bump_content_version(db, deck.id)
     db.commit()
 
     return CardSummary(
@@ -557,6 +593,7 @@ def delete_card_progress(
         .filter(CardProgress.user_id == user_id, CardProgress.card_id == card_id)
         .delete(synchronize_session=False)
     )
+    bump_progress_version(db, user_id=user_id, card_ids=[card_id])
     db.commit()
     return Response(status_code=204)
 
@@ -574,6 +611,7 @@ def delete_card(card_id: UUID, user_id: UUID = Depends(get_current_user_id), db:
         raise HTTPException(status_code=403, detail="You are not the owner of this card")
 
     db.delete(card)
+    bump_content_version(db, deck.id)
     db.commit()
 
 
@@ -600,6 +638,7 @@ def update_card(
         if not t:
             raise HTTPException(status_code=422, detail="Title is required")
         card.title = t
+        bump_content_version(db, deck.id)
 
     db.commit()
     db.refresh(card)
@@ -616,4 +655,50 @@ def update_card(
         title=card.title,
         type=card.type,
         levels=[CardLevelContent(level_index=l.level_index, content=l.content) for l in levels],
-    )
\ No newline at end of file
+    )
+
+
+# --- async-варианты горячих эндпоинтов (DB_ASYNC=true) ---
+# Подключаются в main.py раньше router и перекрывают sync-обработчики с тем же путём.
+# Логика общая: sync-хелпер выполняется через AsyncSession.run_sync поверх asyncpg,
+# поэтому запрос ждёт Postgres в event loop, а не занимает поток threadpool.
+
+async_router = APIRouter()
+
+
+@async_router.get("/review", response_model=list[CardForReview])
+async def get_cards_for_review_async(
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return fast_json(await db.run_sync(_review_queue, user_id=user_id, limit=limit))
+
+
+@async_router.get("/review/page", response_model=ReviewQueuePage)
+async def get_review_queue_page_async(
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=200),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return fast_json(await db.run_sync(_review_queue_page, user_id=user_id, cursor=cursor, limit=limit))
+
+
+@async_router.get("/review_with_levels", response_model=list[CardForReviewWithLevels])
+async def get_cards_for_review_with_levels_async(
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return fast_json(await db.run_sync(_review_queue_with_levels, user_id=user_id, limit=limit))
+
+
+@async_router.post("/{card_id}/review", response_model=ReviewResponse)
+async def review_card_async(
+    card_id: UUID,
+    request: ReviewRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(_submit_review, user_id=user_id, card_id=card_id, request=request)
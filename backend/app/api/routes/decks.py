@@ -1,28 +1,63 @@
 from datetime import datetime, timezone
+from functools import partial
 import random
+from tempfile import SpooledTemporaryFile
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import asc
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Literal, Callable, Iterator, TypeVar, Union
 
-from app.db.session import SessionLocal
+from app.core.config import settings
+from app.core.responses import fast_json
+from app.db.session import SessionLocal, get_async_db
 from app.auth.dependencies import get_current_user_id
 from app.models.deck import Deck
 from app.models.card import Card
 from app.models.card_level import CardLevel
-from app.models.card_progress import CardProgress
-from app.models.user_learning_settings import UserLearningSettings
-from app.schemas.cards import DeckSummary, CardSummary, CardLevelContent, DeckSessionCard, DeckCreate
+from app.schemas.cards import DeckSummary, UserDeckSummary, CardSummary, CardOutline, CardLevelContent, DeckSessionCard, DeckCreate
 from app.models.user_study_group import UserStudyGroup
 from app.models.user_study_group_deck import UserStudyGroupDeck
-from app.schemas.cards import DeckWithCards
-from app.schemas.decks_public import PublicDeckSummary
+from app.models.deck_import_job import DeckImportJob
+from app.schemas.cards import DeckWithCards, DeckWithCardOutlines
+from app.schemas.decks_public import PublicDeckSummary, PublicDeckSearchItem, PublicDeckSearchPage
+from app.schemas.deck_import import DeckImportJobOut
+from app.schemas.deck_stats import DeckStats
 from app.schemas.cards import DeckDetail, DeckUpdate
+from app.services.deck_versions import (
+    DeckVersions,
+    bump_content_version,
+    load_deck_versions,
+    make_etag,
+    etag_matches,
+)
+from app.services.deck_search import (
+    public_decks_search_stmt,
+    prefix_tsquery,
+    encode_search_cursor,
+    decode_search_cursor,
+)
+from app.services.deck_queries import (
+    user_decks_stmt,
+    load_due_counts,
+    user_has_deck_stmt,
+    load_deck_card_summaries,
+    load_active_levels,
+)
+from app.services.review_queue import load_levels_by_card
+from app.services.deck_export import iter_deck_ndjson, gzip_chunks
+from app.services.deck_import import process_import_job
+from app.services.deck_stats import get_deck_stats
+from app.services.study_cards import RANDOM_MODES, NEW_MODES, load_study_cards, decode_study_cursor
 
 router = APIRouter(tags=["decks"])
 
+T = TypeVar("T")
+
 
 def get_db():
     db = SessionLocal()
@@ -32,23 +67,6 @@ def get_db():
         db.close()
 
 
-def _ensure_settings(db: Session, user_id: UUID) -> UserLearningSettings:
-    s = db.query(UserLearningSettings).filter_by(user_id=user_id).first()
-    if s:
-        return s
-    s = UserLearningSettings(user_id=user_id)
-    db.add(s)
-    db.commit()
-    db.refresh(s)
-    return s
-
-
-
-
-
-
-
-
 @router.get("/public", response_model=List[PublicDeckSummary])
 def search_public_decks(
     q: Optional[str] = Query(default=None),
@@ -79,58 +97,134 @@ def search_public_decks(
     ]
 
 
-@router.get("/", response_model=List[DeckSummary])
-def list_user_decks(user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
-    user_uuid = user_id
+@router.get("/public/search", response_model=PublicDeckSearchPage)
+def search_public_decks_indexed(
+    q: Optional[str] = Query(default=None, max_length=200),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    after = None
+    if cursor:
+        try:
+            after = decode_search_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    if q and q.strip() and prefix_tsquery(q) is None:
+        # в запросе нет ни одного слова — пустая выдача, а не весь каталог
+        return PublicDeckSearchPage(items=[])
+
+    rows = db.execute(public_decks_search_stmt(q=q, limit=limit + 1, after=after)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return PublicDeckSearchPage(
+        items=[PublicDeckSearchItem(**row._mapping) for row in rows],
+        next_cursor=encode_search_cursor(rows[-1].score, rows[-1].deck_id) if has_more else None,
+    )
 
-    user_groups = db.query(UserStudyGroup).filter(UserStudyGroup.user_id == user_uuid).all()
-    if not user_groups:
-        return []
 
-    deck_list = []
-    for ug in user_groups:
-        links = db.query(UserStudyGroupDeck).filter(UserStudyGroupDeck.user_group_id == ug.id).all()
-        for link in links:
-            deck = db.query(Deck).filter(Deck.id == link.deck_id).first()
-            if deck:
-                deck_list.append(DeckSummary(deck_id=deck.id, title=deck.title))
-    return deck_list
+@router.get("/", response_model=List[UserDeckSummary])
+def list_user_decks(user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    # два запроса на любой размер библиотеки: колоды (+счётчики) и due по корзинам
+    rows = db.execute(user_decks_stmt(user_id)).all()
+    if not rows:
+        return []
 
+    due_by_deck = load_due_counts(
+        db,
+        user_id=user_id,
+        deck_ids=[row.deck_id for row in rows],
+        now=datetime.now(timezone.utc),
+    )
+    return [
+        UserDeckSummary(**row._mapping, due_count=due_by_deck.get(row.deck_id, 0))
+        for row in rows
+    ]
 
-@router.get("/{deck_id}/cards", response_model=List[CardSummary])
-def list_deck_cards(deck_id: UUID, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
-    user_uuid = user_id
 
-    link = (
-        db.query(UserStudyGroupDeck)
-        .join(UserStudyGroup)
-        .filter(UserStudyGroup.user_id == user_uuid, UserStudyGroupDeck.deck_id == deck_id)
-        .first()
+def _cached_deck_response(
+    db: Session,
+    *,
+    request: Request,
+    response: Response,
+    user_id: UUID,
+    deck_id: UUID,
+    access: Literal["public", "groups"],
+    with_progress: bool,
+    build: Callable[[Session], T],
+    cacheable: bool = True,
+) -> T | Response:
+    """
+    ETag/If-None-Match для содержимого колоды: сначала один запрос версий (и доступа),
+    при совпадении — 304 без загрузки карточек и уровней, иначе build(db) + ETag.
+    access — как проверяет доступ сам эндпоинт: "public" (owner или public), "groups" (колода в группах юзера).
+    """
+    versions = load_deck_versions(db, user_id=user_id, deck_id=deck_id) if cacheable else None
+    accessible = versions is not None and (
+        versions.in_user_groups if access == "groups"
+        else versions.owner_id == user_id or versions.is_public
     )
-    if not link:
-        raise HTTPException(404, "Deck not found or access denied")
-
-    cards = db.query(Card).filter(Card.deck_id == deck_id).all()
-    result = []
-    for card in cards:
-        levels = db.query(CardLevel).filter(CardLevel.card_id == card.id).all()
-        levels_data = [CardLevelContent(level_index=l.level_index, content=l.content) for l in levels]
-        result.append(CardSummary(card_id=card.id, title=card.title, type=card.type, levels=levels_data))
+    if not accessible:
+        # нет колоды / нет доступа / ответ не кэшируемый — пусть эндпоинт ответит как обычно
+        return build(db)
+
+    variant = request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    etag = make_etag(versions, variant=variant, with_progress=with_progress)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    result = build(db)
+    response.headers.update(headers)
     return result
 
 
-@router.get("/{deck_id}/session", response_model=list[DeckSessionCard])
-def get_deck_session(
+def _ensure_user_deck(db: Session, *, user_id: UUID, deck_id: UUID) -> None:
+    # доступ через линк user -> group -> deck
+    if not db.execute(user_has_deck_stmt(user_id=user_id, deck_id=deck_id)).scalar():
+        raise HTTPException(status_code=404, detail="Deck not found or access denied")
+
+
+def _deck_cards(
+    db: Session, *, user_id: UUID, deck_id: UUID, with_content: bool
+) -> list[CardSummary] | list[CardOutline]:
+    _ensure_user_deck(db, user_id=user_id, deck_id=deck_id)
+    return load_deck_card_summaries(db, deck_id, with_content=with_content)
+
+
+# with_content=false — уровни без поля content (CardOutline)
+@router.get("/{deck_id}/cards", response_model=Union[List[CardSummary], List[CardOutline]])
+def list_deck_cards(
     deck_id: UUID,
+    request: Request,
+    response: Response,
+    with_content: bool = Query(default=True),
     user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    user_uuid = user_id
-    settings = _ensure_settings(db, user_uuid)
+    return _cached_deck_response(
+        db,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="groups",
+        with_progress=False,
+        build=partial(_deck_cards, user_id=user_id, deck_id=deck_id, with_content=with_content),
+    )
+
 
+def _deck_session(db: Session, *, user_id: UUID, deck_id: UUID) -> list[dict]:
+    """
+    Только чтение: прогресс не создаётся. Карточка без активного прогресса —
+    «новая» и показывается на уровне 0; строка card_progress появится при первом
+    review / level_up (см. _ensure_active_progress, apply_single_review).
+    """
     deck = db.query(Deck).filter(
         Deck.id == deck_id,
-        (Deck.owner_id == user_uuid) | (Deck.is_public == True)
+        (Deck.owner_id == user_id) | (Deck.is_public == True)
     ).first()
     if not deck:
         raise HTTPException(403, "Deck not accessible")
@@ -145,54 +239,7 @@ def get_deck_session(
         return []
 
     card_ids = [c.id for c in cards]
-
-    # Берём активный прогресс по карточкам
-    progress_list: List[CardProgress] = (
-        db.query(CardProgress)
-        .filter(
-            CardProgress.user_id == user_uuid,
-            CardProgress.card_id.in_(card_ids),
-            CardProgress.is_active == True,
-        )
-        .all()
-    )
-    progress_by_card = {p.card_id: p for p in progress_list}
-
-    # Создаём отсутствующие активные прогрессы на level0
-    now = datetime.now(timezone.utc)
-    to_create: list[CardProgress] = []
-
-    # Чтобы не делать N+1 за level0, можно одним запросом взять все level0:
-    lvl0_all = (
-        db.query(CardLevel)
-        .filter(CardLevel.card_id.in_(card_ids), CardLevel.level_index == 0)
-        .all()
-    )
-    lvl0_by_card = {l.card_id: l for l in lvl0_all}
-
-    for c in cards:
-        if c.id in progress_by_card:
-            continue
-        lvl0 = lvl0_by_card.get(c.id)
-        if not lvl0:
-            continue
-
-        p = CardProgress(
-            user_id=user_uuid,
-            card_id=c.id,
-            card_level_id=lvl0.id,
-            is_active=True,
-            stability=settings.initial_stability,
-            difficulty=settings.initial_difficulty,
-            last_reviewed=now,
-            next_review=now,
-        )
-        to_create.append(p)
-        progress_by_card[c.id] = p
-
-    if to_create:
-        db.add_all(to_create)
-        db.commit()
+    active_by_card = load_active_levels(db, user_id=user_id, card_ids=card_ids)
 
     # уровни пачкой
     levels_all: List[CardLevel] = (
@@ -205,27 +252,51 @@ def get_deck_session(
     for lvl in levels_all:
         levels_by_card.setdefault(lvl.card_id, []).append(lvl)
 
-    # собрать ответ
-    result: List[DeckSessionCard] = []
+    # собрать ответ (dict-ы в форме DeckSessionCard — см. fast_json)
+    result: list[dict] = []
     for card in cards:
-        progress = progress_by_card[card.id]
-        active_level = db.get(CardLevel, progress.card_level_id)
         lvls = levels_by_card.get(card.id, [])
-
-        result.append(
-            DeckSessionCard(
-                card_id=card.id,
-                deck_id=card.deck_id,
-                title=card.title,
-                type=card.type,
-                active_card_level_id=active_level.id,
-                active_level_index=active_level.level_index,
-                levels=[CardLevelContent(level_index=l.level_index, content=l.content) for l in lvls],
-            )
-        )
+        active = active_by_card.get(card.id)
+        if active is None:
+            # нет прогресса — виртуальный уровень 0
+            lvl0 = next((l for l in lvls if l.level_index == 0), None)
+            if lvl0 is None:
+                continue
+            active = (lvl0.id, lvl0.level_index)
+
+        result.append({
+            "card_id": card.id,
+            "deck_id": card.deck_id,
+            "title": card.title,
+            "type": card.type,
+            "active_card_level_id": active[0],
+            "active_level_index": active[1],
+            "levels": [{"level_index": l.level_index, "content": l.content} for l in lvls],
+        })
     return result
 
 
+@router.get("/{deck_id}/session", response_model=list[DeckSessionCard])
+def get_deck_session(
+    deck_id: UUID,
+    request: Request,
+    response: Response,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    result = _cached_deck_response(
+        db,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="public",
+        with_progress=True,
+        build=partial(_deck_session, user_id=user_id, deck_id=deck_id),
+    )
+    return fast_json(result, response)
+
+
 @router.post("/", response_model=DeckSummary, status_code=status.HTTP_201_CREATED)
 def create_deck(
     payload: DeckCreate,
@@ -264,81 +335,222 @@ def create_deck(
     db.commit()
     return DeckSummary(deck_id=deck.id, title=deck.title)
 
-@router.get("/{deck_id}", response_model=DeckWithCards)
+def _deck_with_cards(
+    db: Session, *, user_id: UUID, deck_id: UUID, with_content: bool
+) -> DeckWithCards | DeckWithCardOutlines:
+    _ensure_user_deck(db, user_id=user_id, deck_id=deck_id)
+
+    deck = db.get(Deck, deck_id)
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+
+    model = DeckWithCards if with_content else DeckWithCardOutlines
+    return model(deck=deck, cards=load_deck_card_summaries(db, deck_id, with_content=with_content))
+
+
+@router.get("/{deck_id}", response_model=Union[DeckWithCards, DeckWithCardOutlines])
 def get_deck_with_cards(
     deck_id: UUID,
+    request: Request,
+    response: Response,
+    with_content: bool = Query(default=True),
     userid: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    # доступ как в listdeckcards: через линк user->group->deck [file:151]
-    link = (
-        db.query(UserStudyGroupDeck)
-        .join(UserStudyGroup)
-        .filter(UserStudyGroup.user_id == userid, UserStudyGroupDeck.deck_id == deck_id)
-        .first()
+    return _cached_deck_response(
+        db,
+        request=request,
+        response=response,
+        user_id=userid,
+        deck_id=deck_id,
+        access="groups",
+        with_progress=False,
+        build=partial(_deck_with_cards, user_id=userid, deck_id=deck_id, with_content=with_content),
     )
-    if not link:
-        raise HTTPException(status_code=404, detail="Deck not found or access denied")
 
-    deck = db.query(Deck).filter(Deck.id == deck_id).first()
-    if not deck:
+
+@router.get("/{deck_id}/with_cards", response_model=Union[DeckWithCards, DeckWithCardOutlines])
+def get_deck_with_cards(
+    deck_id: UUID,
+    request: Request,
+    response: Response,
+    with_content: bool = Query(default=True),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    return _cached_deck_response(
+        db,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="groups",
+        with_progress=False,
+        build=partial(_deck_with_cards, user_id=user_id, deck_id=deck_id, with_content=with_content),
+    )
+
+def _accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if coding.lower() != "gzip":
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _export_stream(deck_id: UUID, *, gzip: bool) -> Iterator[bytes]:
+    # своя сессия: запросная закрывается раньше, чем допишется поток
+    db = SessionLocal()
+    try:
+        chunks = iter_deck_ndjson(db, deck_id)
+        yield from gzip_chunks(chunks) if gzip else chunks
+    finally:
+        db.close()
+
+
+def _readable_deck_versions(db: Session, *, user_id: UUID, deck_id: UUID) -> DeckVersions:
+    """Версии колоды, которую пользователь может читать (своя, публичная или в его группах)."""
+    versions = load_deck_versions(db, user_id=user_id, deck_id=deck_id)
+    if versions is None:
         raise HTTPException(status_code=404, detail="Deck not found")
+    if not (versions.owner_id == user_id or versions.is_public or versions.in_user_groups):
+        raise HTTPException(status_code=403, detail="Deck not accessible")
+    return versions
 
-    cards = db.query(Card).filter(Card.deck_id == deck_id).all()
-    result_cards = []
-    for card in cards:
-        levels = db.query(CardLevel).filter(CardLevel.card_id == card.id).all()
-        result_cards.append(
-            CardSummary(
-                card_id=card.id,
-                title=card.title,
-                type=card.type,
-                levels=[CardLevelContent(level_index=l.level_index, content=l.content) for l in levels],
-            )
-        )
 
-    return DeckWithCards(deck=deck, cards=result_cards)
+@router.get("/{deck_id}/stats", response_model=DeckStats)
+def deck_stats(
+    deck_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Сводка по колоде: уровни, средние stability/difficulty, due/overdue/mature, ответы за 7/30 дней."""
+    versions = _readable_deck_versions(db, user_id=user_id, deck_id=deck_id)
+    return get_deck_stats(db, user_id=user_id, deck_id=deck_id, versions=versions, now=datetime.now(timezone.utc))
 
 
-@router.get("/{deck_id}/with_cards", response_model=DeckWithCards)
-def get_deck_with_cards(
+@router.get("/{deck_id}/export")
+def export_deck(
     deck_id: UUID,
+    request: Request,
     user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    link = (
-        db.query(UserStudyGroupDeck)
-        .join(UserStudyGroup)
-        .filter(UserStudyGroup.user_id == user_id, UserStudyGroupDeck.deck_id == deck_id)
-        .first()
+    """NDJSON-выгрузка колоды потоком: одна строка — карточка с уровнями."""
+    _readable_deck_versions(db, user_id=user_id, deck_id=deck_id)
+
+    gzip = _accepts_gzip(request)
+    headers = {"Content-Disposition": f'attachment; filename="deck-{deck_id}.ndjson"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_stream(deck_id, gzip=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
     )
-    if not link:
-        raise HTTPException(status_code=404, detail="Deck not found or access denied")
 
-    deck = db.query(Deck).filter(Deck.id == deck_id).first()
+
+def _ensure_deck_owner(db: Session, *, user_id: UUID, deck_id: UUID) -> None:
+    deck = db.get(Deck, deck_id)
     if not deck:
         raise HTTPException(status_code=404, detail="Deck not found")
+    if deck.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Deck not accessible")  # owner-only
 
-    cards = db.query(Card).filter(Card.deck_id == deck_id).all()
 
-    out_cards = []
-    for c in cards:
-        levels = (
-            db.query(CardLevel)
-            .filter(CardLevel.card_id == c.id)
-            .order_by(CardLevel.level_index.asc())
-            .all()
-        )
-        out_cards.append(
-            CardSummary(
-                card_id=c.id,
-                title=c.title,
-                type=c.type,
-                levels=[CardLevelContent(level_index=l.level_index, content=l.content) for l in levels],
-            )
-        )
+def _create_import_job(db: Session, *, user_id: UUID, deck_id: UUID, fmt: str) -> DeckImportJobOut:
+    job = DeckImportJob(deck_id=deck_id, user_id=user_id, format=fmt)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    out = DeckImportJobOut.model_validate(job)
+    # дальше job обрабатывает своя сессия (process_import_job) — соединение запроса отдаём в пул
+    db.close()
+    return out
+
+
+def _import_job_out(db: Session, job_id: UUID) -> DeckImportJobOut:
+    return DeckImportJobOut.model_validate(db.get(DeckImportJob, job_id))
+
+
+async def _spool_body(request: Request) -> tuple[SpooledTemporaryFile, int]:
+    """Тело запроса во временный файл: в памяти до IMPORT_INLINE_MAX_BYTES, дальше на диске."""
+    upload = SpooledTemporaryFile(max_size=settings.IMPORT_INLINE_MAX_BYTES)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Import file is too large")
+            upload.write(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    upload.seek(0)
+    return upload, size
+
+
+@router.post(
+    "/{deck_id}/import",
+    response_model=DeckImportJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_200_OK: {"model": DeckImportJobOut, "description": "Small file imported inline, final job state"},
+        status.HTTP_202_ACCEPTED: {"description": "Import queued, poll GET .../import/{job_id}"},
+    },
+)
+async def import_deck_cards(
+    deck_id: UUID,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    format: Literal["csv", "jsonl"] = Query(...),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    Массовый импорт карточек (CSV / JSONL в теле запроса, формат — см. services/deck_import).
+    Небольшой файл импортируется сразу (200 + итог), крупный — в фоне (202), статус — GET .../import/{job_id}.
+    """
+    await run_in_threadpool(_ensure_deck_owner, db, user_id=user_id, deck_id=deck_id)
+    # не держим соединение (idle in transaction), пока клиент загружает файл
+    await run_in_threadpool(db.close)
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Import file is too large")
+
+    upload, size = await _spool_body(request)
+    job = await run_in_threadpool(_create_import_job, db, user_id=user_id, deck_id=deck_id, fmt=format)
+
+    if size <= settings.IMPORT_INLINE_MAX_BYTES:
+        await run_in_threadpool(process_import_job, job.job_id, upload)
+        job = await run_in_threadpool(_import_job_out, db, job.job_id)
+        response.status_code = status.HTTP_200_OK
+    else:
+        background_tasks.add_task(process_import_job, job.job_id, upload)
+    return job
+
+
+@router.get("/{deck_id}/import/{job_id}", response_model=DeckImportJobOut)
+def get_import_job(
+    deck_id: UUID,
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    job = db.get(DeckImportJob, job_id)
+    if not job or job.deck_id != deck_id or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return DeckImportJobOut.model_validate(job)
 
-    return DeckWithCards(deck=deck, cards=out_cards)
 
 @router.delete("/{deck_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_deck(
@@ -402,6 +614,7 @@ def update_deck(
     if payload.is_public is not None:
         deck.is_public = payload.is_public
 
+    bump_content_version(db, deck.id)
     db.commit()
     db.refresh(deck)
 
@@ -415,104 +628,159 @@ def update_deck(
     )
 
 
+def _study_cards(
+    db: Session,
+    *,
+    user_id: UUID,
+    deck_id: UUID,
+    mode: str,
+    limit: Optional[int],
+    seed: Optional[int],
+    cursor: Optional[str] = None,
+) -> dict:
+    # доступ как в /session: owner или public
+    deck = db.query(Deck).filter(
+        Deck.id == deck_id,
+        (Deck.owner_id == user_id) | (Deck.is_public == True)
+    ).first()
+    if not deck:
+        raise HTTPException(status_code=403, detail="Deck not accessible")
+
+    # random без seed: генерируем сами и отдаём клиенту — с ним можно листать дальше
+    if mode in RANDOM_MODES and seed is None:
+        if cursor is not None:
+            raise HTTPException(status_code=422, detail="cursor requires seed in random modes")
+        seed = random.randrange(2**31)
+
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_study_cursor(cursor, mode=mode, seed=seed)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    # порядок, фильтр new_* и limit — в SQL
+    rows, next_cursor = load_study_cards(
+        db, user_id=user_id, deck_id=deck_id, mode=mode, seed=seed, limit=limit, after=after
+    )
+    card_ids = [r.id for r in rows]
+    levels_by_card = load_levels_by_card(db, card_ids)
+
+    # activeLevel: читаем ТОЛЬКО активный прогресс (ничего не создаём); у new_* его нет
+    active_by_card = {}
+    if mode not in NEW_MODES:
+        active_by_card = load_active_levels(db, user_id=user_id, card_ids=card_ids)
+
+    # Ответ в формате фронта (camelCase + нужные поля)
+    out = []
+    for r in rows:
+        active = active_by_card.get(r.id)
+        out.append({
+            "id": str(r.id),
+            "deckId": str(r.deck_id),
+            "title": r.title,
+            "type": r.type,
+            "levels": [{"levelIndex": l.level_index, "content": l.content} for l in levels_by_card.get(r.id, [])],
+            "activeLevel": active[1] if active else 0,
+        })
+
+    return {
+        "cards": out,
+        "seed": seed if mode in RANDOM_MODES else None,
+        "nextCursor": next_cursor,
+    }
+
+
 @router.get("/{deck_id}/study-cards")
 def get_study_cards(
     deck_id: UUID,
+    request: Request,
+    response: Response,
     mode: str = Query(..., pattern="^(random|ordered|new_random|new_ordered)$"),
     include: str = Query("full"),
     limit: Optional[int] = Query(default=None, ge=1, le=200),
     seed: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
     user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
     if include != "full":
         raise HTTPException(status_code=422, detail="Only include=full is supported")
 
-    # доступ как в /session: owner или public
-    deck = db.query(Deck).filter(
-        Deck.id == deck_id,
-        (Deck.owner_id == user_id) | (Deck.is_public == True)
-    ).first()
-    if not deck:
-        raise HTTPException(status_code=403, detail="Deck not accessible")
-
-    cards: List[Card] = (
-        db.query(Card)
-        .filter(Card.deck_id == deck_id)
-        .order_by(Card.created_at.asc())
-        .all()
+    result = _cached_deck_response(
+        db,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="public",
+        with_progress=True,
+        build=partial(
+            _study_cards, user_id=user_id, deck_id=deck_id, mode=mode, limit=limit, seed=seed, cursor=cursor
+        ),
+        cacheable=_study_cards_cacheable(mode, seed),
     )
-    if not cards:
-        return {"cards": []}
-
-    # Для new_*: исключаем все карточки, у которых уже есть хоть какой-то прогресс
-    if mode in ("new_random", "new_ordered"):
-        all_ids = [c.id for c in cards]
-        progressed_ids = {
-            row[0]
-            for row in (
-                db.query(CardProgress.card_id)
-                .filter(CardProgress.user_id == user_id, CardProgress.card_id.in_(all_ids))
-                .distinct()
-                .all()
-            )
-        }
-        cards = [c for c in cards if c.id not in progressed_ids]
-
-    # random / new_random: перемешиваем (seed делает это детерминированно)
-    if mode in ("random", "new_random"):
-        rnd = random.Random(seed) if seed is not None else random.Random()
-        rnd.shuffle(cards)
-
-    # limit после финального порядка
-    if limit is not None:
-        cards = cards[:limit]
+    return fast_json(result, response)
 
-    if not cards:
-        return {"cards": []}
 
-    card_ids = [c.id for c in cards]
+def _study_cards_cacheable(mode: str, seed: Optional[int]) -> bool:
+    # random без seed — каждый раз новый порядок, кэшировать нельзя
+    return seed is not None or mode not in RANDOM_MODES
 
-    # Уровни пачкой
-    levels_all: List[CardLevel] = (
-        db.query(CardLevel)
-        .filter(CardLevel.card_id.in_(card_ids))
-        .order_by(CardLevel.card_id.asc(), CardLevel.level_index.asc())
-        .all()
-    )
-    levels_by_card: dict[UUID, List[CardLevel]] = {}
-    for lvl in levels_all:
-        levels_by_card.setdefault(lvl.card_id, []).append(lvl)
 
-    # activeLevel: читаем ТОЛЬКО активный прогресс (ничего не создаём)
-    active_level_index_by_card: dict[UUID, int] = {}
-    if mode in ("random", "ordered"):
-        active_rows = (
-            db.query(CardProgress.card_id, CardLevel.level_index)
-            .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
-            .filter(
-                CardProgress.user_id == user_id,
-                CardProgress.card_id.in_(card_ids),
-                CardProgress.is_active == True,
-            )
-            .all()
-        )
-        active_level_index_by_card = {card_id: lvl_index for card_id, lvl_index in active_rows}
+# --- async-варианты (DB_ASYNC=true), см. cards.async_router ---
 
-    # Ответ в формате фронта (camelCase + нужные поля)
-    out = []
-    for c in cards:
-        lvls = levels_by_card.get(c.id, [])
-        if not lvls:
-            continue
+async_router = APIRouter(tags=["decks"])
+
+
+@async_router.get("/{deck_id}/session", response_model=list[DeckSessionCard])
+async def get_deck_session_async(
+    deck_id: UUID,
+    request: Request,
+    response: Response,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    result = await db.run_sync(
+        _cached_deck_response,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="public",
+        with_progress=True,
+        build=partial(_deck_session, user_id=user_id, deck_id=deck_id),
+    )
+    return fast_json(result, response)
 
-        out.append({
-            "id": str(c.id),
-            "deckId": str(c.deck_id),
-            "title": c.title,
-            "type": c.type,
-            "levels": [{"levelIndex": l.level_index, "content": l.content} for l in lvls],
-            "activeLevel": active_level_index_by_card.get(c.id, 0),
-        })
 
-    return {"cards": out}
\ No newline at end of file
+@async_router.get("/{deck_id}/study-cards")
+async def get_study_cards_async(
+    deck_id: UUID,
+    request: Request,
+    response: Response,
+    mode: str = Query(..., pattern="^(random|ordered|new_random|new_ordered)$"),
+    include: str = Query("full"),
+    limit: Optional[int] = Query(default=None, ge=1, le=200),
+    seed: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if include != "full":
+        raise HTTPException(status_code=422, detail="Only include=full is supported")
+
+    result = await db.run_sync(
+        _cached_deck_response,
+        request=request,
+        response=response,
+        user_id=user_id,
+        deck_id=deck_id,
+        access="public",
+        with_progress=True,
+        build=partial(
+            _study_cards, user_id=user_id, deck_id=deck_id, mode=mode, limit=limit, seed=seed, cursor=cursor
+        ),
+        cacheable=_study_cards_cacheable(mode, seed),
+    )
+    return fast_json(result, response)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from typing import List, Optional, Literal
 from uuid import UUID
 
 from app.db.session import SessionLocal
@@ -14,12 +16,13 @@ from app.models.user_study_group_deck import UserStudyGroupDeck
 from app.models.deck import Deck
 from app.models.card import Card
 from app.auth.dependencies import get_current_user_id
+from app.services.deck_queries import group_decks_stmt, load_cards_by_deck, load_deck_counters
 
 from app.schemas.group import UserGroupResponse, GroupKind
 
 from app.models import StudyGroupDeck
 
-from app.schemas.cards import DeckDetail
+from app.schemas.cards import DeckDetail, GroupDeckSummary
 
 router = APIRouter()
 
@@ -214,7 +217,13 @@ def delete_group(
 # Получить колоды группы вместе с карточками
 # -------------------------------
 @router.get("/{group_id}/decks", response_model=list[DeckWithCards])
-def get_group_decks(group_id: UUID, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
+def get_group_decks(
+    group_id: UUID,
+    include: Literal["summary", "cards", "levels"] = Query(default="cards"),
+    card_limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
     # Проверяем, что пользователь связан с группой
     user_group = db.query(UserStudyGroup).filter(
         UserStudyGroup.user_id == user_id,
@@ -223,32 +232,22 @@ def get_group_decks(group_id: UUID, user_id: UUID = Depends(get_current_user_id)
     if not user_group:
         raise HTTPException(status_code=404, detail="Group not found or access denied")
 
-    # Получаем все колоды группы
-    group_decks = db.query(UserStudyGroupDeck).filter(
-        UserStudyGroupDeck.user_group_id == user_group.id
-    ).all()
-
-    result = []
-    for ugd in group_decks:
-        deck = db.query(Deck).filter(Deck.id == ugd.deck_id).first()
-        if not deck:
-            continue
-
-        # Получаем карточки колоды
-        cards = db.query(Card).filter(Card.deck_id == deck.id).all()
-        cards_summary = [
-            CardSummary(card_id=c.id, title=c.title, type=c.type)
-            for c in cards
-        ]
-
-        result.append(
-            DeckWithCards(
-                deck=deck,
-                cards=cards_summary
-            )
+    # колоды группы одним запросом, в порядке order_index
+    decks = db.execute(group_decks_stmt(user_group.id)).scalars().all()
+    if not decks:
+        return []
+
+    # карточки (и уровни) всех колод — ещё одним, с лимитом на колоду
+    cards_by_deck = {}
+    if include != "summary":
+        cards_by_deck = load_cards_by_deck(
+            db,
+            [deck.id for deck in decks],
+            card_limit=card_limit,
+            with_levels=include == "levels",
         )
 
-    return result
+    return [DeckWithCards(deck=deck, cards=cards_by_deck.get(deck.id, [])) for deck in decks]
 
 
 def assert_group_is_modifiable(ug: UserStudyGroup, user_id: UUID, db: Session) -> None:
@@ -334,7 +333,7 @@ def remove_deck_from_group(
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@router.get("/{user_group_id}/decks/summary", response_model=List[DeckDetail])
+@router.get("/{user_group_id}/decks/summary", response_model=List[GroupDeckSummary])
 def get_group_decks_summary(
     user_group_id: UUID,
     user_id: UUID = Depends(get_current_user_id),
@@ -362,5 +361,12 @@ def get_group_decks_summary(
     decks = db.query(Deck).filter(Deck.id.in_(deck_ids)).all()
     deck_by_id = {d.id: d for d in decks}
 
+    # счётчики — готовые строки user_deck_state / user_deck_due_buckets, без агрегатов по прогрессу
+    counters = load_deck_counters(db, user_id=user_id, deck_ids=deck_ids, now=datetime.now(timezone.utc))
+
     # Важно: DeckDetail должен уметь принимать ORM Deck (ownerid/ispublic/id и т.д.)
-    return [DeckDetail.model_validate(deck_by_id[did]) for did in deck_ids if did in deck_by_id]
\ No newline at end of file
+    return [
+        GroupDeckSummary.model_validate(deck_by_id[did]).model_copy(update=counters.get(did, {}))
+        for did in deck_ids
+        if did in deck_by_id
+    ]
\ No newline at end of file
@@ -8,7 +8,8 @@ from app.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user_id(token: str = Depends(oauth2_scheme)) -> UUID:
+# async: чистая проверка JWT, не нужен поток из threadpool
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> UUID:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         sub = payload.get("sub")
@@ -12,4 +12,44 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # per-process кэш UserLearningSettings (секунды / кол-во пользователей);
+    # изменения из других воркеров и bulk UPDATE видны не позже чем через TTL
+    LEARNING_SETTINGS_CACHE_TTL: int = 300
+    LEARNING_SETTINGS_CACHE_SIZE: int = 10_000
+
+    # per-process кэш GET /api/decks/{id}/stats по (user, deck); сбрасывается сменой версий колоды,
+    # TTL — чтобы due_today/overdue не отставали от времени
+    DECK_STATS_CACHE_TTL: int = 60
+    DECK_STATS_CACHE_SIZE: int = 10_000
+
+    # горячие эндпоинты (очередь, ответ, сессия колоды, study-cards) на AsyncSession/asyncpg;
+    # false — прежний sync-путь через psycopg2 и threadpool
+    DB_ASYNC: bool = False
+
+    # движок/пул (на процесс; при N воркерах и M репликах держим
+    # N * M * (DB_POOL_SIZE + DB_MAX_OVERFLOW) < max_connections Postgres)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT_MS: int = 100
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000  # 0 — без лимита
+    DB_APPLICATION_NAME: str = "mnemonicflow-api"
+
+    # warning в логе, если эндпоинт сделал больше N SQL-запросов (0 — выкл.)
+    DB_QUERY_WARN_THRESHOLD: int = 20
+
+    # очередь/сессия/study-cards сериализуются pydantic-core напрямую (app.core.responses.fast_json);
+    # false — обычный путь FastAPI через response_model
+    FAST_JSON_RESPONSES: bool = True
+
+    # импорт колоды (POST /api/decks/{id}/import): файлы до IMPORT_INLINE_MAX_BYTES
+    # обрабатываются в запросе, крупнее — фоновой задачей с опросом статуса
+    IMPORT_MAX_BYTES: int = 200 * 1024 * 1024
+    IMPORT_INLINE_MAX_BYTES: int = 1024 * 1024
+    IMPORT_CHUNK_SIZE: int = 500  # карточек на один INSERT/commit
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
+
 settings = Settings()
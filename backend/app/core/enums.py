@@ -5,3 +5,9 @@ class ReviewRating(str, Enum):
     hard = "hard"
     good = "good"
     easy = "easy"
+
+class ImportJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
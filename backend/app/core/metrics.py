@@ -0,0 +1,177 @@
+"""
+Метрики процесса в текстовом формате Prometheus (/metrics).
+
+Запись без блокировок на горячем пути: каждый поток (event loop, воркеры
+threadpool) пишет в свой шард — обычный dict, — а блокировка берётся только
+при появлении нового потока и при чтении в render(). Значения — на процесс:
+при нескольких воркерах uvicorn Prometheus скрейпит каждый отдельно.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def _labels(self, values: tuple, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(self.labelnames, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _Sharded(_Metric):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshots(self) -> list[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    type_name = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return sum(s.get(labelvalues, 0) for s in self._snapshots())
+
+    def render(self) -> list[str]:
+        totals: dict[tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, v in shard.items():
+                totals[labels] = totals.get(labels, 0) + v
+        return self._header() + [
+            f"{self.name}{self._labels(labels)} {_fmt(v)}" for labels, v in sorted(totals.items())
+        ]
+
+
+class Histogram(_Sharded):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues) -> None:
+        shard = self._shard()
+        state = shard.get(labelvalues)
+        if state is None:
+            # [счётчики по корзинам (+Inf последней)..., sum, count]
+            state = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def count(self, *labelvalues) -> int:
+        return sum(s[labelvalues][-1] for s in self._snapshots() if labelvalues in s)
+
+    def render(self) -> list[str]:
+        totals: dict[tuple, list] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                acc = totals.setdefault(labels, [0] * len(state))
+                for i, v in enumerate(state):
+                    acc[i] += v
+
+        lines = self._header()
+        for labels, state in sorted(totals.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), state):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                bucket_labels = self._labels(labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_fmt(state[-2])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {state[-1]}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Значение читается в момент скрейпа: callback -> [(labelvalues, value), ...]."""
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), *, callback: Callable[[], Iterable[tuple[tuple, float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{self._labels(labels)} {_fmt(v)}" for labels, v in self.callback()
+        ]
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- метрики приложения ---
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+REVIEWS = Counter("reviews_total", "Applied card reviews by rating.", ("rating",))
+LEVEL_CHANGES = Counter("card_level_changes_total", "Manual level_up / level_down calls.", ("direction",))
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hashing / verification time.",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
@@ -0,0 +1,87 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.db.instrumentation import begin_query_stats, end_query_stats
+
+logger = logging.getLogger("app.requests")
+
+
+def route_template(scope: Scope) -> str | None:
+    """Шаблон пути (/api/decks/{deck_id}) вместо конкретного URL; None — ни один роут не совпал."""
+    # у вложенных роутеров scope["route"] хранит путь без префикса; полный шаблон
+    # FastAPI кладёт в effective_route_context
+    candidates = (scope.get("fastapi", {}).get("effective_route_context"), scope.get("route"))
+    for route in candidates:
+        path = getattr(route, "path_format", None)
+        if path:
+            return path
+    return None
+
+
+class RequestStatsMiddleware:
+    """
+    Считает SQL-запросы и время в БД на HTTP-запрос.
+    Отдаёт их в Server-Timing / X-DB-Queries и пишет одну строку лога на запрос;
+    если запросов больше DB_QUERY_WARN_THRESHOLD — warning (ищем N+1).
+    Латентность по шаблону роута уходит в http_request_duration_seconds.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_query_stats()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}',
+                )
+                headers.append("X-DB-Queries", str(stats.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_query_stats(token)
+            elapsed = time.perf_counter() - started
+            total_ms = elapsed * 1000
+            # несовпавшие пути не пишем в метку как есть — иначе кардинальность растёт от сканеров
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], route or "unmatched", status_code)
+            threshold = settings.DB_QUERY_WARN_THRESHOLD
+            level = logging.WARNING if threshold and stats.count > threshold else logging.INFO
+            logger.log(
+                level,
+                "method=%s route=%s status=%s db_queries=%d db_ms=%.1f total_ms=%.1f",
+                scope["method"],
+                route or scope["path"],
+                status_code,
+                stats.count,
+                stats.duration_ms,
+                total_ms,
+                extra={
+                    "method": scope["method"],
+                    "route": route or scope["path"],
+                    "status": status_code,
+                    "db_queries": stats.count,
+                    "db_ms": round(stats.duration_ms, 1),
+                    "total_ms": round(total_ms, 1),
+                },
+            )
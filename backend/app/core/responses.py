@@ -0,0 +1,29 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic_core import to_json
+
+from app.core.config import settings
+
+
+def fast_json(value: Any, response: Response | None = None) -> Any:
+    """
+    Быстрый путь для горячих списков: сериализуем сразу через pydantic-core (Rust)
+    и отдаём готовый Response — FastAPI тогда не валидирует ответ по response_model.
+    response_model у роута остаётся для OpenAPI.
+
+    value — dict/list из строк БД (UUID, datetime, JSONB как есть) или модели.
+    Моделей для таких ответов не строим: в pydantic v2 и конструктор, и model_construct
+    дороже самой сериализации.
+    response — внедрённый Response роута: его заголовки (ETag и т.п.) переносим.
+    Готовый Response (304 из _cached_deck_response) и FAST_JSON_RESPONSES=false — как есть.
+    """
+    if isinstance(value, Response) or not settings.FAST_JSON_RESPONSES:
+        return value
+
+    out = Response(content=to_json(value), media_type="application/json")
+    if response is not None:
+        out.raw_headers.extend(
+            (k, v) for k, v in response.raw_headers if k not in (b"content-length", b"content-type")
+        )
+    return out
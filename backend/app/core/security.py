@@ -8,6 +8,7 @@ from jose import jwt, JWTError
 from app.models.user import User
 from app.db.session import SessionLocal
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.auth.jwt import decode_access_token  # добавь импорт
@@ -30,13 +31,15 @@ def hash_password(password: str) -> str:
     if not isinstance(password, str):
         password = str(password)
     safe_password = password.encode("utf-8")[:72].decode("utf-8", errors="ignore")
-    return pwd_context.hash(safe_password)
+    with PASSWORD_HASH_DURATION.time("hash"):
+        return pwd_context.hash(safe_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     if not isinstance(plain_password, str):
         plain_password = str(plain_password)
     safe_password = plain_password.encode("utf-8")[:72].decode("utf-8", errors="ignore")
-    return pwd_context.verify(safe_password, hashed_password)
+    with PASSWORD_HASH_DURATION.time("verify"):
+        return pwd_context.verify(safe_password, hashed_password)
 
 
 def get_current_user(
@@ -0,0 +1,271 @@
+"""
+Счётчики decks.card_count / decks.subscriber_count и счётчики пользователя по колоде
+(user_deck_state.started_count / learning_count, user_deck_due_buckets).
+
+Ведутся триггерами уровня statement (с transition tables), поэтому учитываются
+любые пути записи: ORM, bulk insert, каскадные удаления. subscriber_count —
+число разных пользователей, у которых колода есть хотя бы в одной группе.
+Перенос карточки между колодами (UPDATE cards.deck_id) счётчики не трогает —
+такого пути в API нет.
+
+Прогресс по колоде (триггеры на card_progress): started_count — карточек с активным
+уровнем (new = decks.card_count - started_count), learning_count — из них со
+stability < LEARNING_STABILITY_DAYS, user_deck_due_buckets — активные карточки по часу
+next_review. Удаление карточки вычитает её прогресс BEFORE DELETE (каскадное удаление
+card_progress после этого уже не находит карточку в join и счётчики не трогает).
+Расхождения чинят app.services.deck_counters.reconcile_deck_counters (прогресс)
+и reconcile_deck_totals (card_count / subscriber_count).
+"""
+
+# карточка "на изучении", пока интервал меньше суток
+LEARNING_STABILITY_DAYS = 1.0
+# ширина корзины due: час next_review
+DUE_BUCKET_SECONDS = 3600
+
+DUE_BUCKET_SQL = f"to_timestamp(floor(extract(epoch FROM next_review) / {DUE_BUCKET_SECONDS}) * {DUE_BUCKET_SECONDS})"
+
+# delta — (user_id, deck_id, next_review, stability, d) c d = +1/-1 на активную строку прогресса;
+# сначала user_deck_state, потом корзины: тот же порядок блокировок, что у реконсилятора.
+# Корзины, из которых ушли карточки и которые обнулились, удаляются тем же триггером.
+_PROGRESS_COUNTERS_FN = """
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO user_deck_state AS s (user_id, deck_id, started_count, learning_count)
+        SELECT user_id, deck_id, sum(d), coalesce(sum(d) FILTER (WHERE stability < {learning}), 0)
+        FROM ({delta}) delta
+        GROUP BY user_id, deck_id
+        HAVING sum(d) <> 0 OR coalesce(sum(d) FILTER (WHERE stability < {learning}), 0) <> 0
+        ON CONFLICT (user_id, deck_id) DO UPDATE
+        SET started_count = s.started_count + EXCLUDED.started_count,
+            learning_count = s.learning_count + EXCLUDED.learning_count;
+
+        INSERT INTO user_deck_due_buckets AS b (user_id, deck_id, bucket_start, card_count)
+        SELECT user_id, deck_id, {bucket}, sum(d)
+        FROM ({delta}) delta
+        WHERE next_review IS NOT NULL
+        GROUP BY 1, 2, 3
+        HAVING sum(d) <> 0
+        ON CONFLICT (user_id, deck_id, bucket_start) DO UPDATE
+        SET card_count = b.card_count + EXCLUDED.card_count;
+
+        -- опустевшие корзины удаляем сразу: чтение due суммирует только живые строки
+        DELETE FROM user_deck_due_buckets b
+        USING (SELECT DISTINCT user_id, deck_id, {bucket} AS bucket_start FROM ({delta}) delta
+               WHERE next_review IS NOT NULL AND d < 0) x
+        WHERE b.user_id = x.user_id AND b.deck_id = x.deck_id
+          AND b.bucket_start = x.bucket_start AND b.card_count = 0;
+
+        RETURN {ret};
+    END $$ LANGUAGE plpgsql
+"""
+
+_PROGRESS_DELTA = """
+    SELECT p.user_id, c.deck_id, p.next_review, p.stability, {d} AS d
+    FROM {rows} p JOIN cards c ON c.id = p.card_id
+    WHERE p.is_active
+"""
+
+
+def _progress_counters_fn(name: str, delta: str, ret: str = "NULL") -> str:
+    return _PROGRESS_COUNTERS_FN.format(
+        name=name, delta=delta, ret=ret, learning=LEARNING_STABILITY_DAYS, bucket=DUE_BUCKET_SQL
+    )
+
+TRIGGERS_SQL = [
+    # --- cards -> decks.card_count ---
+    """
+    CREATE OR REPLACE FUNCTION decks_card_count_ins() RETURNS trigger AS $$
+    BEGIN
+        UPDATE decks d SET card_count = d.card_count + x.n
+        FROM (SELECT deck_id, count(*) AS n FROM new_cards GROUP BY deck_id) x
+        WHERE d.id = x.deck_id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION decks_card_count_del() RETURNS trigger AS $$
+    BEGIN
+        UPDATE decks d SET card_count = greatest(d.card_count - x.n, 0)
+        FROM (SELECT deck_id, count(*) AS n FROM old_cards GROUP BY deck_id) x
+        WHERE d.id = x.deck_id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_cards_count_ins ON cards",
+    """
+    CREATE TRIGGER trg_cards_count_ins AFTER INSERT ON cards
+    REFERENCING NEW TABLE AS new_cards
+    FOR EACH STATEMENT EXECUTE FUNCTION decks_card_count_ins()
+    """,
+    "DROP TRIGGER IF EXISTS trg_cards_count_del ON cards",
+    """
+    CREATE TRIGGER trg_cards_count_del AFTER DELETE ON cards
+    REFERENCING OLD TABLE AS old_cards
+    FOR EACH STATEMENT EXECUTE FUNCTION decks_card_count_del()
+    """,
+    # --- user_study_group_decks -> decks.subscriber_count ---
+    # +1 пользователю, у которого до этого statement колоды не было ни в одной группе
+    """
+    CREATE OR REPLACE FUNCTION decks_subscriber_count_ins() RETURNS trigger AS $$
+    BEGIN
+        UPDATE decks d SET subscriber_count = d.subscriber_count + x.n
+        FROM (
+            SELECT nl.deck_id, count(DISTINCT g.user_id) AS n
+            FROM new_links nl
+            JOIN user_study_groups g ON g.id = nl.user_group_id
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM user_study_group_decks l
+                JOIN user_study_groups g2 ON g2.id = l.user_group_id
+                WHERE l.deck_id = nl.deck_id
+                  AND g2.user_id = g.user_id
+                  AND NOT EXISTS (
+                      SELECT 1 FROM new_links n2
+                      WHERE n2.deck_id = l.deck_id AND n2.user_group_id = l.user_group_id
+                  )
+            )
+            GROUP BY nl.deck_id
+        ) x
+        WHERE d.id = x.deck_id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    # -1 пользователю, у которого после statement колоды не осталось ни в одной группе
+    """
+    CREATE OR REPLACE FUNCTION decks_subscriber_count_del() RETURNS trigger AS $$
+    BEGIN
+        UPDATE decks d SET subscriber_count = greatest(d.subscriber_count - x.n, 0)
+        FROM (
+            SELECT ol.deck_id, count(DISTINCT g.user_id) AS n
+            FROM old_links ol
+            JOIN user_study_groups g ON g.id = ol.user_group_id
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM user_study_group_decks l
+                JOIN user_study_groups g2 ON g2.id = l.user_group_id
+                WHERE l.deck_id = ol.deck_id AND g2.user_id = g.user_id
+            )
+            GROUP BY ol.deck_id
+        ) x
+        WHERE d.id = x.deck_id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_group_decks_subscribers_ins ON user_study_group_decks",
+    """
+    CREATE TRIGGER trg_group_decks_subscribers_ins AFTER INSERT ON user_study_group_decks
+    REFERENCING NEW TABLE AS new_links
+    FOR EACH STATEMENT EXECUTE FUNCTION decks_subscriber_count_ins()
+    """,
+    "DROP TRIGGER IF EXISTS trg_group_decks_subscribers_del ON user_study_group_decks",
+    """
+    CREATE TRIGGER trg_group_decks_subscribers_del AFTER DELETE ON user_study_group_decks
+    REFERENCING OLD TABLE AS old_links
+    FOR EACH STATEMENT EXECUTE FUNCTION decks_subscriber_count_del()
+    """,
+    # --- card_progress -> user_deck_state / user_deck_due_buckets ---
+    _progress_counters_fn(
+        "user_deck_counters_ins", _PROGRESS_DELTA.format(d="1", rows="new_progress")
+    ),
+    _progress_counters_fn(
+        "user_deck_counters_upd",
+        _PROGRESS_DELTA.format(d="-1", rows="old_progress")
+        + " UNION ALL "
+        + _PROGRESS_DELTA.format(d="1", rows="new_progress"),
+    ),
+    _progress_counters_fn(
+        "user_deck_counters_del", _PROGRESS_DELTA.format(d="-1", rows="old_progress")
+    ),
+    # карточка удаляется: её активный прогресс (сама строка cards ещё на месте)
+    _progress_counters_fn(
+        "user_deck_counters_card_del",
+        """
+        SELECT p.user_id, OLD.deck_id AS deck_id, p.next_review, p.stability, -1 AS d
+        FROM card_progress p
+        WHERE p.card_id = OLD.id AND p.is_active
+        """,
+        ret="OLD",
+    ),
+    "DROP TRIGGER IF EXISTS trg_card_progress_counters_ins ON card_progress",
+    """
+    CREATE TRIGGER trg_card_progress_counters_ins AFTER INSERT ON card_progress
+    REFERENCING NEW TABLE AS new_progress
+    FOR EACH STATEMENT EXECUTE FUNCTION user_deck_counters_ins()
+    """,
+    "DROP TRIGGER IF EXISTS trg_card_progress_counters_upd ON card_progress",
+    """
+    CREATE TRIGGER trg_card_progress_counters_upd AFTER UPDATE ON card_progress
+    REFERENCING OLD TABLE AS old_progress NEW TABLE AS new_progress
+    FOR EACH STATEMENT EXECUTE FUNCTION user_deck_counters_upd()
+    """,
+    "DROP TRIGGER IF EXISTS trg_card_progress_counters_del ON card_progress",
+    """
+    CREATE TRIGGER trg_card_progress_counters_del AFTER DELETE ON card_progress
+    REFERENCING OLD TABLE AS old_progress
+    FOR EACH STATEMENT EXECUTE FUNCTION user_deck_counters_del()
+    """,
+    "DROP TRIGGER IF EXISTS trg_cards_progress_counters_del ON cards",
+    """
+    CREATE TRIGGER trg_cards_progress_counters_del BEFORE DELETE ON cards
+    FOR EACH ROW EXECUTE FUNCTION user_deck_counters_card_del()
+    """,
+]
+
+# пересчёт с нуля — когда колонка счётчика только что добавлена в существующую таблицу
+# правда для счётчиков decks по колонке; {deck_filter} — условие на deck_id (бэкфилл — TRUE)
+DECK_COUNTS_SQL = {
+    "card_count": "SELECT deck_id, count(*) AS n FROM cards WHERE {deck_filter} GROUP BY deck_id",
+    "subscriber_count": """
+        SELECT l.deck_id, count(DISTINCT g.user_id) AS n
+        FROM user_study_group_decks l
+        JOIN user_study_groups g ON g.id = l.user_group_id
+        WHERE {deck_filter}
+        GROUP BY l.deck_id
+    """,
+}
+
+
+def deck_recount_sql(column: str) -> str:
+    """
+    Сверка счётчика decks для колод id BETWEEN :first_id AND :last_id (реконсилятор):
+    тот же подсчёт, что в бэкфилле, но с нулём для колод без строк и только для отличающихся.
+    """
+    counts = DECK_COUNTS_SQL[column].format(deck_filter="deck_id BETWEEN :first_id AND :last_id")
+    return f"""
+        UPDATE decks d SET {column} = x.n
+        FROM (
+            SELECT dk.id AS deck_id, coalesce(c.n, 0) AS n
+            FROM decks dk LEFT JOIN ({counts}) c ON c.deck_id = dk.id
+            WHERE dk.id BETWEEN :first_id AND :last_id
+        ) x
+        WHERE d.id = x.deck_id AND d.{column} <> x.n
+    """
+
+
+BACKFILL_SQL = {
+    ("decks", column): f"""
+        UPDATE decks d SET {column} = x.n
+        FROM ({counts.format(deck_filter="TRUE")}) x
+        WHERE d.id = x.deck_id
+    """
+    for column, counts in DECK_COUNTS_SQL.items()
+} | {
+    # прогресс по колодам: строки user_deck_state дополняются, корзины строятся заново
+    ("user_deck_state", "started_count"): f"""
+        INSERT INTO user_deck_state AS s (user_id, deck_id, started_count, learning_count)
+        SELECT p.user_id, c.deck_id, count(*),
+               count(*) FILTER (WHERE p.stability < {LEARNING_STABILITY_DAYS})
+        FROM card_progress p JOIN cards c ON c.id = p.card_id
+        WHERE p.is_active
+        GROUP BY p.user_id, c.deck_id
+        ON CONFLICT (user_id, deck_id) DO UPDATE
+        SET started_count = EXCLUDED.started_count, learning_count = EXCLUDED.learning_count;
+
+        DELETE FROM user_deck_due_buckets;
+        INSERT INTO user_deck_due_buckets (user_id, deck_id, bucket_start, card_count)
+        SELECT p.user_id, c.deck_id, {DUE_BUCKET_SQL}, count(*)
+        FROM card_progress p JOIN cards c ON c.id = p.card_id
+        WHERE p.is_active AND p.next_review IS NOT NULL
+        GROUP BY 1, 2, 3
+    """,
+}
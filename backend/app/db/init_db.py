@@ -1,7 +1,93 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
 from app.db.base import Base
 from app.db.session import engine
 import app.models  # чтобы все модели были зарегистрированы
+from app.db.counters import TRIGGERS_SQL, BACKFILL_SQL
+
+# индексы, заменённые в моделях индексом с другим именем (новый создаст _create_missing_indexes)
+REPLACED_INDEXES = (
+    "ix_card_progress_user_due",  # -> ix_card_progress_user_due_card
+)
 
 def init_db():
     """Создаёт все таблицы в БД"""
+    _create_extensions()
+    created = _create_tables()
+    added = _add_missing_columns() | created
+    _create_missing_indexes()
+    _drop_replaced_indexes()
+    _install_triggers()
+    _backfill(added)
+
+
+def _create_extensions():
+    # pg_trgm — для GIN-индексов gin_trgm_ops по каталогу колод
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+def _create_tables() -> set[tuple[str, str]]:
+    """create_all; возвращает колонки созданных таблиц — для _backfill они тоже новые."""
+    existing_tables = set(inspect(engine).get_table_names())
     Base.metadata.create_all(bind=engine)
+    return {
+        (table.name, column.name)
+        for table in Base.metadata.sorted_tables
+        if table.name not in existing_tables
+        for column in table.columns
+    }
+
+
+def _add_missing_columns() -> set[tuple[str, str]]:
+    """
+    create_all не меняет уже существующие таблицы: колонки, добавленные в модели позже,
+    докатываем через ALTER TABLE ... ADD COLUMN (миграций у нас пока нет).
+    Возвращает добавленные (таблица, колонка).
+    """
+    added = set()
+    with engine.begin() as conn:
+        existing_tables = set(inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {ddl}')
+                added.add((table.name, column.name))
+    return added
+
+
+def _create_missing_indexes():
+    """
+    Аналогично для индексов, добавленных в модели позже (CREATE INDEX только если его нет).
+    """
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def _drop_replaced_indexes():
+    with engine.begin() as conn:
+        for name in REPLACED_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def _install_triggers():
+    """Триггеры счётчиков (CREATE OR REPLACE — идемпотентно на каждом старте)."""
+    with engine.begin() as conn:
+        for ddl in TRIGGERS_SQL:
+            conn.exec_driver_sql(ddl)
+
+
+def _backfill(added: set[tuple[str, str]]):
+    """Заполнить счётчики, колонки которых только что появились в существующей таблице."""
+    with engine.begin() as conn:
+        for key, sql in BACKFILL_SQL.items():
+            if key in added:
+                conn.exec_driver_sql(sql)
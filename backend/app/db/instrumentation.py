@@ -0,0 +1,62 @@
+"""
+Счётчик SQL-запросов и времени в БД на один HTTP-запрос.
+
+Хуки before/after_cursor_execute вешаются на движки в session.py и пишут в
+QueryStats текущего запроса (contextvar). Объект изменяемый, поэтому запросы
+из threadpool (sync-роуты) и из run_sync попадают в тот же счётчик, что
+видит middleware. Вне запроса (скрипты, init_db) хуки ничего не делают.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0  # секунды
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def begin_query_stats():
+    """Начать учёт для текущего запроса. Возвращает (stats, token) для end_query_stats."""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_query_stats(token) -> None:
+    _current_stats.reset(token)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - started.pop()
+
+
+def install_query_stats(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,102 @@
+"""
+Пул соединений с учётом ожидания checkout.
+
+TimedQueuePool — обычный QueuePool, который замеряет, сколько запрос ждал
+соединение (включая открытие нового), логирует медленные ожидания и копит
+счётчики для pool_stats(). По этим цифрам подбираем DB_POOL_SIZE/DB_MAX_OVERFLOW
+под max_connections Postgres с учётом числа воркеров и реплик.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class _CheckoutWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, *, slow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if slow:
+                self.slow_checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    # порог (секунды), после которого ожидание соединения пишется в лог
+    slow_checkout_seconds: float = 0.1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = _CheckoutWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record_timeout()
+            logger.warning(
+                "DB pool checkout timed out after %.0f ms (%s)",
+                (time.perf_counter() - started) * 1000,
+                self.status(),
+            )
+            raise
+
+        waited = time.perf_counter() - started
+        slow = waited >= self.slow_checkout_seconds
+        self.wait_stats.record(waited, slow=slow)
+        if slow:
+            logger.warning("DB pool checkout waited %.0f ms (%s)", waited * 1000, self.status())
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.slow_checkout_seconds = self.slow_checkout_seconds
+        return pool
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> dict:
+    """Текущее состояние пула + накопленная статистика ожидания checkout."""
+    stats = {"class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats.as_dict())
+    return stats
@@ -1,3 +1,4 @@
+import math
 from dataclasses import replace
 from datetime import datetime, timedelta
 
@@ -7,6 +8,21 @@ from .dto import LearningSettingsSnapshot
 
 FIRST_AGAIN_MINUTES = 5
 
+# stability — интервал (дни), через который карточку вспоминают с вероятностью 90%
+STABILITY_RETENTION = 0.9
+MIN_DESIRED_RETENTION = 0.5
+MAX_DESIRED_RETENTION = 0.99
+
+
+def retention_factor(desired_retention: float) -> float:
+    """
+    Множитель интервала для desired_retention при забывании R(t) = 0.9 ** (t / stability):
+    t = stability * ln(R) / ln(0.9). При R = 0.9 — ровно 1.0.
+    """
+    r = min(MAX_DESIRED_RETENTION, max(MIN_DESIRED_RETENTION, desired_retention))
+    return math.log(r) / math.log(STABILITY_RETENTION)
+
+
 class ReviewPolicy:
     STABILITY_MULT = {
         ReviewRating.again: 0.25,
@@ -36,7 +52,7 @@ class ReviewPolicy:
         if rating == ReviewRating.again and state.last_reviewed is None:
             next_review = now + timedelta(minutes=FIRST_AGAIN_MINUTES)
         else:
-            next_review = now + timedelta(days=new_stability)
+            next_review = now + timedelta(days=new_stability * retention_factor(settings.desired_retention))
 
         return replace(
             state,
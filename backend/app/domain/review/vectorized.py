@@ -0,0 +1,109 @@
+"""
+Векторная версия ReviewPolicy для массового пересчёта (миллионы card_progress).
+
+Считает то же самое, что ReviewPolicy.apply_review, но над NumPy-массивами,
+и совпадает со скалярной версией бит-в-бит (включая округление timedelta до микросекунд).
+Время — datetime64[us] в UTC, None/NULL — NaT.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.core.enums import ReviewRating
+from .policy import ReviewPolicy, FIRST_AGAIN_MINUTES, retention_factor
+
+# порядок кодов рейтинга в массивах
+RATINGS: tuple[ReviewRating, ...] = (
+    ReviewRating.again,
+    ReviewRating.hard,
+    ReviewRating.good,
+    ReviewRating.easy,
+)
+RATING_CODE = {r: i for i, r in enumerate(RATINGS)}
+
+_US_PER_DAY = 86_400_000_000
+_AGAIN = RATING_CODE[ReviewRating.again]
+
+
+def rating_codes(ratings) -> np.ndarray:
+    return np.fromiter((RATING_CODE[ReviewRating(r)] for r in ratings), dtype=np.int8)
+
+
+def to_datetime64(values) -> np.ndarray:
+    """Список aware-datetime (или None) -> datetime64[us] UTC."""
+    return np.array(
+        [
+            np.datetime64("NaT", "us") if v is None
+            else np.datetime64(v.astimezone(timezone.utc).replace(tzinfo=None), "us")
+            for v in values
+        ],
+        dtype="datetime64[us]",
+    )
+
+
+def from_datetime64(values: np.ndarray) -> list[datetime | None]:
+    return [
+        None if np.isnat(v) else v.astype(datetime).replace(tzinfo=timezone.utc)
+        for v in values.astype("datetime64[us]")
+    ]
+
+
+def retention_factors(desired_retention) -> np.ndarray:
+    """retention_factor поэлементно — скалярной функцией (math.log), чтобы совпасть с ReviewPolicy бит-в-бит."""
+    values = np.asarray(desired_retention, dtype=np.float64)
+    factors = {r: retention_factor(float(r)) for r in np.unique(values)}
+    return np.vectorize(factors.__getitem__, otypes=[np.float64])(values)
+
+
+def days_to_microseconds(days: np.ndarray) -> np.ndarray:
+    """
+    Повторяет timedelta(days=x) из CPython: целая часть дней переводится точно,
+    дробная — одним умножением на 86400e6, остаток < 1 мкс округляется half-even
+    (при ровно 0.5 — к чётному итогу).
+    """
+    days = np.asarray(days, dtype=np.float64)
+    frac_days, int_days = np.modf(days)
+    frac_us, int_us = np.modf(frac_days * float(_US_PER_DAY))
+
+    total = int_days.astype(np.int64) * _US_PER_DAY + int_us.astype(np.int64)
+    is_odd = (total & 1).astype(np.int64)
+    rounding = np.where(frac_us > 0.5, 1, np.where(frac_us < 0.5, 0, is_odd))
+    return total + rounding
+
+
+class VectorizedReviewPolicy:
+    def __init__(self, policy: ReviewPolicy | None = None):
+        policy = policy or ReviewPolicy()
+        self.stability_mult = np.array([policy.STABILITY_MULT[r] for r in RATINGS], dtype=np.float64)
+        self.difficulty_delta = np.array([policy.DIFFICULTY_DELTA[r] for r in RATINGS], dtype=np.float64)
+
+    def apply_review(
+        self,
+        *,
+        stability: np.ndarray,
+        difficulty: np.ndarray,
+        last_reviewed: np.ndarray,
+        rating: np.ndarray,
+        now,
+        retention_factor=1.0,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Возвращает (stability, difficulty, last_reviewed, next_review).
+        now — datetime64[us] скаляр или массив той же длины (время каждого ответа).
+        retention_factor — скаляр или массив из retention_factors(desired_retention).
+        """
+        rating = np.asarray(rating, dtype=np.intp)
+        stability = np.asarray(stability, dtype=np.float64)
+        difficulty = np.asarray(difficulty, dtype=np.float64)
+        last_reviewed = np.asarray(last_reviewed, dtype="datetime64[us]")
+        now = np.broadcast_to(np.asarray(now, dtype="datetime64[us]"), stability.shape)
+
+        new_difficulty = np.minimum(10.0, np.maximum(1.0, difficulty + self.difficulty_delta[rating]))
+        new_stability = np.maximum(0.0035, stability * self.stability_mult[rating])  # >= 5 минут (в днях)
+
+        factor = np.broadcast_to(np.asarray(retention_factor, dtype=np.float64), stability.shape)
+        interval = days_to_microseconds(new_stability * factor).astype("timedelta64[us]")
+        first_again = (rating == _AGAIN) & np.isnat(last_reviewed)
+        interval = np.where(first_again, np.timedelta64(FIRST_AGAIN_MINUTES, "m").astype("timedelta64[us]"), interval)
+
+        return new_stability, new_difficulty, now.copy(), now + interval
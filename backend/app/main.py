@@ -1,13 +1,18 @@
 from fastapi import FastAPI, APIRouter
+from fastapi.responses import PlainTextResponse
 from app.api.routes import cards
 from app.api.routes import cards, groups
 import app.models
 from app.api.routes import auth
 from starlette.middleware.cors import CORSMiddleware
+from app.core.middleware import RequestStatsMiddleware
+from app.core import metrics
 
 from app.api.routes import decks
 
 from app.db.init_db import init_db
+from app.db.session import engine_pool_stats
+from app.core.config import settings
 
 app = FastAPI(title="Flashcards API")
 
@@ -27,10 +32,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries"],
 )
 
+app.add_middleware(RequestStatsMiddleware)
+
 api = APIRouter(prefix="/api")
 
+# DB_ASYNC: async-версии горячих эндпоинтов регистрируются первыми и перекрывают sync
+if settings.DB_ASYNC:
+    api.include_router(cards.async_router, prefix="/cards", tags=["cards"])
+    api.include_router(decks.async_router, prefix="/decks", tags=["decks"])
+
 api.include_router(cards.router,  prefix="/cards",  tags=["cards"])
 api.include_router(groups.router, prefix="/groups", tags=["groups"])
 api.include_router(auth.router,   prefix="/auth",   tags=["auth"])
@@ -41,3 +54,14 @@ app.include_router(api)
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/health/db")
+def db_pool_health():
+    # состояние пулов соединений этого процесса
+    return engine_pool_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
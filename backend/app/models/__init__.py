@@ -15,3 +15,6 @@ from .user_study_group import UserStudyGroup
 from .user_study_group_deck import UserStudyGroupDeck
 
 from .user_learning_settings import UserLearningSettings
+from .user_deck_state import UserDeckState
+from .user_deck_due_bucket import UserDeckDueBucket
+from .deck_import_job import DeckImportJob
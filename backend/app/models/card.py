@@ -21,6 +21,7 @@ class Card(Base):
     deck_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("decks.id"),
+        index=True,
     )
 
     type: Mapped[str] = mapped_column(String)
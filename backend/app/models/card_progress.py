@@ -22,6 +22,16 @@ class CardProgress(Base):
             unique=True,
             postgresql_where=text("is_active = true"),
         ),
+        # очередь повторения: WHERE user_id = ? AND is_active AND next_review <= now
+        # ORDER BY next_review, card_id — card_id в индексе, чтобы seek курсора
+        # (next_review, card_id) > (?, ?) был чистым range scan без досортировки
+        Index(
+            "ix_card_progress_user_due_card",
+            "user_id",
+            "next_review",
+            "card_id",
+            postgresql_where=text("is_active = true"),
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -57,6 +67,11 @@ class CardProgress(Base):
     stability: Mapped[float] = mapped_column(Float, default=1.0, nullable=False)   # в днях
     difficulty: Mapped[float] = mapped_column(Float, default=5.0, nullable=False) # 1..10 условно
 
+    # состояние, с которого уровень начат через level_up/level_down (от него реплеит bulk_reschedule);
+    # NULL — уровень 0, стартует с initial_* из настроек пользователя
+    start_stability: Mapped[float | None] = mapped_column(Float, nullable=True)
+    start_difficulty: Mapped[float | None] = mapped_column(Float, nullable=True)
+
     next_review: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_reviewed: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
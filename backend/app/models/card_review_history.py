@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, Enum, Integer, DateTime
+from sqlalchemy import ForeignKey, Enum, Integer, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,12 @@ from app.core.enums import ReviewRating
 class CardReviewHistory(Base):
     __tablename__ = "card_review_history"
 
+    __table_args__ = (
+        # идемпотентность офлайн-синка: один client_review_id на пользователя
+        # (NULL у обычных ревью не конфликтуют между собой)
+        Index("uq_review_history_client_id", "user_id", "client_review_id", unique=True),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -49,6 +55,9 @@ class CardReviewHistory(Base):
 
     reviewed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    # id, сгенерированный клиентом (офлайн-режим / ретраи)
+    client_review_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
     user = relationship("User", back_populates="review_history")
     card = relationship("Card", back_populates="review_history")
     card_level = relationship("CardLevel", back_populates="review_history")
@@ -1,9 +1,13 @@
 import uuid
-from sqlalchemy import String, Boolean, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, Boolean, ForeignKey, Text, Integer, Computed, Index
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
+# 'simple' без стемминга: в каталоге смешаны русский и английский
+DECK_SEARCH_CONFIG = "simple"
+
+
 class Deck(Base):
     __tablename__ = "decks"
 
@@ -23,3 +27,31 @@ class Deck(Base):
     color: Mapped[str] = mapped_column(String, default="#4A6FA5")
 
     is_public: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # растёт при любом изменении карточек/уровней/полей колоды (для ETag)
+    content_version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
+    # счётчики ведут триггеры БД (app/db/counters.py), не пишем их из приложения
+    card_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    subscriber_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    # полнотекстовый поиск по каталогу: title важнее description
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{DECK_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{DECK_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    )
+
+    __table_args__ = (
+        Index("ix_decks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_decks_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index(
+            "ix_decks_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Enum, Integer, String, Text, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.core.enums import ImportJobStatus
+
+
+class DeckImportJob(Base):
+    """Импорт карточек в колоду из CSV/JSONL (прогресс для опроса клиентом)."""
+    __tablename__ = "deck_import_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    deck_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("decks.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    format: Mapped[str] = mapped_column(String(8), nullable=False)
+    status: Mapped[ImportJobStatus] = mapped_column(
+        Enum(ImportJobStatus, name="import_job_status"),
+        default=ImportJobStatus.pending,
+        nullable=False,
+    )
+
+    # номер последней разобранной строки файла — прогресс для клиента
+    processed_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    imported_cards: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # первые IMPORT_MAX_REPORTED_ERRORS ошибок: [{"row": n, "error": "..."}]
+    errors: Mapped[list] = mapped_column(JSONB, default=list, nullable=False)
+    # фатальная ошибка (битый файл и т.п.), status = failed
+    error: Mapped[str | None] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
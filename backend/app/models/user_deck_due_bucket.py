@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserDeckDueBucket(Base):
+    """
+    Активные карточки пользователя в колоде по часу next_review (ведут триггеры card_progress).
+    due на момент now = сумма закрытых корзин + точный подсчёт по текущему часу.
+    """
+    __tablename__ = "user_deck_due_buckets"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    deck_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("decks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    card_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
@@ -0,0 +1,32 @@
+import uuid
+
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserDeckState(Base):
+    """Состояние пользователя по колоде (строка появляется при первой записи прогресса)."""
+    __tablename__ = "user_deck_state"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    deck_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("decks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # растёт при каждой записи card_progress пользователя в этой колоде (для ETag)
+    progress_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    # счётчики ведут триггеры card_progress (app/db/counters.py):
+    # карточек с активным уровнем и из них "на изучении" (stability < суток)
+    started_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    learning_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
@@ -15,7 +15,8 @@ class UserStudyGroup(Base):
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("users.id")
+        ForeignKey("users.id"),
+        index=True,
     )
 
     source_group_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -15,7 +15,8 @@ class UserStudyGroupDeck(Base):
     deck_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("decks.id"),
-        primary_key=True
+        primary_key=True,
+        index=True,
     )
 
     order_index: Mapped[int] = mapped_column(Integer, default=0)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.core.enums import ReviewRating
-from typing import Optional
+from typing import Optional, List
 from uuid import UUID
 
 
@@ -21,8 +21,17 @@ class CardForReview(BaseModel):
     next_review: Optional[datetime]
 
 
+class ReviewQueuePage(BaseModel):
+    items: List[CardForReview]
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total_due: int
+
+
 class ReviewRequest(BaseModel):
     rating: ReviewRating
+    # ключ идемпотентности: ретрай с тем же id не применяется повторно
+    client_review_id: Optional[UUID] = None
 
 
 class ReviewResponse(BaseModel):
@@ -34,3 +43,50 @@ class ReviewResponse(BaseModel):
     stability: float
     difficulty: float
     next_review: datetime
+
+
+class BatchReviewItem(BaseModel):
+    card_id: UUID
+    rating: ReviewRating
+    answered_at: Optional[datetime] = None  # время ответа на клиенте; None = сейчас
+
+
+class BatchReviewRequest(BaseModel):
+    items: List[BatchReviewItem] = Field(min_length=1, max_length=500)
+
+
+class BatchReviewItemResult(BaseModel):
+    card_id: UUID
+    ok: bool
+    error: Optional[str] = None
+
+    card_level_id: Optional[UUID] = None
+    level_index: Optional[int] = None
+
+    stability: Optional[float] = None
+    difficulty: Optional[float] = None
+    next_review: Optional[datetime] = None
+
+
+class BatchReviewResponse(BaseModel):
+    results: List[BatchReviewItemResult]
+
+
+class SyncReviewItem(BaseModel):
+    client_review_id: UUID
+    card_id: UUID
+    rating: ReviewRating
+    reviewed_at: datetime
+
+
+class SyncReviewRequest(BaseModel):
+    items: List[SyncReviewItem] = Field(min_length=1, max_length=1000)
+
+
+class SyncReviewItemResult(BatchReviewItemResult):
+    client_review_id: UUID
+    duplicate: bool = False
+
+
+class SyncReviewResponse(BaseModel):
+    results: List[SyncReviewItemResult]
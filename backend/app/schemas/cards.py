@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, ConfigDict, conint, root_validator
-from typing import List, Dict, Optional, Union, Any
+from pydantic import BaseModel, Field, ConfigDict, Discriminator, Tag, conint
+from typing import Annotated, List, Dict, Literal, Optional, Union, Any
 from uuid import UUID
 from datetime import datetime
 
@@ -9,6 +9,11 @@ class CardLevelContent(BaseModel):
     content: Dict
 
 
+class CardLevelIndex(BaseModel):
+    # уровень без контента — список карточек с with_content=false
+    level_index: int
+
+
 class CardForReviewWithLevels(BaseModel):
     card_id: UUID
     deck_id: UUID
@@ -33,6 +38,13 @@ class CardSummary(BaseModel):
     levels: Optional[List[CardLevelContent]] = []
 
 
+class CardOutline(BaseModel):
+    card_id: UUID
+    title: str
+    type: str
+    levels: List[CardLevelIndex] = []
+
+
 class CardLevelPayload(BaseModel):
     question: str
     answer: str
@@ -52,16 +64,25 @@ class CreateCardLevelRequest(BaseModel):
     options: Optional[List[CreateCardLevelOption]] = None
     correctOptionId: Optional[str] = None
     explanation: Optional[str] = None
-    timerSec: Optional[conint(ge=1, le=3600)] = None
+    timerSec: Optional[conint(ge=0, le=3600)] = None  # 0 — без таймера
 
-class CreateCardRequest(BaseModel):
-    deck_id: str
+class CreateCardItem(BaseModel):
     title: str
     type: str  # или Literal["flashcard","multiple_choice"], если уже готов
     levels: List[CreateCardLevelRequest]
 
 
+class CreateCardRequest(CreateCardItem):
+    deck_id: str
+
+
+class CreateCardsBatchRequest(BaseModel):
+    deck_id: UUID
+    cards: List[CreateCardItem] = Field(min_length=1, max_length=1000)
+
+
 class QaContentIn(BaseModel):
+    kind: Literal["qa"] = "qa"
     question: str
     answer: str
 
@@ -72,41 +93,38 @@ class McqOptionIn(BaseModel):
 
 
 class McqContentIn(BaseModel):
+    kind: Literal["mcq"] = "mcq"
     question: str
     options: List[McqOptionIn]
     correctOptionId: str
-    explanation: str = ""
-    timerSec: conint(ge=0) = 0
+    explanation: Optional[str] = None
+    timerSec: Optional[conint(ge=0, le=3600)] = None  # 0 — без таймера (старые клиенты)
+
 
+def content_kind(value: Any) -> Optional[str]:
+    """
+    Тег для ContentIn: поле kind, а у клиентов, которые его ещё не шлют, —
+    по наличию options/correctOptionId (как раньше делал parse_content_union).
+    """
+    if isinstance(value, dict):
+        kind = value.get("kind")
+        if kind is None:
+            kind = "mcq" if ("options" in value or "correctOptionId" in value) else "qa"
+        return kind
+    return getattr(value, "kind", None)
 
-ContentIn = Union[QaContentIn, McqContentIn]
+
+# tagged union: pydantic выбирает модель по тегу сразу, без перебора вариантов
+ContentIn = Annotated[
+    Union[Annotated[QaContentIn, Tag("qa")], Annotated[McqContentIn, Tag("mcq")]],
+    Discriminator(content_kind),
+]
 
 
 class LevelIn(BaseModel):
     level_index: int = Field(ge=0)
     content: ContentIn
 
-    @root_validator(pre=True)
-    def parse_content_union(cls, values: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Payload приходит как:
-        {
-          "level_index": 0,
-          "content": { ... }
-        }
-
-        Так как в content нет discriminator-поля (kind/type),
-        определяем тип по наличию ключей options/correctOptionId. [web:2]
-        """
-        c = values.get("content") or {}
-
-        if isinstance(c, dict) and ("options" in c or "correctOptionId" in c):
-            values["content"] = McqContentIn(**c)
-        else:
-            values["content"] = QaContentIn(**c)
-
-        return values
-
 
 class ReplaceLevelsRequest(BaseModel):
     levels: List[LevelIn]
@@ -118,6 +136,17 @@ class DeckSummary(BaseModel):
     description: str | None = None
 
 
+class DeckCounters(BaseModel):
+    card_count: int = 0
+    new_count: int = 0  # ещё не начатые пользователем
+    learning_count: int = 0  # активный уровень со stability < суток
+    due_count: int = 0
+
+
+class UserDeckSummary(DeckCounters, DeckSummary):
+    pass
+
+
 class DeckSessionCard(BaseModel):
     card_id: UUID
     deck_id: UUID
@@ -140,6 +169,11 @@ class CreateCardResponse(BaseModel):
     deck_id: UUID
 
 
+class CreateCardsBatchResponse(BaseModel):
+    deck_id: UUID
+    card_ids: List[UUID]  # в порядке cards запроса
+
+
 class DeckUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -157,6 +191,16 @@ class DeckDetail(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class GroupDeckSummary(DeckCounters, DeckDetail):
+    pass
+
+
 class DeckWithCards(BaseModel):
     deck: DeckDetail
-    cards: List[CardSummary]
\ No newline at end of file
+    cards: List[CardSummary]
+
+
+class DeckWithCardOutlines(BaseModel):
+    # with_content=false
+    deck: DeckDetail
+    cards: List[CardOutline]
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.enums import ImportJobStatus
+
+
+class DeckImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class DeckImportJobOut(BaseModel):
+    job_id: UUID = Field(validation_alias="id", serialization_alias="job_id")
+    deck_id: UUID
+    format: str
+    status: ImportJobStatus
+
+    processed_rows: int
+    imported_cards: int
+    error_count: int
+    errors: List[DeckImportRowError] = []
+    error: Optional[str] = None
+
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,26 @@
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class DeckLevelCount(BaseModel):
+    level_index: int
+    cards: int  # активный уровень; карточки без прогресса — на уровне 0
+
+
+class DeckStats(BaseModel):
+    deck_id: UUID
+    card_count: int
+    level_distribution: List[DeckLevelCount]
+
+    # по карточкам с прогрессом; None — прогресса в колоде ещё нет
+    avg_stability: Optional[float] = None
+    avg_difficulty: Optional[float] = None
+
+    due_today: int  # next_review в текущих сутках UTC
+    overdue: int  # next_review раньше начала суток
+    mature: int  # stability >= 21 дня
+
+    reviews_7d: int
+    reviews_30d: int
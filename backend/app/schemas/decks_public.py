@@ -1,6 +1,6 @@
 # app/schemas/decks_public.py
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Optional, List
 from uuid import UUID
 
 
@@ -12,3 +12,15 @@ class PublicDeckSummary(BaseModel):
     owner_id: UUID
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PublicDeckSearchItem(PublicDeckSummary):
+    card_count: int = 0
+    subscriber_count: int = 0
+    # релевантность (при q) или subscriber_count — то, по чему идёт сортировка
+    score: float
+
+
+class PublicDeckSearchPage(BaseModel):
+    items: List[PublicDeckSearchItem]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,191 @@
+"""
+Массовый пересчёт stability/next_review после смены множителей политики
+(или desired_retention / начальных значений в настройках пользователей).
+
+Каждый card_progress пересчитывается реплеем его истории (card_review_history)
+через VectorizedReviewPolicy: строки идут чанками по keyset (id), история чанка
+читается одним запросом, шаг k применяется сразу ко всем строкам, у которых есть
+k-й ответ. Каждый чанк пишется одним bulk UPDATE и коммитится отдельно.
+
+Стартовое состояние уровня — start_stability/start_difficulty, сохранённые при
+level_up/level_down, у уровня 0 — initial_stability/initial_difficulty из настроек.
+Уровни выше 0 без сохранённого старта (открыты до появления этих колонок) не трогаются:
+их повышенное состояние восстановить не из чего.
+Интервал — с учётом desired_retention пользователя (retention_factor, как у ReviewPolicy).
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, update, tuple_, or_
+from sqlalchemy.orm import Session
+
+from app.domain.review.policy import ReviewPolicy
+from app.domain.review.vectorized import (
+    VectorizedReviewPolicy,
+    rating_codes,
+    retention_factors,
+    to_datetime64,
+    from_datetime64,
+)
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+from app.models.card_review_history import CardReviewHistory
+from app.models.user_learning_settings import UserLearningSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_STABILITY = UserLearningSettings.__table__.c.initial_stability.default.arg
+DEFAULT_INITIAL_DIFFICULTY = UserLearningSettings.__table__.c.initial_difficulty.default.arg
+DEFAULT_DESIRED_RETENTION = UserLearningSettings.__table__.c.desired_retention.default.arg
+
+
+@dataclass
+class RescheduleStats:
+    chunks: int = 0
+    rows_seen: int = 0
+    rows_updated: int = 0
+
+
+def _load_chunk(db: Session, *, after_id: UUID | None, user_id: UUID | None, chunk_size: int) -> list:
+    stmt = (
+        select(
+            CardProgress.id,
+            CardProgress.user_id,
+            CardProgress.card_level_id,
+            CardProgress.start_stability,
+            CardProgress.start_difficulty,
+            CardProgress.created_at,
+            UserLearningSettings.initial_stability,
+            UserLearningSettings.initial_difficulty,
+            UserLearningSettings.desired_retention,
+        )
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .outerjoin(UserLearningSettings, UserLearningSettings.user_id == CardProgress.user_id)
+        # уровень 0 или уровень с сохранённым стартом — остальные пересчитывать не от чего
+        .where(or_(CardProgress.start_stability.is_not(None), CardLevel.level_index == 0))
+        .order_by(CardProgress.id.asc())
+        .limit(chunk_size)
+    )
+    if after_id is not None:
+        stmt = stmt.where(CardProgress.id > after_id)
+    if user_id is not None:
+        stmt = stmt.where(CardProgress.user_id == user_id)
+    return db.execute(stmt).all()
+
+
+def _load_history(db: Session, rows: list) -> dict[tuple[UUID, UUID], list]:
+    pairs = [(r.user_id, r.card_level_id) for r in rows]
+    history = db.execute(
+        select(
+            CardReviewHistory.user_id,
+            CardReviewHistory.card_level_id,
+            CardReviewHistory.rating,
+            CardReviewHistory.reviewed_at,
+        )
+        .where(tuple_(CardReviewHistory.user_id, CardReviewHistory.card_level_id).in_(pairs))
+        .order_by(CardReviewHistory.reviewed_at.asc(), CardReviewHistory.id.asc())
+    ).all()
+
+    by_pair: dict[tuple[UUID, UUID], list] = {}
+    for h in history:
+        by_pair.setdefault((h.user_id, h.card_level_id), []).append(h)
+    return by_pair
+
+
+def replay_chunk(rows: list, history_by_pair: dict, policy: VectorizedReviewPolicy) -> list[dict]:
+    """Реплей истории для чанка строк; возвращает значения для bulk UPDATE."""
+    rows = [r for r in rows if (r.user_id, r.card_level_id) in history_by_pair]
+    if not rows:
+        return []
+
+    histories = [history_by_pair[(r.user_id, r.card_level_id)] for r in rows]
+    lengths = np.array([len(h) for h in histories])
+    n, max_len = len(rows), int(lengths.max())
+
+    ratings = np.zeros((n, max_len), dtype=np.int8)
+    times = np.full((n, max_len), np.datetime64("NaT", "us"), dtype="datetime64[us]")
+    for i, h in enumerate(histories):
+        ratings[i, : len(h)] = rating_codes(x.rating for x in h)
+        times[i, : len(h)] = to_datetime64([x.reviewed_at for x in h])
+
+    def start(stored, initial, default):
+        if stored is not None:
+            return stored
+        return initial if initial is not None else default
+
+    stability = np.array(
+        [start(r.start_stability, r.initial_stability, DEFAULT_INITIAL_STABILITY) for r in rows],
+        dtype=np.float64,
+    )
+    difficulty = np.array(
+        [start(r.start_difficulty, r.initial_difficulty, DEFAULT_INITIAL_DIFFICULTY) for r in rows],
+        dtype=np.float64,
+    )
+    # уровень, открытый level_up/level_down, начинается уже "отвеченным" (last_reviewed = время открытия)
+    last_reviewed = to_datetime64([r.created_at if r.start_stability is not None else None for r in rows])
+    next_review = np.full(n, np.datetime64("NaT", "us"), dtype="datetime64[us]")
+    factor = retention_factors(
+        [r.desired_retention if r.desired_retention is not None else DEFAULT_DESIRED_RETENTION for r in rows]
+    )
+
+    for k in range(max_len):
+        m = lengths > k
+        stability[m], difficulty[m], last_reviewed[m], next_review[m] = policy.apply_review(
+            stability=stability[m],
+            difficulty=difficulty[m],
+            last_reviewed=last_reviewed[m],
+            rating=ratings[m, k],
+            now=times[m, k],
+            retention_factor=factor[m],
+        )
+
+    return [
+        {
+            "id": r.id,
+            "stability": float(s),
+            "difficulty": float(d),
+            "last_reviewed": lr,
+            "next_review": nr,
+        }
+        for r, s, d, lr, nr in zip(
+            rows, stability, difficulty, from_datetime64(last_reviewed), from_datetime64(next_review)
+        )
+    ]
+
+
+def reschedule_progress(
+    session_factory: Callable[[], Session],
+    *,
+    user_id: UUID | None = None,
+    chunk_size: int = 5000,
+    policy: ReviewPolicy | None = None,
+    dry_run: bool = False,
+) -> RescheduleStats:
+    vectorized = VectorizedReviewPolicy(policy)
+    stats = RescheduleStats()
+    after_id = None
+
+    while True:
+        db = session_factory()
+        try:
+            rows = _load_chunk(db, after_id=after_id, user_id=user_id, chunk_size=chunk_size)
+            if not rows:
+                break
+
+            values = replay_chunk(rows, _load_history(db, rows), vectorized)
+            if values and not dry_run:
+                db.execute(update(CardProgress), values)
+                db.commit()
+
+            after_id = rows[-1].id
+            stats.chunks += 1
+            stats.rows_seen += len(rows)
+            stats.rows_updated += len(values)
+            logger.info("reschedule chunk %s: seen=%s updated=%s", stats.chunks, stats.rows_seen, stats.rows_updated)
+        finally:
+            db.close()
+
+    return stats
@@ -0,0 +1,110 @@
+"""
+Единые правила контента карточки: POST /api/cards/, /api/cards/batch, импорт колоды
+и PUT /api/cards/{id}/levels сводят уровень к одному и тому же JSON в card_levels.
+
+    qa  (flashcard):       {"question", "answer"}
+    mcq (multiple_choice): {"question", "options": [{"id", "text"}], "correctOptionId",
+                            "explanation": str | None, "timerSec": int | None}
+
+Пустые варианты ответа отбрасываются, пустое explanation и timerSec=0 хранятся как None.
+"""
+from typing import Iterable
+
+from app.schemas.cards import CreateCardLevelRequest, QaContentIn, McqContentIn
+
+# тип карточки -> kind контента уровня (ContentIn)
+CARD_TYPE_KINDS = {"flashcard": "qa", "multiple_choice": "mcq"}
+
+MAX_TIMER_SEC = 3600
+
+
+class CardValidationError(ValueError):
+    """Текст ошибки совпадает с detail ответа 422."""
+
+
+def normalize_title(title: str | None) -> str:
+    title = (title or "").strip()
+    if not title:
+        raise CardValidationError("Title is required")
+    return title
+
+
+def _question(question: str | None, i: int) -> str:
+    q = (question or "").strip()
+    if not q:
+        raise CardValidationError(f"Level {i + 1}: question is required")
+    return q
+
+
+def qa_content(question: str | None, answer: str | None, i: int) -> dict:
+    q = _question(question, i)
+    a = (answer or "").strip()
+    if not a:
+        raise CardValidationError(f"Level {i + 1}: answer is required for flashcard")
+    return {"question": q, "answer": a}
+
+
+def mcq_content(
+    question: str | None,
+    options: Iterable | None,
+    correct_option_id: str | None,
+    explanation: str | None,
+    timer_sec: int | None,
+    i: int,
+) -> dict:
+    """options — объекты с .id/.text (McqOptionIn, CreateCardLevelOption)."""
+    q = _question(question, i)
+
+    options = [{"id": str(o.id), "text": (o.text or "").strip()} for o in (options or [])]
+    options = [o for o in options if o["text"]]
+    if len(options) < 2:
+        raise CardValidationError(f"Level {i + 1}: at least 2 non-empty options required")
+
+    ids = [o["id"] for o in options]
+    if len(set(ids)) != len(ids):
+        raise CardValidationError(f"Level {i + 1}: option ids must be unique")
+
+    correct_id = (correct_option_id or "").strip()
+    if not correct_id:
+        raise CardValidationError(f"Level {i + 1}: correctOptionId is required")
+    if correct_id not in ids:
+        raise CardValidationError(f"Level {i + 1}: correctOptionId must point to a non-empty option")
+
+    if timer_sec is not None and not 0 <= timer_sec <= MAX_TIMER_SEC:
+        raise CardValidationError(f"Level {i + 1}: timerSec must be 0..{MAX_TIMER_SEC}")
+
+    return {
+        "question": q,
+        "options": options,
+        "correctOptionId": correct_id,
+        "explanation": (explanation or "").strip() or None,
+        "timerSec": timer_sec or None,
+    }
+
+
+def level_content(card_type: str, lvl: CreateCardLevelRequest, i: int) -> dict:
+    """Уровень из CreateCardLevelRequest (создание, batch, импорт); i — индекс уровня."""
+    kind = CARD_TYPE_KINDS.get(card_type)
+    if kind == "qa":
+        return qa_content(lvl.question, lvl.answer, i)
+    if kind == "mcq":
+        return mcq_content(lvl.question, lvl.options, lvl.correctOptionId, lvl.explanation, lvl.timerSec, i)
+    raise CardValidationError(f"Unsupported card type: {card_type}")
+
+
+def typed_level_content(content: QaContentIn | McqContentIn, i: int) -> dict:
+    """Уровень из ContentIn (PUT .../levels): тип уже выбран по тегу kind."""
+    if content.kind == "qa":
+        return qa_content(content.question, content.answer, i)
+    return mcq_content(
+        content.question, content.options, content.correctOptionId, content.explanation, content.timerSec, i
+    )
+
+
+def validate_card(title: str | None, card_type: str, levels: Iterable[CreateCardLevelRequest]) -> tuple[str, list[dict]]:
+    """(title, [content уровня 0, уровня 1, ...]) или CardValidationError."""
+    title = normalize_title(title)
+    levels = list(levels)
+    if not levels:
+        raise CardValidationError("At least 1 level is required")
+    return title, [level_content(card_type, lvl, i) for i, lvl in enumerate(levels)]
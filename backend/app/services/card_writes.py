@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.card_level import CardLevel
+
+
+def card_rows(
+    *,
+    deck_id: UUID,
+    title: str,
+    card_type: str,
+    contents: list[dict],
+    created_at: datetime,
+) -> tuple[dict, list[dict]]:
+    """Строка cards и строки card_levels для уже провалидированной карточки (см. card_content)."""
+    card_id = uuid.uuid4()
+    card = {
+        "id": card_id,
+        "deck_id": deck_id,
+        "title": title,
+        "type": card_type,
+        "max_level": len(contents) - 1,
+        "settings": None,
+        "created_at": created_at,
+    }
+    levels = [
+        {"id": uuid.uuid4(), "card_id": card_id, "level_index": i, "content": content}
+        for i, content in enumerate(contents)
+    ]
+    return card, levels
+
+
+def insert_cards(db: Session, cards: list[dict], levels: list[dict]) -> None:
+    """
+    Два многострочных INSERT (executemany по списку словарей — psycopg2 склеивает
+    в INSERT ... VALUES (...), (...)). card_count колоды ведут триггеры.
+    """
+    if not cards:
+        return
+    db.execute(insert(Card), cards)
+    db.execute(insert(CardLevel), levels)
@@ -0,0 +1,189 @@
+"""
+Сверка счётчиков прогресса по колодам (user_deck_state.started_count / learning_count,
+user_deck_due_buckets) с card_progress.
+
+Счётчики ведут триггеры (app/db/counters.py), реконсилятор чинит дрейф — ручные правки
+в БД, TRUNCATE, триггеры, выключенные на время миграции. Пользователи идут по одному
+в своей транзакции: строки счётчиков пользователя блокируются (сначала user_deck_state,
+потом корзины — как в триггерах), считается правда по прогрессу и пишутся только
+отличающиеся строки. Запись прогресса, начатая до блокировки и ещё не закоммиченная,
+применит свою дельту поверх исправленного значения — её строки в правду не попали.
+
+decks.card_count / subscriber_count сверяет reconcile_deck_totals: колоды пачками
+(keyset по decks.id), строки пачки блокируются FOR UPDATE — триггер незакоммиченной
+записи держит ту же строку, так что подсчёт после блокировки видит её уже закоммиченной.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import select, delete, func, literal_column, text, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.counters import LEARNING_STABILITY_DAYS, DUE_BUCKET_SQL, DECK_COUNTS_SQL, deck_recount_sql
+from app.models.card import Card
+from app.models.card_progress import CardProgress
+from app.models.deck import Deck
+from app.models.user import User
+from app.models.user_deck_state import UserDeckState
+from app.models.user_deck_due_bucket import UserDeckDueBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconcileStats:
+    users: int = 0
+    state_fixed: int = 0
+    buckets_fixed: int = 0
+    decks: int = 0
+    decks_fixed: int = 0
+
+
+def _lock_counters(db: Session, user_id: UUID) -> tuple[dict, dict]:
+    state = db.execute(
+        select(UserDeckState.deck_id, UserDeckState.started_count, UserDeckState.learning_count)
+        .where(UserDeckState.user_id == user_id)
+        .with_for_update()
+    ).all()
+    buckets = db.execute(
+        select(UserDeckDueBucket.deck_id, UserDeckDueBucket.bucket_start, UserDeckDueBucket.card_count)
+        .where(UserDeckDueBucket.user_id == user_id)
+        .with_for_update()
+    ).all()
+    return (
+        {r.deck_id: (r.started_count, r.learning_count) for r in state},
+        {(r.deck_id, r.bucket_start): r.card_count for r in buckets},
+    )
+
+
+def _actual_counters(db: Session, user_id: UUID) -> tuple[dict, dict]:
+    active = (
+        select(Card.deck_id, CardProgress.next_review, CardProgress.stability)
+        .join(Card, Card.id == CardProgress.card_id)
+        .where(CardProgress.user_id == user_id, CardProgress.is_active == True)
+        .subquery()
+    )
+    state = db.execute(
+        select(
+            active.c.deck_id,
+            func.count().label("started"),
+            func.count().filter(active.c.stability < LEARNING_STABILITY_DAYS).label("learning"),
+        ).group_by(active.c.deck_id)
+    ).all()
+    bucket = literal_column(DUE_BUCKET_SQL)
+    buckets = db.execute(
+        select(active.c.deck_id, bucket.label("bucket_start"), func.count().label("n"))
+        .select_from(active)
+        .where(active.c.next_review.is_not(None))
+        .group_by(active.c.deck_id, bucket)
+    ).all()
+    return (
+        {r.deck_id: (r.started, r.learning) for r in state},
+        {(r.deck_id, r.bucket_start): r.n for r in buckets},
+    )
+
+
+def reconcile_user_counters(db: Session, user_id: UUID) -> tuple[int, int]:
+    """Сверяет и чинит счётчики одного пользователя (без commit). -> (строк state, строк корзин)."""
+    stored_state, stored_buckets = _lock_counters(db, user_id)
+    actual_state, actual_buckets = _actual_counters(db, user_id)
+
+    state_rows = [
+        {"user_id": user_id, "deck_id": deck_id, "started_count": started, "learning_count": learning}
+        for deck_id in stored_state.keys() | actual_state.keys()
+        for started, learning in [actual_state.get(deck_id, (0, 0))]
+        if stored_state.get(deck_id, (0, 0)) != (started, learning)
+    ]
+    if state_rows:
+        stmt = insert(UserDeckState).values(state_rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserDeckState.user_id, UserDeckState.deck_id],
+            set_={"started_count": stmt.excluded.started_count, "learning_count": stmt.excluded.learning_count},
+        ))
+
+    bucket_rows = [
+        {"user_id": user_id, "deck_id": deck_id, "bucket_start": start, "card_count": n}
+        for (deck_id, start), n in actual_buckets.items()
+        if stored_buckets.get((deck_id, start)) != n
+    ]
+    if bucket_rows:
+        stmt = insert(UserDeckDueBucket).values(bucket_rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserDeckDueBucket.user_id, UserDeckDueBucket.deck_id, UserDeckDueBucket.bucket_start],
+            set_={"card_count": stmt.excluded.card_count},
+        ))
+
+    # лишние корзины (дрейф: в прогрессе таких карточек нет)
+    stale = [key for key in stored_buckets if key not in actual_buckets]
+    for deck_id, start in stale:
+        db.execute(delete(UserDeckDueBucket).where(
+            UserDeckDueBucket.user_id == user_id,
+            UserDeckDueBucket.deck_id == deck_id,
+            UserDeckDueBucket.bucket_start == start,
+        ))
+
+    fixed = len(state_rows), len(bucket_rows) + len(stale)
+    if any(fixed):
+        logger.info("deck counters of user %s: fixed %d state rows, %d bucket rows", user_id, *fixed)
+    return fixed
+
+
+def reconcile_deck_counters(
+    session_factory: Callable[[], Session],
+    *,
+    user_id: UUID | None = None,
+    chunk_size: int = 1000,
+) -> ReconcileStats:
+    """Проход по всем пользователям (keyset по users.id) или по одному; commit на пользователя."""
+    stats = ReconcileStats()
+    after_id = None
+    while True:
+        with session_factory() as db:
+            stmt = select(User.id).order_by(User.id.asc()).limit(chunk_size)
+            if user_id is not None:
+                stmt = stmt.where(User.id == user_id)
+            if after_id is not None:
+                stmt = stmt.where(User.id > after_id)
+            user_ids = db.execute(stmt).scalars().all()
+            for uid in user_ids:
+                state_fixed, buckets_fixed = reconcile_user_counters(db, uid)
+                db.commit()
+                stats.users += 1
+                stats.state_fixed += state_fixed
+                stats.buckets_fixed += buckets_fixed
+        if len(user_ids) < chunk_size:
+            return stats
+        after_id = user_ids[-1]
+
+
+def _recount_stmt(column: str):
+    return text(deck_recount_sql(column)).bindparams(
+        bindparam("first_id", type_=Deck.id.type),
+        bindparam("last_id", type_=Deck.id.type),
+    )
+
+
+def reconcile_deck_totals(session_factory: Callable[[], Session], *, chunk_size: int = 1000) -> ReconcileStats:
+    """decks.card_count / subscriber_count: пачка колод на транзакцию, пишутся только отличающиеся."""
+    stats = ReconcileStats()
+    after_id = None
+    while True:
+        with session_factory() as db:
+            stmt = select(Deck.id).order_by(Deck.id.asc()).limit(chunk_size).with_for_update()
+            if after_id is not None:
+                stmt = stmt.where(Deck.id > after_id)
+            deck_ids = db.execute(stmt).scalars().all()
+            if deck_ids:
+                bounds = {"first_id": deck_ids[0], "last_id": deck_ids[-1]}
+                fixed = sum(db.execute(_recount_stmt(column), bounds).rowcount for column in DECK_COUNTS_SQL)
+                db.commit()
+                stats.decks += len(deck_ids)
+                stats.decks_fixed += fixed
+                if fixed:
+                    logger.info("deck totals %s..%s: fixed %d counters", deck_ids[0], deck_ids[-1], fixed)
+        if len(deck_ids) < chunk_size:
+            return stats
+        after_id = deck_ids[-1]
@@ -0,0 +1,73 @@
+import json
+import zlib
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from sqlalchemy import select, Select
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.card_level import CardLevel
+
+EXPORT_BATCH_SIZE = 1000
+GZIP_WBITS = 31  # zlib с gzip-заголовком
+
+
+def deck_export_stmt(deck_id: UUID) -> Select:
+    """Карточки колоды с уровнями плоскими строками: уровни одной карточки идут подряд."""
+    return (
+        select(
+            Card.id.label("card_id"),
+            Card.title,
+            Card.type,
+            Card.max_level,
+            Card.settings,
+            CardLevel.level_index,
+            CardLevel.content,
+        )
+        .join(CardLevel, CardLevel.card_id == Card.id)
+        .where(Card.deck_id == deck_id)
+        .order_by(Card.created_at.asc(), Card.id.asc(), CardLevel.level_index.asc())
+    )
+
+
+def _card_line(card: dict) -> bytes:
+    return json.dumps(card, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+
+def iter_deck_ndjson(db: Session, deck_id: UUID, *, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    NDJSON: одна строка — карточка со всеми уровнями.
+    yield_per включает серверный курсор, поэтому в памяти одновременно
+    не больше batch_size строк, сколько бы карточек ни было в колоде.
+    """
+    result = db.execute(deck_export_stmt(deck_id).execution_options(yield_per=batch_size))
+    card: dict | None = None
+    for row in result:
+        if card is None or card["card_id"] != row.card_id:
+            if card is not None:
+                yield _card_line(card)
+            card = {
+                "card_id": row.card_id,
+                "title": row.title,
+                "type": row.type,
+                "max_level": row.max_level,
+                "settings": row.settings,
+                "levels": [],
+            }
+        card["levels"].append({"level_index": row.level_index, "content": row.content})
+    if card is not None:
+        yield _card_line(card)
+
+
+def gzip_chunks(chunks: Iterable[bytes], *, min_chunk: int = 64 * 1024) -> Iterator[bytes]:
+    """Инкрементальный gzip: сжимаем по мере генерации, отдаём блоками ~min_chunk."""
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    buf = bytearray()
+    for chunk in chunks:
+        buf += compressor.compress(chunk)
+        if len(buf) >= min_chunk:
+            yield bytes(buf)
+            buf.clear()
+    buf += compressor.flush()
+    yield bytes(buf)
@@ -0,0 +1,232 @@
+"""
+Импорт карточек в колоду из CSV / JSON Lines.
+
+JSONL — одна карточка на строку:
+    {"title": "...", "type": "flashcard", "levels": [{"question": "...", "answer": "..."}]}
+уровни — как в POST /api/cards/ (для multiple_choice: options, correctOptionId, ...);
+строки выгрузки /export ({"level_index": .., "content": {...}}) тоже принимаются.
+
+CSV — с заголовком: title,type,question,answer,options,correctOptionId,explanation,timerSec.
+Строка с непустым title начинает карточку, строки с пустым title — её следующие уровни.
+options — тексты через "|", id вариантов — их номера с 1 (на них ссылается correctOptionId).
+"""
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import IO, Iterator
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import ImportJobStatus
+from app.db.session import SessionLocal
+from app.models.deck_import_job import DeckImportJob
+from app.schemas.cards import CreateCardLevelRequest
+from app.services.card_content import validate_card, CardValidationError
+from app.services.card_writes import card_rows, insert_cards
+from app.services.deck_versions import bump_content_version
+
+logger = logging.getLogger(__name__)
+
+CSV_OPTIONS_SEPARATOR = "|"
+
+
+@dataclass
+class ImportRow:
+    row: int  # номер строки файла (CSV — с учётом заголовка)
+    card: dict | None = None
+    error: str | None = None
+
+
+@dataclass
+class _Chunk:
+    cards: list[dict] = field(default_factory=list)
+    levels: list[dict] = field(default_factory=list)
+
+
+def _csv_level(record: dict) -> dict:
+    level = {
+        "question": record.get("question"),
+        "answer": record.get("answer") or None,
+        "explanation": record.get("explanation") or None,
+        "correctOptionId": record.get("correctOptionId") or None,
+        "timerSec": record.get("timerSec") or None,
+    }
+    options = record.get("options")
+    if options:
+        texts = options.split(CSV_OPTIONS_SEPARATOR)
+        level["options"] = [{"id": str(i), "text": t} for i, t in enumerate(texts, start=1)]
+    return level
+
+
+def iter_csv_cards(text: IO[str]) -> Iterator[ImportRow]:
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or "title" not in reader.fieldnames or "question" not in reader.fieldnames:
+        raise ValueError("CSV header must contain title and question columns")
+
+    current: ImportRow | None = None
+    for record in reader:
+        title = (record.get("title") or "").strip()
+        if title:
+            if current is not None:
+                yield current
+            current = ImportRow(
+                row=reader.line_num,
+                card={"title": title, "type": (record.get("type") or "").strip(), "levels": [_csv_level(record)]},
+            )
+        elif current is not None and current.card is not None:
+            current.card["levels"].append(_csv_level(record))
+        else:
+            yield ImportRow(row=reader.line_num, error="Level row without a card (title is empty)")
+    if current is not None:
+        yield current
+
+
+def iter_jsonl_cards(text: IO[str]) -> Iterator[ImportRow]:
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            card = json.loads(line)
+        except ValueError:
+            yield ImportRow(row=line_no, error="Invalid JSON")
+            continue
+        if not isinstance(card, dict):
+            yield ImportRow(row=line_no, error="Line must be a JSON object")
+            continue
+        levels = card.get("levels")
+        if isinstance(levels, list):
+            # формат /export: {"level_index": .., "content": {...}}
+            card["levels"] = [
+                l["content"] if isinstance(l, dict) and isinstance(l.get("content"), dict) else l
+                for l in levels
+            ]
+        yield ImportRow(row=line_no, card=card)
+
+
+def iter_import_cards(text: IO[str], fmt: str) -> Iterator[ImportRow]:
+    if fmt == "csv":
+        return iter_csv_cards(text)
+    if fmt == "jsonl":
+        return iter_jsonl_cards(text)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def parse_card(card: dict) -> tuple[str, str, list[dict]]:
+    """(title, type, контент уровней) по правилам create_card или CardValidationError."""
+    # JSONL приходит как есть: не-строки ломали бы normalize_title/strip вне CardValidationError
+    for key in ("title", "type"):
+        if not isinstance(card.get(key) or "", str):
+            raise CardValidationError(f"{key} must be a string")
+    card_type = (card.get("type") or "").strip()
+    raw_levels = card.get("levels") or []
+    if not isinstance(raw_levels, list):
+        raise CardValidationError("levels must be a list")
+    levels = []
+    for i, raw in enumerate(raw_levels):
+        try:
+            levels.append(CreateCardLevelRequest.model_validate(raw))
+        except ValidationError as e:
+            err = e.errors()[0]
+            loc = ".".join(str(p) for p in err["loc"])
+            raise CardValidationError(f"Level {i + 1}: {loc}: {err['msg']}" if loc else f"Level {i + 1}: {err['msg']}")
+    title, contents = validate_card(card.get("title"), card_type, levels)
+    return title, card_type, contents
+
+
+def run_import(
+    db: Session,
+    job: DeckImportJob,
+    text: IO[str],
+    *,
+    chunk_size: int | None = None,
+    max_errors: int | None = None,
+) -> DeckImportJob:
+    """
+    Потоково разбирает файл и пишет карточки пачками по chunk_size:
+    один INSERT карточек + один INSERT уровней + bump content_version + commit
+    (счётчики в job обновляются тем же коммитом — их видит опрос статуса).
+    Невалидные карточки пропускаются и попадают в job.errors.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    max_errors = settings.IMPORT_MAX_REPORTED_ERRORS if max_errors is None else max_errors
+
+    job.status = ImportJobStatus.running
+    db.commit()
+
+    # created_at растёт с номером карточки, чтобы колода сохранила порядок файла
+    started = datetime.now(timezone.utc)
+    errors: list[dict] = []
+    processed = 0
+    chunk = _Chunk()
+
+    def flush() -> None:
+        nonlocal chunk
+        if chunk.cards:
+            insert_cards(db, chunk.cards, chunk.levels)
+            bump_content_version(db, job.deck_id)
+            job.imported_cards += len(chunk.cards)
+        job.processed_rows = processed
+        job.errors = errors[:max_errors]
+        db.commit()
+        chunk = _Chunk()
+
+    try:
+        for item in iter_import_cards(text, job.format):
+            processed = item.row
+            try:
+                if item.error is not None:
+                    raise CardValidationError(item.error)
+                title, card_type, contents = parse_card(item.card)
+            except CardValidationError as e:
+                job.error_count += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": item.row, "error": str(e)})
+                continue
+
+            card, levels = card_rows(
+                deck_id=job.deck_id,
+                title=title,
+                card_type=card_type,
+                contents=contents,
+                created_at=started + timedelta(microseconds=job.imported_cards + len(chunk.cards)),
+            )
+            chunk.cards.append(card)
+            chunk.levels.extend(levels)
+            if len(chunk.cards) >= chunk_size:
+                flush()
+        flush()
+    except Exception as e:
+        db.rollback()
+        logger.exception("deck import %s failed", job.id)
+        job.status = ImportJobStatus.failed
+        # ValueError — битый файл (заголовок CSV, кодировка); остальное наружу не показываем
+        job.error = str(e) if isinstance(e, ValueError) else "Import failed"
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return job
+
+    job.status = ImportJobStatus.done
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return job
+
+
+def process_import_job(job_id: UUID, upload: IO[bytes]) -> None:
+    """Точка входа фоновой задачи: своя сессия, файл закрывается в конце."""
+    db = SessionLocal()
+    try:
+        job = db.get(DeckImportJob, job_id)
+        if job is None:
+            return
+        upload.seek(0)
+        text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        run_import(db, job, text)
+    finally:
+        upload.close()
+        db.close()
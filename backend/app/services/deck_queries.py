@@ -0,0 +1,277 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import select, func, exists, cast, union_all, Integer, Select
+from sqlalchemy.orm import Session
+
+from app.db.counters import DUE_BUCKET_SECONDS
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+from app.models.deck import Deck
+from app.models.user_study_group import UserStudyGroup
+from app.models.user_study_group_deck import UserStudyGroupDeck
+from app.models.user_deck_state import UserDeckState
+from app.models.user_deck_due_bucket import UserDeckDueBucket
+from app.schemas.cards import CardSummary, CardLevelContent, CardOutline, CardLevelIndex
+
+
+def due_bucket_start(now: datetime) -> datetime:
+    """Начало корзины user_deck_due_buckets, в которую попадает now."""
+    epoch = int(now.timestamp()) // DUE_BUCKET_SECONDS * DUE_BUCKET_SECONDS
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def _deck_counter_columns() -> list:
+    """card_count колоды и счётчики пользователя из user_deck_state (строки может ещё не быть)."""
+    started = func.coalesce(UserDeckState.started_count, 0)
+    return [
+        Deck.card_count,
+        func.greatest(Deck.card_count - started, 0).label("new_count"),
+        func.coalesce(UserDeckState.learning_count, 0).label("learning_count"),
+    ]
+
+
+def _join_deck_state(stmt: Select, user_id: UUID) -> Select:
+    return stmt.outerjoin(
+        UserDeckState,
+        (UserDeckState.deck_id == Deck.id) & (UserDeckState.user_id == user_id),
+    )
+
+
+def user_decks_stmt(user_id: UUID) -> Select:
+    """
+    Колоды всех групп пользователя одним запросом.
+    Колода из нескольких групп — одна строка (GROUP BY deck), место в списке —
+    минимальный order_index среди её ссылок. card_count/new/learning — готовые
+    счётчики decks и user_deck_state (app/db/counters.py), без агрегатов по карточкам.
+    """
+    order_index = func.min(UserStudyGroupDeck.order_index)
+    stmt = (
+        select(
+            Deck.id.label("deck_id"),
+            Deck.title,
+            Deck.description,
+            *_deck_counter_columns(),
+        )
+        .select_from(UserStudyGroup)
+        .join(UserStudyGroupDeck, UserStudyGroupDeck.user_group_id == UserStudyGroup.id)
+        .join(Deck, Deck.id == UserStudyGroupDeck.deck_id)
+    )
+    return (
+        _join_deck_state(stmt, user_id)
+        .where(UserStudyGroup.user_id == user_id)
+        .group_by(Deck.id, UserDeckState.user_id, UserDeckState.deck_id)
+        .order_by(order_index.asc(), Deck.title.asc(), Deck.id.asc())
+    )
+
+
+def deck_counters_stmt(*, user_id: UUID, deck_ids: list[UUID]) -> Select:
+    """Счётчики пользователя по заданным колодам (сводка группы)."""
+    stmt = select(Deck.id.label("deck_id"), *_deck_counter_columns()).select_from(Deck)
+    return _join_deck_state(stmt, user_id).where(Deck.id.in_(deck_ids))
+
+
+def due_counts_stmt(*, user_id: UUID, deck_ids: list[UUID], now: datetime) -> Select:
+    """
+    Сколько карточек к повторению по каждой колоде без скана прогресса:
+    сумма закрытых часовых корзин user_deck_due_buckets + точный подсчёт
+    по текущему часу (idx ix_card_progress_user_due_card, строк не больше, чем due за час).
+    """
+    open_bucket = due_bucket_start(now)
+    closed = select(UserDeckDueBucket.deck_id, UserDeckDueBucket.card_count.label("n")).where(
+        UserDeckDueBucket.user_id == user_id,
+        UserDeckDueBucket.deck_id.in_(deck_ids),
+        UserDeckDueBucket.bucket_start < open_bucket,
+    )
+    current = (
+        select(Card.deck_id, func.count().label("n"))
+        .select_from(CardProgress)
+        .join(Card, Card.id == CardProgress.card_id)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.is_active == True,
+            CardProgress.next_review >= open_bucket,
+            CardProgress.next_review <= now,
+            Card.deck_id.in_(deck_ids),
+        )
+        .group_by(Card.deck_id)
+    )
+    parts = union_all(closed, current).subquery()
+    return (
+        select(parts.c.deck_id, cast(func.sum(parts.c.n), Integer).label("due_count"))
+        .group_by(parts.c.deck_id)
+    )
+
+
+def load_due_counts(db: Session, *, user_id: UUID, deck_ids: list[UUID], now: datetime) -> dict[UUID, int]:
+    if not deck_ids:
+        return {}
+    rows = db.execute(due_counts_stmt(user_id=user_id, deck_ids=deck_ids, now=now)).all()
+    return {row.deck_id: max(row.due_count, 0) for row in rows}
+
+
+def load_deck_counters(db: Session, *, user_id: UUID, deck_ids: list[UUID], now: datetime) -> dict[UUID, dict]:
+    """deck_id -> {card_count, new_count, learning_count, due_count}: два запроса на любое число колод."""
+    if not deck_ids:
+        return {}
+    due_by_deck = load_due_counts(db, user_id=user_id, deck_ids=deck_ids, now=now)
+    rows = db.execute(deck_counters_stmt(user_id=user_id, deck_ids=deck_ids)).all()
+    return {
+        row.deck_id: {**row._mapping, "due_count": due_by_deck.get(row.deck_id, 0)}
+        for row in rows
+    }
+
+
+def active_levels_stmt(*, user_id: UUID, card_ids: list[UUID]) -> Select:
+    """Активный уровень пользователя по карточкам (только те, у кого прогресс уже есть)."""
+    return (
+        select(CardProgress.card_id, CardLevel.id.label("card_level_id"), CardLevel.level_index)
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.card_id.in_(card_ids),
+            CardProgress.is_active == True,
+        )
+    )
+
+
+def load_active_levels(db: Session, *, user_id: UUID, card_ids: list[UUID]) -> dict[UUID, tuple[UUID, int]]:
+    """card_id -> (card_level_id, level_index). Карточек без прогресса в словаре нет — они «новые»."""
+    if not card_ids:
+        return {}
+    rows = db.execute(active_levels_stmt(user_id=user_id, card_ids=card_ids)).all()
+    return {row.card_id: (row.card_level_id, row.level_index) for row in rows}
+
+
+def user_has_deck_stmt(*, user_id: UUID, deck_id: UUID) -> Select:
+    """Колода подключена к одной из групп пользователя."""
+    return select(
+        exists()
+        .where(
+            UserStudyGroupDeck.user_group_id == UserStudyGroup.id,
+            UserStudyGroup.user_id == user_id,
+            UserStudyGroupDeck.deck_id == deck_id,
+        )
+    )
+
+
+def deck_cards_stmt(deck_id: UUID) -> Select:
+    return (
+        select(Card.id.label("card_id"), Card.title, Card.type)
+        .where(Card.deck_id == deck_id)
+        .order_by(Card.created_at.asc(), Card.id.asc())
+    )
+
+
+def deck_levels_stmt(deck_id: UUID, *, with_content: bool = True) -> Select:
+    """Уровни всех карточек колоды одним запросом, по порядку level_index."""
+    columns = [CardLevel.card_id, CardLevel.level_index]
+    if with_content:
+        columns.append(CardLevel.content)
+    return (
+        select(*columns)
+        .join(Card, Card.id == CardLevel.card_id)
+        .where(Card.deck_id == deck_id)
+        .order_by(CardLevel.card_id.asc(), CardLevel.level_index.asc())
+    )
+
+
+def load_deck_card_summaries(
+    db: Session, deck_id: UUID, *, with_content: bool = True
+) -> list[CardSummary] | list[CardOutline]:
+    """
+    Карточки колоды с уровнями: два запроса на любой размер колоды, группировка в памяти.
+    Без контента — CardOutline (у уровней только level_index).
+    """
+    cards = db.execute(deck_cards_stmt(deck_id)).all()
+    if not cards:
+        return []
+
+    levels_by_card: dict[UUID, list] = {}
+    for row in db.execute(deck_levels_stmt(deck_id, with_content=with_content)):
+        levels_by_card.setdefault(row.card_id, []).append(
+            CardLevelContent(level_index=row.level_index, content=row.content) if with_content
+            else CardLevelIndex(level_index=row.level_index)
+        )
+
+    card_model = CardSummary if with_content else CardOutline
+    return [
+        card_model(
+            card_id=card.card_id,
+            title=card.title,
+            type=card.type,
+            levels=levels_by_card.get(card.card_id, []),
+        )
+        for card in cards
+    ]
+
+
+def group_decks_stmt(user_group_id: UUID) -> Select:
+    return (
+        select(Deck)
+        .join(UserStudyGroupDeck, UserStudyGroupDeck.deck_id == Deck.id)
+        .where(UserStudyGroupDeck.user_group_id == user_group_id)
+        .order_by(UserStudyGroupDeck.order_index.asc(), Deck.id.asc())
+    )
+
+
+def cards_for_decks_stmt(
+    deck_ids: list[UUID],
+    *,
+    card_limit: int | None = None,
+    with_levels: bool = False,
+) -> Select:
+    """
+    Карточки нескольких колод одним запросом (deck_id IN (...)).
+    card_limit — не больше N первых карточек на колоду (row_number по колоде).
+    with_levels — уровни тем же запросом через LEFT JOIN, строка на уровень.
+    """
+    position = func.row_number().over(
+        partition_by=Card.deck_id,
+        order_by=(Card.created_at.asc(), Card.id.asc()),
+    )
+    ranked = (
+        select(Card.id, Card.deck_id, Card.title, Card.type, position.label("position"))
+        .where(Card.deck_id.in_(deck_ids))
+        .subquery()
+    )
+
+    columns = [
+        ranked.c.id.label("card_id"),
+        ranked.c.deck_id,
+        ranked.c.title,
+        ranked.c.type,
+    ]
+    order_by = [ranked.c.deck_id, ranked.c.position]
+    stmt = select(*columns)
+    if with_levels:
+        stmt = stmt.add_columns(CardLevel.level_index, CardLevel.content).outerjoin(
+            CardLevel, CardLevel.card_id == ranked.c.id
+        )
+        order_by.append(CardLevel.level_index.asc())
+    if card_limit is not None:
+        stmt = stmt.where(ranked.c.position <= card_limit)
+    return stmt.order_by(*order_by)
+
+
+def load_cards_by_deck(
+    db: Session,
+    deck_ids: list[UUID],
+    *,
+    card_limit: int | None = None,
+    with_levels: bool = False,
+) -> dict[UUID, list[CardSummary]]:
+    if not deck_ids:
+        return {}
+
+    stmt = cards_for_decks_stmt(deck_ids, card_limit=card_limit, with_levels=with_levels)
+    cards_by_deck: dict[UUID, list[CardSummary]] = {}
+    current: CardSummary | None = None
+    for row in db.execute(stmt):
+        if current is None or current.card_id != row.card_id:
+            current = CardSummary(card_id=row.card_id, title=row.title, type=row.type, levels=[])
+            cards_by_deck.setdefault(row.deck_id, []).append(current)
+        if with_levels and row.level_index is not None:
+            current.levels.append(CardLevelContent(level_index=row.level_index, content=row.content))
+    return cards_by_deck
@@ -0,0 +1,89 @@
+"""
+Поиск по публичному каталогу колод.
+
+Совпадение — по tsvector (title весомее description, префиксы слов для
+type-ahead) или по триграммам (опечатки): similarity с title и word_similarity
+со словами description. Все условия идут по GIN-индексам из модели Deck.
+Запрос без \w-токенов (например "!!!") ничего не находит — см. prefix_tsquery. Сортировка — (score, id) по убыванию с keyset-курсором:
+score — релевантность при запросе и subscriber_count без него.
+"""
+import base64
+import json
+import re
+from uuid import UUID
+
+from sqlalchemy import select, func, or_, tuple_, cast, Float, Select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+from app.models.deck import Deck, DECK_SEARCH_CONFIG
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MAX_TERMS = 8
+
+
+def encode_search_cursor(score: float, deck_id: UUID) -> str:
+    raw = json.dumps({"s": score, "i": str(deck_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+    """Обратное к encode_search_cursor. Любой мусор -> ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(data["s"]), UUID(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def prefix_tsquery(q: str) -> str | None:
+    """'англ сло' -> 'англ:* & сло:*'. Берём только \\w-токены, так что синтаксис tsquery не сломать."""
+    terms = _WORD_RE.findall(q.lower())[:_MAX_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{t}:*" for t in terms)
+
+
+def public_decks_search_stmt(
+    *,
+    q: str | None,
+    limit: int,
+    after: tuple[float, UUID] | None = None,
+) -> Select:
+    tsquery_text = prefix_tsquery(q) if q else None
+
+    stmt = select(
+        Deck.id.label("deck_id"),
+        Deck.title,
+        Deck.description,
+        Deck.color,
+        Deck.owner_id,
+        Deck.card_count,
+        Deck.subscriber_count,
+    ).where(Deck.is_public == True)
+
+    if tsquery_text is not None:
+        tsquery = func.to_tsquery(cast(DECK_SEARCH_CONFIG, REGCONFIG), tsquery_text)
+        phrase = q.strip()
+        stmt = stmt.where(
+            or_(
+                Deck.search_vector.op("@@")(tsquery),
+                Deck.title.op("%")(phrase),
+                # description %> phrase == phrase <% description (ix_decks_description_trgm)
+                Deck.description.op("%>")(phrase),
+            )
+        )
+        # description с опечаткой только расширяет выдачу: в score её не добавляем,
+        # чтобы совпадение по title оставалось весомее
+        score = cast(
+            func.ts_rank_cd(Deck.search_vector, tsquery) + func.similarity(Deck.title, phrase),
+            Float,
+        )
+    else:
+        score = cast(Deck.subscriber_count, Float)
+
+    stmt = stmt.add_columns(score.label("score"))
+    if after is not None:
+        stmt = stmt.where(tuple_(score, Deck.id) < tuple_(*after))
+    return stmt.order_by(score.desc(), Deck.id.desc()).limit(limit)
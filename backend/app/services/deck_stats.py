@@ -0,0 +1,120 @@
+"""
+Статистика пользователя по колоде (GET /api/decks/{deck_id}/stats).
+
+Два агрегатных запроса: прогресс (card_progress + card_levels, GROUP BY level_index,
+остальное — FILTER-агрегаты того же прохода) и ответы за 30 дней (card_review_history).
+Карточки без прогресса — «новые» на уровне 0 (как в сессии колоды).
+
+Результат кэшируется per-process по (user, deck) вместе с версиями колоды:
+ответ/level_up/level_down/сброс прогресса поднимают progress_version, правка карточек —
+content_version, и запись с другими версиями просто не используется. TTL ограничивает
+устаревание due_today/overdue со временем.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import select, func, Select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+from app.models.card_review_history import CardReviewHistory
+from app.models.deck import Deck
+from app.services.deck_versions import DeckVersions
+
+# «зрелая» карточка — интервал от трёх недель
+MATURE_STABILITY_DAYS = 21.0
+
+_cache = TTLCache(maxsize=settings.DECK_STATS_CACHE_SIZE, ttl=settings.DECK_STATS_CACHE_TTL)
+
+
+def progress_stats_stmt(*, user_id: UUID, deck_id: UUID, today: datetime, tomorrow: datetime) -> Select:
+    """Активный прогресс пользователя в колоде по level_index (суммы — для средних по колоде)."""
+    return (
+        select(
+            CardLevel.level_index,
+            func.count().label("cards"),
+            func.sum(CardProgress.stability).label("stability_sum"),
+            func.sum(CardProgress.difficulty).label("difficulty_sum"),
+            func.count().filter(CardProgress.next_review < today).label("overdue"),
+            func.count().filter(
+                CardProgress.next_review >= today, CardProgress.next_review < tomorrow
+            ).label("due_today"),
+            func.count().filter(CardProgress.stability >= MATURE_STABILITY_DAYS).label("mature"),
+        )
+        .select_from(CardProgress)
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .join(Card, Card.id == CardProgress.card_id)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.is_active == True,
+            Card.deck_id == deck_id,
+        )
+        .group_by(CardLevel.level_index)
+        .order_by(CardLevel.level_index.asc())
+    )
+
+
+def review_stats_stmt(*, user_id: UUID, deck_id: UUID, now: datetime) -> Select:
+    """Ответы за 7/30 дней; card_count колоды — тем же запросом (агрегат без GROUP BY — всегда одна строка)."""
+    card_count = select(Deck.card_count).where(Deck.id == deck_id).scalar_subquery()
+    return (
+        select(
+            func.coalesce(card_count, 0).label("card_count"),
+            func.count().filter(CardReviewHistory.reviewed_at >= now - timedelta(days=7)).label("reviews_7d"),
+            func.count().label("reviews_30d"),
+        )
+        .select_from(CardReviewHistory)
+        .join(Card, Card.id == CardReviewHistory.card_id)
+        .where(
+            CardReviewHistory.user_id == user_id,
+            Card.deck_id == deck_id,
+            CardReviewHistory.reviewed_at >= now - timedelta(days=30),
+        )
+    )
+
+
+def compute_deck_stats(db: Session, *, user_id: UUID, deck_id: UUID, now: datetime) -> dict:
+    # «сегодня» — сутки UTC
+    today = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    levels = db.execute(
+        progress_stats_stmt(user_id=user_id, deck_id=deck_id, today=today, tomorrow=today + timedelta(days=1))
+    ).all()
+    reviews = db.execute(review_stats_stmt(user_id=user_id, deck_id=deck_id, now=now)).one()
+
+    started = sum(row.cards for row in levels)
+    distribution = {row.level_index: row.cards for row in levels}
+    unseen = max(reviews.card_count - started, 0)
+    if unseen:
+        distribution[0] = distribution.get(0, 0) + unseen
+
+    return {
+        "deck_id": deck_id,
+        "card_count": reviews.card_count,
+        "level_distribution": [
+            {"level_index": level_index, "cards": cards} for level_index, cards in sorted(distribution.items())
+        ],
+        "avg_stability": sum(row.stability_sum for row in levels) / started if started else None,
+        "avg_difficulty": sum(row.difficulty_sum for row in levels) / started if started else None,
+        "due_today": sum(row.due_today for row in levels),
+        "overdue": sum(row.overdue for row in levels),
+        "mature": sum(row.mature for row in levels),
+        "reviews_7d": reviews.reviews_7d,
+        "reviews_30d": reviews.reviews_30d,
+    }
+
+
+def get_deck_stats(db: Session, *, user_id: UUID, deck_id: UUID, versions: DeckVersions, now: datetime) -> dict:
+    """Из кэша, если с момента расчёта версии колоды не менялись, иначе compute_deck_stats."""
+    key = (user_id, deck_id)
+    version = (versions.content_version, versions.progress_version)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    stats = compute_deck_stats(db, user_id=user_id, deck_id=deck_id, now=now)
+    _cache.set(key, (version, stats))
+    return stats
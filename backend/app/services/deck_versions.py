@@ -0,0 +1,111 @@
+"""
+Версии для HTTP-кэша колод.
+
+decks.content_version — содержимое колоды (карточки, уровни, поля колоды),
+user_deck_state.progress_version — прогресс пользователя в колоде.
+ETag ответа строится из них и параметров запроса, поэтому If-None-Match
+проверяется одним индексным запросом до загрузки уровней.
+"""
+import hashlib
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select, update, exists, literal, func, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.deck import Deck
+from app.models.user_deck_state import UserDeckState
+from app.models.user_study_group import UserStudyGroup
+from app.models.user_study_group_deck import UserStudyGroupDeck
+
+
+def bump_content_version(db: Session, deck_id: UUID) -> None:
+    db.execute(
+        update(Deck)
+        .where(Deck.id == deck_id)
+        .values(content_version=Deck.content_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_progress_version(
+    db: Session,
+    *,
+    user_id: UUID,
+    deck_id: UUID | None = None,
+    card_ids: list[UUID] | None = None,
+) -> None:
+    """
+    +1 к progress_version пользователя по колоде deck_id или по колодам карточек card_ids.
+    Один upsert; колоды идут по порядку deck_id, чтобы параллельные запросы не ловили deadlock.
+    """
+    if deck_id is not None:
+        decks = select(literal(deck_id).label("deck_id"))
+    elif card_ids:
+        decks = select(Card.deck_id).where(Card.id.in_(card_ids)).group_by(Card.deck_id).order_by(Card.deck_id)
+    else:
+        return
+
+    decks = decks.subquery()
+    stmt = pg_insert(UserDeckState).from_select(
+        ["user_id", "deck_id", "progress_version"],
+        select(literal(user_id, UserDeckState.user_id.type), decks.c.deck_id, literal(1)),
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserDeckState.user_id, UserDeckState.deck_id],
+            set_={"progress_version": UserDeckState.progress_version + 1},
+        )
+    )
+
+
+@dataclass(frozen=True)
+class DeckVersions:
+    owner_id: UUID
+    is_public: bool
+    in_user_groups: bool
+    content_version: int
+    progress_version: int
+
+
+def deck_versions_stmt(*, user_id: UUID, deck_id: UUID) -> Select:
+    in_user_groups = exists().where(
+        UserStudyGroupDeck.deck_id == Deck.id,
+        UserStudyGroupDeck.user_group_id == UserStudyGroup.id,
+        UserStudyGroup.user_id == user_id,
+    )
+    return (
+        select(
+            Deck.owner_id,
+            Deck.is_public,
+            in_user_groups.label("in_user_groups"),
+            Deck.content_version,
+            func.coalesce(UserDeckState.progress_version, 0).label("progress_version"),
+        )
+        .outerjoin(
+            UserDeckState,
+            (UserDeckState.deck_id == Deck.id) & (UserDeckState.user_id == user_id),
+        )
+        .where(Deck.id == deck_id)
+    )
+
+
+def load_deck_versions(db: Session, *, user_id: UUID, deck_id: UUID) -> DeckVersions | None:
+    row = db.execute(deck_versions_stmt(user_id=user_id, deck_id=deck_id)).first()
+    return DeckVersions(**row._mapping) if row else None
+
+
+def make_etag(versions: DeckVersions, *, variant: str, with_progress: bool) -> str:
+    """Сильный ETag: версия контента, версия прогресса (если ответ от неё зависит) и вариант запроса."""
+    progress = versions.progress_version if with_progress else "-"
+    variant_hash = hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+    return f'"c{versions.content_version}-p{progress}-{variant_hash}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
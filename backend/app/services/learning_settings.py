@@ -0,0 +1,111 @@
+"""
+Настройки обучения пользователя (снапшот) с per-process TTL-кэшем.
+
+Снапшот попадает в кэш только после commit сессии, которая его прочитала/создала:
+откаченный upsert не кэшируется. Сброс кэша — ORM-изменения UserLearningSettings
+в этом процессе (при flush и ещё раз после commit). Ограничение: Core/bulk UPDATE
+и изменения из других воркеров сброс не вызывают — такие процессы видят старые
+настройки до истечения LEARNING_SETTINGS_CACHE_TTL.
+"""
+from uuid import UUID
+
+from sqlalchemy import event, select, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import settings as app_settings
+from app.domain.review.dto import LearningSettingsSnapshot
+from app.models.user_learning_settings import UserLearningSettings
+
+_COLUMNS = (
+    UserLearningSettings.desired_retention,
+    UserLearningSettings.initial_stability,
+    UserLearningSettings.initial_difficulty,
+    UserLearningSettings.promote_stability_multiplier,
+    UserLearningSettings.promote_difficulty_delta,
+)
+
+_cache = TTLCache(
+    maxsize=app_settings.LEARNING_SETTINGS_CACHE_SIZE,
+    ttl=app_settings.LEARNING_SETTINGS_CACHE_TTL,
+)
+
+# session.info: снапшоты, которые попадут в кэш после commit, и user_id для сброса после commit
+_PENDING = "learning_settings_pending"
+_CHANGED = "learning_settings_changed"
+
+
+def settings_upsert_stmt(user_id: UUID):
+    """
+    INSERT ... ON CONFLICT (user_id) DO NOTHING RETURNING:
+    первый запрос пользователя создаёт настройки без гонки на уникальном user_id.
+    Если параллельный запрос успел вставить строку раньше — RETURNING пустой, читаем select'ом.
+    """
+    return (
+        pg_insert(UserLearningSettings)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[UserLearningSettings.user_id])
+        .returning(*_COLUMNS)
+    )
+
+
+def settings_select_stmt(user_id: UUID) -> Select:
+    return select(*_COLUMNS).where(UserLearningSettings.user_id == user_id)
+
+
+def snapshot_from_row(row) -> LearningSettingsSnapshot:
+    return LearningSettingsSnapshot(**row._mapping)
+
+
+def get_learning_settings(db: Session, user_id: UUID) -> LearningSettingsSnapshot:
+    """
+    Настройки обучения пользователя (снапшот). Горячий путь — из кэша без запросов.
+    Upsert выполняется в транзакции вызывающего кода, в кэш снапшот кладётся после её commit.
+    """
+    snapshot = _cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    pending = db.info.setdefault(_PENDING, {})
+    if user_id in pending:
+        return pending[user_id]
+
+    row = db.execute(settings_select_stmt(user_id)).first()
+    if row is None:
+        row = db.execute(settings_upsert_stmt(user_id)).first() or db.execute(settings_select_stmt(user_id)).one()
+
+    snapshot = snapshot_from_row(row)
+    pending[user_id] = snapshot
+    return snapshot
+
+
+def invalidate_learning_settings(user_id: UUID) -> None:
+    _cache.invalidate(user_id)
+
+
+@event.listens_for(UserLearningSettings, "after_update")
+@event.listens_for(UserLearningSettings, "after_delete")
+def _invalidate_on_change(mapper, connection, target: UserLearningSettings) -> None:
+    invalidate_learning_settings(target.user_id)
+    # между flush и commit параллельный запрос ещё может закэшировать старую строку
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED, set()).add(target.user_id)
+        session.info.get(_PENDING, {}).pop(target.user_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED, ()):
+        invalidate_learning_settings(user_id)
+    for user_id, snapshot in session.info.pop(_PENDING, {}).items():
+        _cache.set(user_id, snapshot)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted(session: Session, transaction) -> None:
+    # rollback / close без commit: ничего из этой транзакции не кэшируем
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+        session.info.pop(_CHANGED, None)
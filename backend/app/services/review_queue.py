@@ -0,0 +1,122 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select, func, tuple_, Select
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+
+
+def encode_cursor(next_review: datetime, card_id: UUID) -> str:
+    raw = json.dumps({"n": next_review.isoformat(), "c": str(card_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Обратное к encode_cursor. Любой мусор -> ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["n"]), UUID(data["c"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _due_filter(user_id: UUID, now: datetime) -> tuple:
+    return (
+        CardProgress.user_id == user_id,
+        CardProgress.is_active == True,
+        CardProgress.next_review <= now,
+    )
+
+
+def due_cards_stmt(
+    *,
+    user_id: UUID,
+    now: datetime,
+    limit: int,
+    after: tuple[datetime, UUID] | None = None,
+) -> Select:
+    """
+    Очередь повторения одним запросом: активный прогресс + карточка + активный уровень.
+    Выбираем только нужные колонки, фильтр/сортировка идут по индексу
+    ix_card_progress_user_due_card (user_id, next_review, card_id) WHERE is_active.
+
+    after — позиция курсора (next_review, card_id): следующая страница берётся
+    seek-ом по индексу, без OFFSET.
+    """
+    stmt = (
+        select(
+            Card.id.label("card_id"),
+            Card.deck_id,
+            Card.title,
+            Card.type,
+            CardLevel.id.label("card_level_id"),
+            CardLevel.level_index,
+            CardLevel.content,
+            CardProgress.stability,
+            CardProgress.difficulty,
+            CardProgress.next_review,
+        )
+        .select_from(CardProgress)
+        .join(Card, Card.id == CardProgress.card_id)
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .where(*_due_filter(user_id, now))
+        .order_by(CardProgress.next_review.asc(), CardProgress.card_id.asc())
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(CardProgress.next_review, CardProgress.card_id) > tuple_(*after))
+    return stmt
+
+
+def due_count_stmt(*, user_id: UUID, now: datetime) -> Select:
+    return select(func.count()).select_from(CardProgress).where(*_due_filter(user_id, now))
+
+
+def card_levels_stmt(card_ids: list[UUID]) -> Select:
+    return (
+        select(CardLevel.card_id, CardLevel.level_index, CardLevel.content)
+        .where(CardLevel.card_id.in_(card_ids))
+        .order_by(CardLevel.card_id.asc(), CardLevel.level_index.asc())
+    )
+
+
+def group_levels(rows) -> dict[UUID, list]:
+    levels_by_card: dict[UUID, list] = {}
+    for row in rows:
+        levels_by_card.setdefault(row.card_id, []).append(row)
+    return levels_by_card
+
+
+def load_due_cards(
+    db: Session,
+    *,
+    user_id: UUID,
+    now: datetime,
+    limit: int,
+    after: tuple[datetime, UUID] | None = None,
+) -> list:
+    return db.execute(due_cards_stmt(user_id=user_id, now=now, limit=limit, after=after)).all()
+
+
+def count_due_cards(db: Session, *, user_id: UUID, now: datetime) -> int:
+    return db.execute(due_count_stmt(user_id=user_id, now=now)).scalar_one()
+
+
+def split_page(rows: list, limit: int) -> tuple[list, str | None, bool]:
+    """Запрашиваем limit + 1 строк: лишняя строка говорит, что есть следующая страница."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].next_review, rows[-1].card_id) if has_more else None
+    return rows, next_cursor, has_more
+
+
+def load_levels_by_card(db: Session, card_ids: list[UUID]) -> dict[UUID, list]:
+    if not card_ids:
+        return {}
+    return group_levels(db.execute(card_levels_stmt(card_ids)).all())
@@ -5,19 +5,13 @@ from app.domain.review.dto import LearningSettingsSnapshot
 from app.domain.review.entities import CardLevelProgressState
 from app.domain.review.policy import ReviewPolicy
 
+_policy = ReviewPolicy()
+
 class ReviewService:
     @staticmethod
-    def review(*, progress, rating: str, settings) -> CardLevelProgressState:
+    def review(*, progress, rating: str, settings: LearningSettingsSnapshot) -> CardLevelProgressState:
         rating_enum = ReviewRating(rating)
 
-        snapshot = LearningSettingsSnapshot(
-            desired_retention=settings.desired_retention,
-            initial_stability=settings.initial_stability,
-            initial_difficulty=settings.initial_difficulty,
-            promote_stability_multiplier=settings.promote_stability_multiplier,
-            promote_difficulty_delta=settings.promote_difficulty_delta,
-        )
-
         state = CardLevelProgressState(
             stability=progress.stability,
             difficulty=progress.difficulty,
@@ -25,9 +19,9 @@ class ReviewService:
         )
 
         now = datetime.now(timezone.utc)
-        return ReviewPolicy().apply_review(
+        return _policy.apply_review(
             state=state,
             rating=rating_enum,
-            settings=snapshot,
+            settings=settings,
             now=now,
         )
@@ -0,0 +1,535 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import select, insert, update, and_, func, literal, null, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.enums import ReviewRating
+from app.domain.review.dto import LearningSettingsSnapshot
+from app.domain.review.entities import CardLevelProgressState
+from app.domain.review.policy import ReviewPolicy
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+from app.models.card_review_history import CardReviewHistory
+
+_policy = ReviewPolicy()
+
+@dataclass
+class ReviewInput:
+    card_id: UUID
+    rating: ReviewRating
+    reviewed_at: datetime
+    client_review_id: UUID | None = None
+
+
+@dataclass
+class ReviewOutcome:
+    card_id: UUID
+    ok: bool
+    error: str | None = None
+    card_level_id: UUID | None = None
+    level_index: int | None = None
+    stability: float | None = None
+    difficulty: float | None = None
+    next_review: datetime | None = None
+    duplicate: bool = False
+
+
+class CardNotFound(Exception):
+    pass
+
+
+class CardHasNoLevelZero(Exception):
+    pass
+
+
+@dataclass
+class _ProgressRow:
+    id: UUID
+    card_level_id: UUID
+    level_index: int
+    state: CardLevelProgressState
+
+
+def normalize_reviewed_at(value: datetime | None, now: datetime) -> datetime:
+    """Клиентское время ответа: naive считаем UTC, будущее обрезаем до серверного now."""
+    if value is None:
+        return now
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return min(value, now)
+
+
+def interval_minutes(state: CardLevelProgressState) -> int:
+    return int((state.next_review - state.last_reviewed).total_seconds() // 60)
+
+
+def active_progress_for_update_many_stmt(*, user_id: UUID, card_ids: list[UUID]):
+    # порядок card_id — чтобы пачки с пересекающимися карточками не ловили deadlock
+    return (
+        select(
+            CardProgress.card_id,
+            CardProgress.id,
+            CardProgress.card_level_id,
+            CardLevel.level_index,
+            CardProgress.stability,
+            CardProgress.difficulty,
+            CardProgress.last_reviewed,
+            CardProgress.next_review,
+        )
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.card_id.in_(card_ids),
+            CardProgress.is_active == True,
+        )
+        .order_by(CardProgress.card_id.asc())
+        .with_for_update(of=CardProgress)
+    )
+
+
+def _lock_active_progress(db: Session, *, user_id: UUID, card_ids: list[UUID]) -> dict[UUID, _ProgressRow]:
+    return {
+        r.card_id: _ProgressRow(
+            id=r.id,
+            card_level_id=r.card_level_id,
+            level_index=r.level_index,
+            state=CardLevelProgressState(
+                stability=r.stability,
+                difficulty=r.difficulty,
+                last_reviewed=r.last_reviewed,
+                next_review=r.next_review,
+            ),
+        )
+        for r in db.execute(active_progress_for_update_many_stmt(user_id=user_id, card_ids=card_ids))
+    }
+
+
+def _load_progress(
+    db: Session,
+    *,
+    user_id: UUID,
+    card_ids: list[UUID],
+    settings: LearningSettingsSnapshot,
+) -> tuple[dict[UUID, _ProgressRow], dict[UUID, str]]:
+    """
+    Активный прогресс пачки под FOR UPDATE (как в apply_single_review):
+    1) SELECT ... FOR UPDATE OF card_progress в порядке card_id
+    2) для карточек без прогресса — карточка + level 0 одним запросом,
+       INSERT ... ON CONFLICT DO NOTHING RETURNING (uq_user_card_active_level),
+       а проигравшие гонку параллельному запросу перечитываются с блокировкой.
+    """
+    progress = _lock_active_progress(db, user_id=user_id, card_ids=card_ids)
+    errors: dict[UUID, str] = {}
+
+    missing = [card_id for card_id in card_ids if card_id not in progress]
+    if not missing:
+        return progress, errors
+
+    lvl0_rows = db.execute(
+        select(Card.id.label("card_id"), CardLevel.id.label("level_id"))
+        .outerjoin(CardLevel, and_(CardLevel.card_id == Card.id, CardLevel.level_index == 0))
+        .where(Card.id.in_(missing))
+    ).all()
+    lvl0_by_card = {r.card_id: r.level_id for r in lvl0_rows}
+
+    to_create = []
+    for card_id in missing:
+        if card_id not in lvl0_by_card:
+            errors[card_id] = "Card not found"
+        elif lvl0_by_card[card_id] is None:
+            errors[card_id] = "Card has no level 0"
+        else:
+            to_create.append(card_id)
+    if not to_create:
+        return progress, errors
+
+    now = datetime.now(timezone.utc)
+    created = db.execute(
+        pg_insert(CardProgress)
+        .values([
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "card_id": card_id,
+                "card_level_id": lvl0_by_card[card_id],
+                "is_active": True,
+                "stability": settings.initial_stability,
+                "difficulty": settings.initial_difficulty,
+                "next_review": now,
+            }
+            for card_id in sorted(to_create)
+        ])
+        .on_conflict_do_nothing()
+        .returning(CardProgress.card_id, CardProgress.id, CardProgress.card_level_id)
+    ).all()
+    for r in created:
+        progress[r.card_id] = _ProgressRow(
+            id=r.id,
+            card_level_id=r.card_level_id,
+            level_index=0,
+            state=CardLevelProgressState(
+                stability=settings.initial_stability,
+                difficulty=settings.initial_difficulty,
+            ),
+        )
+
+    # гонка: прогресс создал параллельный запрос — берём его строку под блокировку
+    lost = [card_id for card_id in to_create if card_id not in progress]
+    if lost:
+        progress.update(_lock_active_progress(db, user_id=user_id, card_ids=lost))
+
+    return progress, errors
+
+
+def apply_review_batch(
+    db: Session,
+    *,
+    user_id: UUID,
+    items: list[ReviewInput],
+    settings: LearningSettingsSnapshot,
+) -> list[ReviewOutcome]:
+    """
+    Применяет пачку ответов в текущей транзакции (commit делает вызывающий код).
+
+    Ответы применяются в порядке reviewed_at (повторы одной карточки — последовательно);
+    ответ раньше сохранённого last_reviewed отклоняется ("Stale review"). Прогресс читается под FOR UPDATE и пишется одним bulk UPDATE (новые строки уровня 0
+    создаются заранее, см. _load_progress), история — одним multi-row INSERT.
+    Результаты возвращаются в порядке items.
+    """
+    if not items:
+        return []
+
+    card_ids = list(dict.fromkeys(item.card_id for item in items))
+    progress, errors = _load_progress(db, user_id=user_id, card_ids=card_ids, settings=settings)
+
+    outcomes: list[ReviewOutcome | None] = [None] * len(items)
+    history: list[dict] = []
+
+    order = sorted(range(len(items)), key=lambda i: items[i].reviewed_at)
+    for i in order:
+        item = items[i]
+        error = errors.get(item.card_id)
+        if error:
+            outcomes[i] = ReviewOutcome(card_id=item.card_id, ok=False, error=error)
+            continue
+
+        row = progress[item.card_id]
+        if row.state.last_reviewed is not None and item.reviewed_at < row.state.last_reviewed:
+            # ответ старше сохранённого состояния (офлайн-очередь догнала более новый ответ):
+            # применение сдвинуло бы last_reviewed/next_review назад и ещё раз умножило stability
+            outcomes[i] = ReviewOutcome(card_id=item.card_id, ok=False, error="Stale review")
+            continue
+        row.state = _policy.apply_review(
+            state=row.state,
+            rating=item.rating,
+            settings=settings,
+            now=item.reviewed_at,
+        )
+        history.append(
+            history_row(
+                user_id=user_id,
+                card_id=item.card_id,
+                card_level_id=row.card_level_id,
+                rating=item.rating,
+                state=row.state,
+                client_review_id=item.client_review_id,
+            )
+        )
+        outcomes[i] = ReviewOutcome(
+            card_id=item.card_id,
+            ok=True,
+            card_level_id=row.card_level_id,
+            level_index=row.level_index,
+            stability=row.state.stability,
+            difficulty=row.state.difficulty,
+            next_review=row.state.next_review,
+        )
+
+    touched = {o.card_id for o in outcomes if o.ok}
+    to_update = [
+        {
+            "id": progress[card_id].id,
+            "stability": progress[card_id].state.stability,
+            "difficulty": progress[card_id].state.difficulty,
+            "last_reviewed": progress[card_id].state.last_reviewed,
+            "next_review": progress[card_id].state.next_review,
+        }
+        for card_id in touched
+    ]
+    if to_update:
+        db.execute(update(CardProgress), to_update)
+    if history:
+        db.execute(insert(CardReviewHistory), history)
+
+    return outcomes
+
+
+def applied_review_card_id(db: Session, *, user_id: UUID, client_review_id: UUID) -> UUID | None:
+    """Карточка, к которой уже применён ответ с этим client_review_id (None — ещё не применялся)."""
+    return db.execute(
+        select(CardReviewHistory.card_id)
+        .where(
+            CardReviewHistory.user_id == user_id,
+            CardReviewHistory.client_review_id == client_review_id,
+        )
+        .limit(1)
+    ).scalar()
+
+
+def apply_review_sync(
+    db: Session,
+    *,
+    user_id: UUID,
+    items: list[ReviewInput],
+    settings: LearningSettingsSnapshot,
+) -> list[ReviewOutcome]:
+    """
+    Реплей офлайн-ответов с ключами идемпотентности (client_review_id).
+
+    Уже принятые id отсеиваются одним запросом по uq_review_history_client_id,
+    остальное идёт через apply_review_batch (в порядке reviewed_at).
+    Синки одного пользователя сериализуются advisory-lock'ом до конца транзакции,
+    чтобы два параллельных ретрая не прошли проверку одновременно.
+    """
+    if not items:
+        return []
+
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtextextended(f"review-sync:{user_id}", 0))))
+
+    client_ids = [item.client_review_id for item in items]
+    applied = set(
+        db.execute(
+            select(CardReviewHistory.client_review_id).where(
+                CardReviewHistory.user_id == user_id,
+                CardReviewHistory.client_review_id.in_(client_ids),
+            )
+        ).scalars()
+    )
+
+    fresh_idx: list[int] = []
+    outcomes: list[ReviewOutcome | None] = [None] * len(items)
+    for i, item in enumerate(items):
+        if item.client_review_id in applied:
+            outcomes[i] = ReviewOutcome(card_id=item.card_id, ok=True, duplicate=True)
+            continue
+        applied.add(item.client_review_id)  # дубль внутри одного payload
+        fresh_idx.append(i)
+
+    fresh = apply_review_batch(
+        db,
+        user_id=user_id,
+        items=[items[i] for i in fresh_idx],
+        settings=settings,
+    )
+    for i, outcome in zip(fresh_idx, fresh):
+        outcomes[i] = outcome
+
+    return outcomes
+
+
+# ---------------------------------------------------------------------------
+# Одиночный ответ: одна транзакция, без refresh/get после commit.
+# Билдеры statement'ов отдельно от исполнения — их же использует async-путь.
+# ---------------------------------------------------------------------------
+
+_PROGRESS_STATE_COLUMNS = (
+    CardProgress.id,
+    CardProgress.card_level_id,
+    CardProgress.stability,
+    CardProgress.difficulty,
+    CardProgress.last_reviewed,
+)
+
+
+def active_progress_for_update_stmt(*, user_id: UUID, card_id: UUID):
+    return (
+        select(*_PROGRESS_STATE_COLUMNS)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.card_id == card_id,
+            CardProgress.is_active == True,
+        )
+        .with_for_update()
+    )
+
+
+def create_level0_progress_stmt(
+    *,
+    user_id: UUID,
+    card_id: UUID,
+    settings: LearningSettingsSnapshot,
+    now: datetime,
+):
+    """
+    INSERT ... SELECT из card_levels (level_index = 0) ... ON CONFLICT DO NOTHING RETURNING.
+    Пустой RETURNING: либо нет карточки/уровня 0, либо параллельный запрос создал прогресс раньше.
+    """
+    return (
+        pg_insert(CardProgress)
+        .from_select(
+            [
+                "id", "user_id", "card_id", "card_level_id", "is_active",
+                "stability", "difficulty", "last_reviewed", "next_review",
+                "created_at", "updated_at",
+            ],
+            select(
+                literal(uuid.uuid4(), CardProgress.id.type),
+                literal(user_id, CardProgress.user_id.type),
+                CardLevel.card_id,
+                CardLevel.id,
+                true(),
+                literal(settings.initial_stability, CardProgress.stability.type),
+                literal(settings.initial_difficulty, CardProgress.difficulty.type),
+                null(),
+                literal(now, CardProgress.next_review.type),
+                literal(now, CardProgress.created_at.type),
+                literal(now, CardProgress.updated_at.type),
+            ).where(CardLevel.card_id == card_id, CardLevel.level_index == 0),
+        )
+        .on_conflict_do_nothing()
+        .returning(*_PROGRESS_STATE_COLUMNS)
+    )
+
+
+def progress_update_returning_stmt(*, progress_id: UUID, state: CardLevelProgressState, now: datetime):
+    """UPDATE ... FROM card_levels RETURNING: новое состояние + level_index одним round trip."""
+    return (
+        update(CardProgress)
+        .where(CardProgress.id == progress_id, CardLevel.id == CardProgress.card_level_id)
+        .values(
+            stability=state.stability,
+            difficulty=state.difficulty,
+            last_reviewed=state.last_reviewed,
+            next_review=state.next_review,
+            updated_at=now,
+        )
+        .returning(
+            CardProgress.card_id,
+            CardProgress.card_level_id,
+            CardLevel.level_index,
+            CardProgress.stability,
+            CardProgress.difficulty,
+            CardProgress.next_review,
+        )
+    )
+
+
+def current_review_state_stmt(*, user_id: UUID, card_id: UUID):
+    return (
+        select(
+            CardProgress.card_id,
+            CardProgress.card_level_id,
+            CardLevel.level_index,
+            CardProgress.stability,
+            CardProgress.difficulty,
+            CardProgress.next_review,
+        )
+        .join(CardLevel, CardLevel.id == CardProgress.card_level_id)
+        .where(
+            CardProgress.user_id == user_id,
+            CardProgress.card_id == card_id,
+            CardProgress.is_active == True,
+        )
+    )
+
+
+def card_exists_stmt(card_id: UUID):
+    return select(Card.id).where(Card.id == card_id)
+
+
+def history_row(
+    *,
+    user_id: UUID,
+    card_id: UUID,
+    card_level_id: UUID,
+    rating: ReviewRating,
+    state: CardLevelProgressState,
+    client_review_id: UUID | None,
+) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "card_id": card_id,
+        "card_level_id": card_level_id,
+        "rating": rating,
+        "interval_minutes": interval_minutes(state),
+        "reviewed_at": state.last_reviewed,
+        "client_review_id": client_review_id,
+    }
+
+
+def outcome_from_row(row) -> ReviewOutcome:
+    return ReviewOutcome(
+        card_id=row.card_id,
+        ok=True,
+        card_level_id=row.card_level_id,
+        level_index=row.level_index,
+        stability=row.stability,
+        difficulty=row.difficulty,
+        next_review=row.next_review,
+    )
+
+
+def state_from_row(row) -> CardLevelProgressState:
+    return CardLevelProgressState(
+        stability=row.stability,
+        difficulty=row.difficulty,
+        last_reviewed=row.last_reviewed,
+    )
+
+
+def current_review_state(db: Session, *, user_id: UUID, card_id: UUID) -> ReviewOutcome | None:
+    """None — активного прогресса нет (например, его сбросили после ответа)."""
+    row = db.execute(current_review_state_stmt(user_id=user_id, card_id=card_id)).first()
+    return outcome_from_row(row) if row is not None else None
+
+
+def apply_single_review(
+    db: Session,
+    *,
+    user_id: UUID,
+    card_id: UUID,
+    rating: ReviewRating,
+    settings: LearningSettingsSnapshot,
+    now: datetime,
+    client_review_id: UUID | None = None,
+) -> ReviewOutcome:
+    """
+    SELECT ... FOR UPDATE активного прогресса (или INSERT ... SELECT уровня 0),
+    затем UPDATE ... RETURNING и INSERT в историю — всё в транзакции вызывающего кода.
+    """
+    progress = db.execute(active_progress_for_update_stmt(user_id=user_id, card_id=card_id)).first()
+    if progress is None:
+        progress = db.execute(
+            create_level0_progress_stmt(user_id=user_id, card_id=card_id, settings=settings, now=now)
+        ).first()
+    if progress is None:
+        # гонка: прогресс создал параллельный запрос
+        progress = db.execute(active_progress_for_update_stmt(user_id=user_id, card_id=card_id)).first()
+    if progress is None:
+        if db.execute(card_exists_stmt(card_id)).first() is None:
+            raise CardNotFound()
+        raise CardHasNoLevelZero()
+
+    state = _policy.apply_review(state=state_from_row(progress), rating=rating, settings=settings, now=now)
+
+    row = db.execute(progress_update_returning_stmt(progress_id=progress.id, state=state, now=now)).one()
+    db.execute(
+        insert(CardReviewHistory),
+        [
+            history_row(
+                user_id=user_id,
+                card_id=card_id,
+                card_level_id=progress.card_level_id,
+                rating=rating,
+                state=state,
+                client_review_id=client_review_id,
+            )
+        ],
+    )
+    return outcome_from_row(row)
@@ -0,0 +1,123 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select, func, cast, exists, tuple_, String, Select
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+
+RANDOM_MODES = ("random", "new_random")
+NEW_MODES = ("new_random", "new_ordered")
+
+
+def encode_study_cursor(*, key: str, card_id: UUID, seed: int | None) -> str:
+    raw = json.dumps({"k": key, "c": str(card_id), "s": seed}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_study_cursor(cursor: str, *, mode: str, seed: int | None) -> tuple[str | datetime, UUID]:
+    """
+    Курсор действителен только для того же seed, с которым выдан. Мусор -> ValueError.
+    Ключ: hex md5 для random-режимов, created_at для ordered.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key, card_id, cursor_seed = str(data["k"]), UUID(data["c"]), data["s"]
+        if mode not in RANDOM_MODES:
+            key = datetime.fromisoformat(key)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_seed != seed:
+        raise ValueError("Invalid cursor")
+    return key, card_id
+
+
+def shuffle_key(seed: int):
+    """
+    Детерминированный «перемешанный» порядок: md5(card_id:seed).
+    Считается в БД, поэтому limit/курсор не требуют загрузки всей колоды.
+    COLLATE "C" — побайтовое сравнение hex, одинаковое для ORDER BY и курсора.
+    """
+    return func.md5(func.concat(cast(Card.id, String), ":", str(seed))).collate("C")
+
+
+def study_cards_stmt(
+    *,
+    user_id: UUID,
+    deck_id: UUID,
+    mode: str,
+    seed: int | None,
+    limit: int | None,
+    after: tuple[str | datetime, UUID] | None = None,
+) -> Select:
+    """
+    Карточки колоды для режима изучения одним запросом.
+    random/new_random — порядок по shuffle_key(seed), ordered/new_ordered — по created_at.
+    new_* — anti-join с card_progress (карточки, которых пользователь ещё не касался).
+    Карточки без уровней пропускаются. after — (sort_key, card_id) из курсора.
+    """
+    if mode in RANDOM_MODES:
+        sort_key = shuffle_key(seed)
+    else:
+        sort_key = Card.created_at
+
+    stmt = (
+        select(Card.id, Card.deck_id, Card.title, Card.type, sort_key.label("sort_key"))
+        .where(
+            Card.deck_id == deck_id,
+            exists().where(CardLevel.card_id == Card.id),
+        )
+        .order_by(sort_key.asc(), Card.id.asc())
+    )
+    if mode in NEW_MODES:
+        # у карточки с прогрессом всегда есть активная строка — проверяем её,
+        # чтобы попасть в partial index uq_user_card_active_level
+        stmt = stmt.where(
+            ~exists().where(
+                CardProgress.user_id == user_id,
+                CardProgress.card_id == Card.id,
+                CardProgress.is_active == True,
+            )
+        )
+    if after is not None:
+        stmt = stmt.where(tuple_(sort_key, Card.id) > tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _sort_key_str(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def load_study_cards(
+    db: Session,
+    *,
+    user_id: UUID,
+    deck_id: UUID,
+    mode: str,
+    seed: int | None,
+    limit: int | None,
+    after: tuple[str | datetime, UUID] | None = None,
+) -> tuple[list, str | None]:
+    """Страница карточек и курсор следующей (limit + 1 строк, как в review_queue.split_page)."""
+    rows = db.execute(
+        study_cards_stmt(
+            user_id=user_id,
+            deck_id=deck_id,
+            mode=mode,
+            seed=seed,
+            limit=None if limit is None else limit + 1,
+            after=after,
+        )
+    ).all()
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_study_cursor(key=_sort_key_str(last.sort_key), card_id=last.id, seed=seed)
@@ -0,0 +1,99 @@
+"""
+Микро-бенчмарк сериализации горячих списков: CPU на ответ до/после fast_json.
+
+    python bench_json_responses.py --cards 200 --levels 5 --requests 200
+
+"before" — прежний путь: модели валидируются при сборке (CardForReviewWithLevels(**row)),
+FastAPI ещё раз валидирует их по response_model и сериализует.
+"after"  — dict-ы из строк БД + fast_json (pydantic-core, без моделей и валидации).
+Оба варианта идут через один и тот же ASGI-стек (TestClient), без БД.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.responses import fast_json
+from app.schemas.cards import CardForReviewWithLevels, CardLevelContent
+
+
+def make_rows(cards: int, levels: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(cards):
+        contents = [
+            {
+                "question": f"Question {i}.{l} " + "lorem ipsum " * 8,
+                "options": [{"id": str(o), "text": f"Option {o} " + "dolor " * 4} for o in range(1, 5)],
+                "correctOptionId": "2",
+                "explanation": "sit amet " * 10,
+                "timerSec": 30,
+            }
+            for l in range(levels)
+        ]
+        rows.append({
+            "card_id": uuid.uuid4(),
+            "deck_id": uuid.uuid4(),
+            "title": f"Card {i}",
+            "type": "multiple_choice",
+            "card_level_id": uuid.uuid4(),
+            "level_index": 0,
+            "content": contents[0],
+            "stability": 2.5,
+            "difficulty": 5.0,
+            "next_review": now,
+            "levels": [{"level_index": l, "content": c} for l, c in enumerate(contents)],
+        })
+    return rows
+
+
+def build_app(rows: list[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before", response_model=list[CardForReviewWithLevels])
+    def before():
+        return [
+            CardForReviewWithLevels(
+                **{k: v for k, v in r.items() if k != "levels"},
+                levels=[CardLevelContent(**l) for l in r["levels"]],
+            )
+            for r in rows
+        ]
+
+    @app.get("/after", response_model=list[CardForReviewWithLevels])
+    def after():
+        return fast_json([
+            {**r, "levels": [{"level_index": l["level_index"], "content": l["content"]} for l in r["levels"]]}
+            for r in rows
+        ])
+
+    return app
+
+
+def measure(client: TestClient, path: str, requests: int) -> tuple[float, int]:
+    client.get(path)  # прогрев
+    started = time.process_time()
+    for _ in range(requests):
+        resp = client.get(path)
+    elapsed = time.process_time() - started
+    return elapsed / requests * 1000, len(resp.content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU на сериализацию ответа: response_model vs fast_json")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--levels", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(make_rows(args.cards, args.levels)))
+    before_ms, size = measure(client, "/before", args.requests)
+    after_ms, size_after = measure(client, "/after", args.requests)
+    assert client.get("/before").json() == client.get("/after").json()
+
+    print(f"{args.cards} карточек x {args.levels} уровней, ответ ~{size // 1024} KiB")
+    print(f"before (response_model):  {before_ms:7.2f} ms CPU / ответ")
+    print(f"after  (fast_json):       {after_ms:7.2f} ms CPU / ответ  (x{before_ms / after_ms:.1f})")
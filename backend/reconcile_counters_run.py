@@ -0,0 +1,27 @@
+import argparse
+import logging
+import time
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.services.deck_counters import reconcile_deck_counters, reconcile_deck_totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Сверка счётчиков колод (new/learning/due с card_progress, card_count/subscriber_count)"
+    )
+    parser.add_argument("--user-id", type=UUID, default=None, help="только прогресс этого пользователя, без колод")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--interval", type=int, default=0, help="повторять каждые N секунд (0 — один проход)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        stats = reconcile_deck_counters(SessionLocal, user_id=args.user_id, chunk_size=args.chunk_size)
+        print(f"Готово: пользователей {stats.users}, исправлено строк state {stats.state_fixed}, корзин {stats.buckets_fixed}")
+        if args.user_id is None:
+            totals = reconcile_deck_totals(SessionLocal, chunk_size=args.chunk_size)
+            print(f"Колоды: {totals.decks}, исправлено счётчиков {totals.decks_fixed}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,22 @@
+import argparse
+import logging
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.services.bulk_reschedule import reschedule_progress
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт stability/next_review по истории ответов")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stats = reschedule_progress(
+        SessionLocal,
+        user_id=args.user_id,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+    )
+    print(f"Готово: чанков {stats.chunks}, строк {stats.rows_seen}, обновлено {stats.rows_updated}")
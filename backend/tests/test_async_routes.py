@@ -0,0 +1,102 @@
+"""async_router (DB_ASYNC=true) должен повторять контракт sync-эндпоинтов."""
+import pytest
+from fastapi.routing import APIRoute
+
+from app.api.routes import cards, decks
+
+
+def _routes(router):
+    return {
+        (r.path, frozenset(r.methods)): r
+        for r in router.routes
+        if isinstance(r, APIRoute)
+    }
+
+
+@pytest.mark.parametrize("module", [cards, decks])
+def test_async_routes_have_sync_twin(module):
+    sync_routes = _routes(module.router)
+    async_routes = _routes(module.async_router)
+    assert async_routes
+
+    for key, route in async_routes.items():
+        assert key in sync_routes, key
+        twin = sync_routes[key]
+        assert route.response_model == twin.response_model
+        assert {p.name for p in route.dependant.query_params} == {p.name for p in twin.dependant.query_params}
+
+
+class TestAsyncStackPayloads:
+    """Горячие эндпоинты через asyncpg/AsyncSession.run_sync отдают то же, что sync-путь."""
+
+    def _async_client(self, monkeypatch):
+        from fastapi import APIRouter, FastAPI
+        from fastapi.testclient import TestClient
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        from app.db import session as db_session
+
+        engine = db_session.make_async_engine()
+        monkeypatch.setattr(
+            db_session,
+            "AsyncSessionLocal",
+            async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False),
+        )
+        app = FastAPI()
+        api = APIRouter(prefix="/api")
+        api.include_router(cards.async_router, prefix="/cards")
+        api.include_router(decks.async_router, prefix="/decks")
+        app.include_router(api)
+        return engine, TestClient(app)
+
+    def test_async_routes_match_sync(self, client, auth_headers, db, test_deck, monkeypatch):
+        card_ids = []
+        for title in ("A", "B"):
+            r = client.post(
+                "/api/cards/",
+                headers=auth_headers,
+                json={
+                    "deck_id": str(test_deck.id),
+                    "title": title,
+                    "type": "flashcard",
+                    "levels": [{"question": "Q0", "answer": "A0"}, {"question": "Q1", "answer": "A1"}],
+                },
+            )
+            assert r.status_code == 201, r.text
+            card_ids.append(r.json()["card_id"])
+
+        engine, async_client = self._async_client(monkeypatch)
+        with async_client:
+            try:
+                self._compare(client, async_client, auth_headers, db, test_deck, card_ids)
+            finally:
+                # asyncpg-соединения привязаны к event loop клиента — закрываем в нём же
+                async_client.portal.call(engine.dispose)
+
+    def _compare(self, client, async_client, auth_headers, db, test_deck, card_ids):
+        from datetime import datetime, timedelta, timezone
+        from sqlalchemy import update
+        from app.models.card_progress import CardProgress
+
+        # запись через AsyncSession.run_sync(_submit_review) и через sync-роут
+        r_async = async_client.post(f"/api/cards/{card_ids[0]}/review", headers=auth_headers, json={"rating": "good"})
+        r_sync = client.post(f"/api/cards/{card_ids[1]}/review", headers=auth_headers, json={"rating": "good"})
+        assert r_async.status_code == r_sync.status_code == 200, (r_async.text, r_sync.text)
+        assert r_async.json().keys() == r_sync.json().keys()
+
+        db.execute(
+            update(CardProgress).values(next_review=datetime.now(timezone.utc) - timedelta(hours=1))
+        )
+        db.commit()
+
+        for path in (
+            "/api/cards/review",
+            "/api/cards/review_with_levels",
+            "/api/cards/review/page?limit=1",
+            f"/api/decks/{test_deck.id}/session",
+        ):
+            sync_resp = client.get(path, headers=auth_headers)
+            async_resp = async_client.get(path, headers=auth_headers)
+            assert sync_resp.status_code == async_resp.status_code == 200, (path, async_resp.text)
+            assert async_resp.json() == sync_resp.json(), path
+        assert len(client.get("/api/cards/review", headers=auth_headers).json()) == 2
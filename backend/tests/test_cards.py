@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timezone, timedelta
 
 from starlette.testclient import TestClient
@@ -11,6 +12,7 @@ from app.core.enums import ReviewRating
 from app.domain.review.policy import ReviewPolicy
 from app.domain.review.dto import LearningSettingsSnapshot
 from app.domain.review.entities import CardLevelProgressState
+from app.services.review_queue import encode_cursor, decode_cursor
 
 
 class TestLevelUp:
@@ -128,6 +130,218 @@ class TestReviewCard:
         assert h is not None
         assert h.card_level_id == active.card_level_id
 
+    def test_review_card_updates_active_level(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=2)
+        db.add(card)
+        db.flush()
+        lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": "Q0", "answer": "A0"})
+        lvl1 = CardLevel(card_id=card.id, level_index=1, content={"question": "Q1", "answer": "A1"})
+        db.add_all([lvl0, lvl1])
+        db.commit()
+
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        assert client.post(f"/api/cards/{card.id}/level_up", headers=headers).status_code == 200
+
+        first = client.post(f"/api/cards/{card.id}/review", headers=headers, json={"rating": "good"})
+        second = client.post(f"/api/cards/{card.id}/review", headers=headers, json={"rating": "good"})
+        assert first.status_code == 200, first.text
+        assert second.status_code == 200, second.text
+
+        data = second.json()
+        assert data["level_index"] == 1
+        assert data["card_level_id"] == str(lvl1.id)
+        assert data["stability"] == first.json()["stability"] * 1.15
+
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_level_id=lvl1.id).count() == 2
+
+    def test_review_card_not_found(self, client: TestClient, auth_token: str):
+        response = client.post(
+            f"/api/cards/{uuid.uuid4()}/review",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"rating": "good"},
+        )
+        assert response.status_code == 404, response.text
+
+
+class TestReviewBatch:
+    """POST /api/cards/reviews:batch"""
+
+    def test_batch_applies_in_one_request(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=1)
+        db.add(card)
+        db.flush()
+        lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": "Q", "answer": "A"})
+        db.add(lvl0)
+        db.commit()
+
+        t0 = datetime.now(timezone.utc) - timedelta(hours=2)
+        missing_id = uuid.uuid4()
+        resp = client.post(
+            "/api/cards/reviews:batch",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={
+                "items": [
+                    # второй ответ по времени идёт первым в списке — применяться должен вторым
+                    {"card_id": str(card.id), "rating": "good", "answered_at": (t0 + timedelta(hours=1)).isoformat()},
+                    {"card_id": str(card.id), "rating": "easy", "answered_at": t0.isoformat()},
+                    {"card_id": str(missing_id), "rating": "good"},
+                ]
+            },
+        )
+        assert resp.status_code == 200, resp.text
+        results = resp.json()["results"]
+        assert [r["ok"] for r in results] == [True, True, False]
+        assert results[2]["error"] == "Card not found"
+        assert results[0]["stability"] == 1.0 * 1.35 * 1.15
+
+        active = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one()
+        assert active.stability == results[0]["stability"]
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_id=card.id).count() == 2
+
+    def test_batch_survives_concurrent_progress_insert(
+        self, client: TestClient, auth_token: str, db, test_user, test_deck, monkeypatch
+    ):
+        from app.services import review_writes
+
+        card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=1)
+        db.add(card)
+        db.flush()
+        lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": "Q", "answer": "A"})
+        db.add(lvl0)
+        db.flush()
+        now = datetime.now(timezone.utc)
+        # прогресс, который «параллельный» запрос вставил между SELECT ... FOR UPDATE и INSERT
+        db.add(CardProgress(
+            user_id=test_user.id, card_id=card.id, card_level_id=lvl0.id, is_active=True,
+            stability=4.0, difficulty=5.0, last_reviewed=now - timedelta(days=4), next_review=now,
+        ))
+        db.commit()
+
+        lock = review_writes._lock_active_progress
+        calls = []
+
+        def racy_lock(db, **kwargs):
+            calls.append(kwargs["card_ids"])
+            return {} if len(calls) == 1 else lock(db, **kwargs)
+
+        monkeypatch.setattr(review_writes, "_lock_active_progress", racy_lock)
+
+        resp = client.post(
+            "/api/cards/reviews:batch",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"items": [{"card_id": str(card.id), "rating": "good"}]},
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["results"][0]["ok"] is True
+        assert len(calls) == 2  # INSERT проиграл гонку, строку перечитали под блокировку
+
+        db.expire_all()
+        active = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one()
+        assert active.stability == 4.0 * 1.15
+        assert active.stability == resp.json()["results"][0]["stability"]
+
+    def test_batch_rejects_empty(self, client: TestClient, auth_token: str):
+        resp = client.post(
+            "/api/cards/reviews:batch",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"items": []},
+        )
+        assert resp.status_code == 422, resp.text
+
+
+class TestReviewSync:
+    """POST /api/cards/reviews:sync + client_review_id в /review"""
+
+    def _card(self, db, test_deck) -> Card:
+        card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=1)
+        db.add(card)
+        db.flush()
+        db.add(CardLevel(card_id=card.id, level_index=0, content={"question": "Q", "answer": "A"}))
+        db.commit()
+        return card
+
+    def test_sync_replay_is_idempotent(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        card = self._card(db, test_deck)
+        t0 = datetime.now(timezone.utc) - timedelta(days=1)
+        items = [
+            {"client_review_id": str(uuid.uuid4()), "card_id": str(card.id), "rating": "good",
+             "reviewed_at": (t0 + timedelta(hours=2)).isoformat()},
+            {"client_review_id": str(uuid.uuid4()), "card_id": str(card.id), "rating": "hard",
+             "reviewed_at": t0.isoformat()},
+        ]
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        first = client.post("/api/cards/reviews:sync", headers=headers, json={"items": items})
+        assert first.status_code == 200, first.text
+        assert [r["duplicate"] for r in first.json()["results"]] == [False, False]
+        stability = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one().stability
+        # hard (раньше по времени), затем good
+        assert stability == 1.0 * 0.85 * 1.15
+
+        # ретрай того же payload: ничего не меняется
+        again = client.post("/api/cards/reviews:sync", headers=headers, json={"items": items})
+        assert again.status_code == 200, again.text
+        assert [r["duplicate"] for r in again.json()["results"]] == [True, True]
+
+        db.expire_all()
+        progress = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one()
+        assert progress.stability == stability
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_id=card.id).count() == 2
+
+    def test_sync_rejects_review_older_than_stored_state(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        card = self._card(db, test_deck)
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        # онлайн-ответ уже применён сейчас, офлайн-ответ из очереди — вчерашний
+        assert client.post(f"/api/cards/{card.id}/review", headers=headers, json={"rating": "good"}).status_code == 200
+        db.expire_all()
+        before = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one()
+        state = (before.stability, before.last_reviewed, before.next_review)
+
+        stale = {"client_review_id": str(uuid.uuid4()), "card_id": str(card.id), "rating": "easy",
+                 "reviewed_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()}
+        r = client.post("/api/cards/reviews:sync", headers=headers, json={"items": [stale]})
+        assert r.status_code == 200, r.text
+        result = r.json()["results"][0]
+        assert (result["ok"], result["error"]) == (False, "Stale review")
+
+        db.expire_all()
+        after = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).one()
+        assert (after.stability, after.last_reviewed, after.next_review) == state
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_id=card.id).count() == 1
+
+    def test_review_card_retry_not_applied_twice(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        card = self._card(db, test_deck)
+        body = {"rating": "easy", "client_review_id": str(uuid.uuid4())}
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        r1 = client.post(f"/api/cards/{card.id}/review", headers=headers, json=body)
+        r2 = client.post(f"/api/cards/{card.id}/review", headers=headers, json=body)
+        assert r1.status_code == 200, r1.text
+        assert r2.status_code == 200, r2.text
+        assert r1.json()["stability"] == r2.json()["stability"]
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_id=card.id).count() == 1
+
+
+    def test_review_id_reused_on_other_card_conflicts(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        first, second = self._card(db, test_deck), self._card(db, test_deck)
+        body = {"rating": "good", "client_review_id": str(uuid.uuid4())}
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        assert client.post(f"/api/cards/{first.id}/review", headers=headers, json=body).status_code == 200
+        r = client.post(f"/api/cards/{second.id}/review", headers=headers, json=body)
+        assert r.status_code == 409, r.text
+        assert db.query(CardReviewHistory).filter_by(user_id=test_user.id, card_id=second.id).count() == 0
+
+    def test_review_retry_after_progress_reset_conflicts(self, client: TestClient, auth_token: str, db, test_deck):
+        card = self._card(db, test_deck)
+        body = {"rating": "good", "client_review_id": str(uuid.uuid4())}
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        assert client.post(f"/api/cards/{card.id}/review", headers=headers, json=body).status_code == 200
+        assert client.delete(f"/api/cards/{card.id}/progress", headers=headers).status_code == 204
+        r = client.post(f"/api/cards/{card.id}/review", headers=headers, json=body)
+        assert r.status_code == 409, r.text
 
 class TestGetCardsForReview:
     """GET /api/cards/review"""
@@ -173,6 +387,115 @@ class TestGetCardsForReview:
         assert data[0]["title"] == "Card"
         assert data[0]["level_index"] == 0
 
+    def test_get_cards_for_review_orders_by_next_review(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        now = datetime.now(timezone.utc)
+
+        # (title, next_review, is_active): в очередь попадают только активные и уже due
+        specs = [
+            ("Later", now - timedelta(minutes=1), True),
+            ("Earlier", now - timedelta(hours=1), True),
+            ("Future", now + timedelta(days=1), True),
+            ("Inactive", now - timedelta(days=1), False),
+        ]
+        for title, next_review, is_active in specs:
+            card = Card(deck_id=test_deck.id, title=title, type="text", max_level=1)
+            db.add(card)
+            db.flush()
+            lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": title, "answer": "A"})
+            db.add(lvl0)
+            db.flush()
+            db.add(
+                CardProgress(
+                    user_id=test_user.id,
+                    card_id=card.id,
+                    card_level_id=lvl0.id,
+                    is_active=is_active,
+                    stability=1.0,
+                    difficulty=5.0,
+                    last_reviewed=now,
+                    next_review=next_review,
+                )
+            )
+        db.commit()
+
+        response = client.get(
+            "/api/cards/review",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [c["title"] for c in data] == ["Earlier", "Later"]
+        assert data[0]["content"] == {"question": "Earlier", "answer": "A"}
+        assert data[0]["deck_id"] == str(test_deck.id)
+
+
+class TestReviewQueuePage:
+    """GET /api/cards/review/page"""
+
+    def test_pages_through_due_cards(self, client: TestClient, auth_token: str, db, test_user, test_deck):
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            card = Card(deck_id=test_deck.id, title=f"Card {i}", type="text", max_level=1)
+            db.add(card)
+            db.flush()
+            lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": f"Q{i}", "answer": "A"})
+            db.add(lvl0)
+            db.flush()
+            db.add(
+                CardProgress(
+                    user_id=test_user.id,
+                    card_id=card.id,
+                    card_level_id=lvl0.id,
+                    is_active=True,
+                    stability=1.0,
+                    difficulty=5.0,
+                    last_reviewed=now,
+                    # одинаковый next_review у пары карточек — порядок держит card_id
+                    next_review=now - timedelta(minutes=10 - (i // 2)),
+                )
+            )
+        db.commit()
+
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            resp = client.get("/api/cards/review/page", headers=headers, params=params)
+            assert resp.status_code == 200, resp.text
+            page = resp.json()
+            assert page["total_due"] == 5
+            seen.extend(item["card_id"] for item in page["items"])
+            pages += 1
+            if not page["has_more"]:
+                assert page["next_cursor"] is None
+                break
+            cursor = page["next_cursor"]
+
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_invalid_cursor(self, client: TestClient, auth_token: str):
+        resp = client.get(
+            "/api/cards/review/page",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            params={"cursor": "not-a-cursor"},
+        )
+        assert resp.status_code == 422, resp.text
+
+    def test_cursor_roundtrip(self):
+        now = datetime.now(timezone.utc)
+        card_id = uuid.uuid4()
+        assert decode_cursor(encode_cursor(now, card_id)) == (now, card_id)
+
+    def test_due_index_covers_cursor_order(self):
+        # ORDER BY / seek (next_review, card_id) идут по индексу целиком
+        index = next(i for i in CardProgress.__table__.indexes if i.name == "ix_card_progress_user_due_card")
+        assert [c.name for c in index.columns] == ["user_id", "next_review", "card_id"]
+
 
 class TestReviewWithLevels:
     """GET /api/cards/review_with_levels"""
@@ -119,3 +119,102 @@ def test_create_card_validation_title_empty(client):
         json=payload,
     )
     assert r.status_code == 422, r.text
+
+
+def test_create_cards_batch_keeps_input_order(client):
+    _, token = register_and_login(client)
+    deck_id = create_deck(client, token)
+
+    payload = {
+        "deck_id": deck_id,
+        "cards": [
+            {"title": f"Card {i}", "type": "flashcard", "levels": [{"question": f"q{i}", "answer": f"a{i}"}]}
+            for i in range(5)
+        ]
+        + [
+            {
+                "title": "MCQ",
+                "type": "multiple_choice",
+                "levels": [{"question": "q", "options": [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}], "correctOptionId": "b"}],
+            }
+        ],
+    }
+    r = client.post("/api/cards/batch", headers={"Authorization": f"Bearer {token}"}, json=payload)
+    assert r.status_code == 201, r.text
+    card_ids = r.json()["card_ids"]
+    assert len(card_ids) == 6
+
+    r2 = client.get(f"/api/decks/{deck_id}/cards", headers={"Authorization": f"Bearer {token}"})
+    assert r2.status_code == 200, r2.text
+    assert [c["card_id"] for c in r2.json()] == card_ids
+
+
+def test_create_cards_batch_validates_before_writing(client):
+    _, token = register_and_login(client)
+    deck_id = create_deck(client, token)
+
+    payload = {
+        "deck_id": deck_id,
+        "cards": [
+            {"title": "Ok", "type": "flashcard", "levels": [{"question": "q", "answer": "a"}]},
+            {"title": "Bad", "type": "flashcard", "levels": [{"question": "q"}]},
+        ],
+    }
+    r = client.post("/api/cards/batch", headers={"Authorization": f"Bearer {token}"}, json=payload)
+    assert r.status_code == 422, r.text
+    assert r.json()["detail"] == [{"index": 1, "error": "Level 1: answer is required for flashcard"}]
+
+    r2 = client.get(f"/api/decks/{deck_id}/cards", headers={"Authorization": f"Bearer {token}"})
+    assert r2.json() == []
+
+
+def test_create_cards_batch_forbidden_not_owner(client):
+    _, token1 = register_and_login(client)
+    deck_id = create_deck(client, token1)
+    _, token2 = register_and_login(client)
+
+    payload = {"deck_id": deck_id, "cards": [{"title": "C", "type": "flashcard", "levels": [{"question": "q", "answer": "a"}]}]}
+    r = client.post("/api/cards/batch", headers={"Authorization": f"Bearer {token2}"}, json=payload)
+    assert r.status_code == 403, r.text
+
+
+def test_replace_levels_stores_same_content_as_create(client):
+    _, token = register_and_login(client)
+    deck_id = create_deck(client, token)
+    headers = {"Authorization": f"Bearer {token}"}
+    mcq = {
+        "question": " 2+2? ",
+        "options": [{"id": "a", "text": "3"}, {"id": "b", "text": "4"}, {"id": "c", "text": " "}],
+        "correctOptionId": "b",
+        "explanation": "",
+        "timerSec": 0,
+    }
+
+    r = client.post("/api/cards/", headers=headers, json={"deck_id": deck_id, "title": "M", "type": "multiple_choice", "levels": [mcq]})
+    assert r.status_code == 201, r.text
+    card_id = r.json()["card_id"]
+    created = client.get(f"/api/decks/{deck_id}/cards", headers=headers).json()[0]["levels"][0]["content"]
+
+    # старый клиент без kind — тип определяется по ключам
+    r = client.put(f"/api/cards/{card_id}/levels", headers=headers, json={"levels": [{"level_index": 0, "content": mcq}]})
+    assert r.status_code == 200, r.text
+    assert r.json()["levels"][0]["content"] == created
+    assert created["explanation"] is None and created["timerSec"] is None
+
+    r = client.put(
+        f"/api/cards/{card_id}/levels",
+        headers=headers,
+        json={"levels": [{"level_index": 0, "content": {"kind": "unknown", "question": "q"}}]},
+    )
+    assert r.status_code == 422, r.text
+
+
+def test_level_content_engines_agree():
+    from app.schemas.cards import CreateCardLevelRequest, LevelIn
+    from app.services.card_content import level_content, typed_level_content
+
+    raw = {"question": "q", "options": [{"id": "1", "text": "x"}, {"id": "2", "text": "y"}], "correctOptionId": "2", "timerSec": 30}
+    via_create = level_content("multiple_choice", CreateCardLevelRequest.model_validate(raw), 0)
+    via_replace = typed_level_content(LevelIn.model_validate({"level_index": 0, "content": {"kind": "mcq", **raw}}).content, 0)
+    assert via_create == via_replace
+    assert via_create["timerSec"] == 30
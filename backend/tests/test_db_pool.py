@@ -0,0 +1,69 @@
+"""Пул с учётом ожидания checkout и настройки движка (без Postgres)."""
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+
+from app.db.pool import TimedQueuePool, pool_stats
+from app.db.session import engine, _connect_args
+
+
+def _pool(**kw):
+    return TimedQueuePool(lambda: sqlite3.connect(":memory:"), **kw)
+
+
+class TestTimedQueuePool:
+    def test_counts_checkouts(self):
+        pool = _pool(pool_size=2, max_overflow=0)
+        a = pool.connect()
+        b = pool.connect()
+        a.close()
+        b.close()
+
+        stats = pool_stats(pool)
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 0
+        assert stats["checked_out"] == 0
+        assert stats["checked_in"] == 2
+
+    def test_timeout_is_counted_and_logged(self, caplog):
+        pool = _pool(pool_size=1, max_overflow=0, timeout=0.05)
+        held = pool.connect()
+
+        with caplog.at_level("WARNING", logger="app.db.pool"):
+            with pytest.raises(exc.TimeoutError):
+                pool.connect()
+        held.close()
+
+        assert pool_stats(pool)["timeouts"] == 1
+        assert "timed out" in caplog.text
+
+    def test_slow_checkout_is_logged(self, caplog):
+        pool = _pool(pool_size=1, max_overflow=0)
+        pool.slow_checkout_seconds = 0.0
+
+        with caplog.at_level("WARNING", logger="app.db.pool"):
+            pool.connect().close()
+
+        assert pool_stats(pool)["slow_checkouts"] == 1
+        assert "waited" in caplog.text
+
+    def test_recreate_keeps_threshold(self):
+        pool = _pool(pool_size=1)
+        pool.slow_checkout_seconds = 0.5
+        assert pool.recreate().slow_checkout_seconds == 0.5
+
+
+class TestEngineSettings:
+    def test_engine_uses_timed_pool_without_echo(self):
+        assert isinstance(engine.pool, TimedQueuePool)
+        assert engine.echo is False
+
+    def test_connect_args(self):
+        sync_args = _connect_args("psycopg2")
+        assert sync_args["application_name"]
+        assert "statement_timeout" in sync_args["options"]
+
+        async_args = _connect_args("asyncpg")["server_settings"]
+        assert async_args["application_name"] == sync_args["application_name"]
+        assert "statement_timeout" in async_args
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.session import SessionLocal
+from app.models.card import Card
+from app.models.card_level import CardLevel
+from app.models.card_progress import CardProgress
+from app.models.deck import Deck
+from app.models.user_deck_state import UserDeckState
+from app.models.user_deck_due_bucket import UserDeckDueBucket
+from app.services.deck_counters import reconcile_deck_counters, reconcile_deck_totals
+from app.services.deck_queries import due_bucket_start
+
+
+def _add_cards(db, deck_id, n: int) -> list[Card]:
+    cards = []
+    for i in range(n):
+        card = Card(deck_id=deck_id, title=f"C{i}", type="flashcard", max_level=0)
+        db.add(card)
+        db.flush()
+        db.add(CardLevel(card_id=card.id, level_index=0, content={"question": "q", "answer": "a"}))
+        cards.append(card)
+    db.commit()
+    return cards
+
+
+def _deck_row(client: TestClient, auth_headers: dict, deck_id) -> dict:
+    resp = client.get("/api/decks/", headers=auth_headers)
+    assert resp.status_code == 200, resp.text
+    return next(d for d in resp.json() if d["deck_id"] == str(deck_id))
+
+
+class TestDeckCounters:
+    def test_counters_follow_review_and_delete(self, client: TestClient, auth_headers: dict, db, test_user, test_deck):
+        cards = _add_cards(db, test_deck.id, 3)
+
+        row = _deck_row(client, auth_headers, test_deck.id)
+        assert (row["card_count"], row["new_count"], row["learning_count"], row["due_count"]) == (3, 3, 0, 0)
+
+        resp = client.post(f"/api/cards/{cards[0].id}/review", headers=auth_headers, json={"rating": "again"})
+        assert resp.status_code == 200, resp.text
+
+        state = db.get(UserDeckState, (test_user.id, test_deck.id))
+        db.refresh(state)
+        assert state.started_count == 1
+        assert _deck_row(client, auth_headers, test_deck.id)["new_count"] == 2
+
+        # просроченный прогресс попадает в закрытую корзину
+        db.execute(
+            update(CardProgress)
+            .where(CardProgress.card_id == cards[0].id)
+            .values(next_review=datetime.now(timezone.utc) - timedelta(days=2), stability=0.5)
+        )
+        db.commit()
+        row = _deck_row(client, auth_headers, test_deck.id)
+        assert (row["learning_count"], row["due_count"]) == (1, 1)
+
+        # карточка ушла из корзины — пустых строк не остаётся
+        counts = [b.card_count for b in db.query(UserDeckDueBucket).filter_by(user_id=test_user.id)]
+        assert counts == [1]
+
+        resp = client.delete(f"/api/cards/{cards[0].id}", headers=auth_headers)
+        assert resp.status_code == 204, resp.text
+        row = _deck_row(client, auth_headers, test_deck.id)
+        assert (row["card_count"], row["new_count"], row["learning_count"], row["due_count"]) == (2, 2, 0, 0)
+
+    def test_group_summary_has_counters(self, client: TestClient, auth_headers: dict, db, user_group, test_deck):
+        _add_cards(db, test_deck.id, 2)
+        resp = client.get(f"/api/groups/{user_group.id}/decks/summary", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()[0]["card_count"] == 2
+        assert resp.json()[0]["new_count"] == 2
+
+    def test_reconcile_repairs_drift(self, db, test_user, test_deck):
+        cards = _add_cards(db, test_deck.id, 2)
+        level = db.query(CardLevel).filter(CardLevel.card_id == cards[0].id).one()
+        now = datetime.now(timezone.utc)
+        db.add(CardProgress(
+            user_id=test_user.id, card_id=cards[0].id, card_level_id=level.id, is_active=True,
+            stability=0.5, difficulty=5.0, last_reviewed=now, next_review=now - timedelta(hours=3),
+        ))
+        db.commit()
+
+        # портим счётчики в обход триггеров
+        db.execute(update(UserDeckState).values(started_count=7, learning_count=0))
+        db.execute(update(UserDeckDueBucket).values(card_count=0))
+        db.add(UserDeckDueBucket(
+            user_id=test_user.id, deck_id=test_deck.id, bucket_start=due_bucket_start(now + timedelta(days=1)), card_count=4,
+        ))
+        db.commit()
+
+        stats = reconcile_deck_counters(SessionLocal, user_id=test_user.id)
+        assert stats.users == 1
+        assert stats.state_fixed == 1
+        assert stats.buckets_fixed == 2
+
+        db.expire_all()
+        state = db.get(UserDeckState, (test_user.id, test_deck.id))
+        assert (state.started_count, state.learning_count) == (1, 1)
+        buckets = db.query(UserDeckDueBucket).filter(UserDeckDueBucket.user_id == test_user.id).all()
+        assert [(b.bucket_start, b.card_count) for b in buckets] == [(due_bucket_start(now - timedelta(hours=3)), 1)]
+
+        assert reconcile_deck_counters(SessionLocal, user_id=test_user.id).state_fixed == 0
+
+    def test_reconcile_repairs_deck_totals(self, db, test_deck):
+        _add_cards(db, test_deck.id, 2)
+        empty = Deck(owner_id=test_deck.owner_id, title="Empty", color="#000000", is_public=False)
+        db.add(empty)
+        db.commit()
+
+        # портим счётчики в обход триггеров, в том числе у колоды без карточек и подписчиков
+        db.execute(update(Deck).where(Deck.id == test_deck.id).values(card_count=9, subscriber_count=0))
+        db.execute(update(Deck).where(Deck.id == empty.id).values(card_count=3))
+        db.commit()
+
+        stats = reconcile_deck_totals(SessionLocal, chunk_size=1)
+        assert stats.decks >= 2
+        assert stats.decks_fixed == 3
+
+        db.expire_all()
+        assert (db.get(Deck, test_deck.id).card_count, db.get(Deck, test_deck.id).subscriber_count) == (2, 1)
+        assert db.get(Deck, empty.id).card_count == 0
+        assert reconcile_deck_totals(SessionLocal).decks_fixed == 0
+
+
+def test_due_bucket_start_floors_to_hour():
+    now = datetime(2026, 3, 1, 12, 59, 59, 999, tzinfo=timezone.utc)
+    assert due_bucket_start(now) == datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+    assert due_bucket_start(datetime(2026, 3, 1, 13, tzinfo=timezone.utc)) == datetime(2026, 3, 1, 13, tzinfo=timezone.utc)
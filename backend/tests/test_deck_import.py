@@ -0,0 +1,139 @@
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.card_content import CardValidationError
+from app.services.deck_import import iter_import_cards, parse_card
+from backend.tests.conftest import register_and_login
+
+CSV_BODY = (
+    "title,type,question,answer,options,correctOptionId\n"
+    "Capital,flashcard,France?,Paris,,\n"
+    ",flashcard,Germany?,Berlin,,\n"
+    "Pick,multiple_choice,2+2?,,3|4|5,2\n"
+    "Broken,flashcard,,no question,,\n"
+)
+
+
+class TestDeckImport:
+    def _import(self, client: TestClient, auth_headers: dict, deck_id, body: str, fmt: str):
+        return client.post(
+            f"/api/decks/{deck_id}/import?format={fmt}",
+            headers={**auth_headers, "Content-Type": "text/plain"},
+            content=body.encode("utf-8"),
+        )
+
+    def test_csv_import_inline(self, client: TestClient, auth_headers: dict, test_deck):
+        r = self._import(client, auth_headers, test_deck.id, CSV_BODY, "csv")
+        assert r.status_code == 200, r.text
+        job = r.json()
+        assert job["status"] == "done"
+        assert job["imported_cards"] == 2
+        assert job["error_count"] == 1
+        assert job["errors"] == [{"row": 5, "error": "Level 1: question is required"}]
+
+        cards = client.get(f"/api/decks/{test_deck.id}/cards", headers=auth_headers).json()
+        assert [c["title"] for c in cards] == ["Capital", "Pick"]
+        assert [l["content"]["answer"] for l in cards[0]["levels"]] == ["Paris", "Berlin"]
+        assert cards[1]["levels"][0]["content"]["correctOptionId"] == "2"
+
+    def test_jsonl_import_accepts_export_lines(self, client: TestClient, auth_headers: dict, test_deck):
+        lines = [
+            {"title": "A", "type": "flashcard", "levels": [{"question": "Q", "answer": "A"}]},
+            {"title": "B", "type": "flashcard", "levels": [{"level_index": 0, "content": {"question": "Q", "answer": "B"}}]},
+        ]
+        body = "\n".join(json.dumps(l) for l in lines) + "\nnot json\n"
+        r = self._import(client, auth_headers, test_deck.id, body, "jsonl")
+        assert r.status_code == 200, r.text
+        job = r.json()
+        assert job["imported_cards"] == 2
+        assert job["errors"] == [{"row": 3, "error": "Invalid JSON"}]
+
+        exported = client.get(f"/api/decks/{test_deck.id}/export", headers=auth_headers).text.splitlines()
+        assert [json.loads(l)["title"] for l in exported] == ["A", "B"]
+
+    def test_malformed_jsonl_row_is_reported_not_fatal(self, client: TestClient, auth_headers: dict, test_deck):
+        lines = [
+            {"title": "A", "type": "flashcard", "levels": [{"question": "Q", "answer": "A"}]},
+            {"title": 123, "type": "flashcard", "levels": [{"question": "Q", "answer": "A"}]},
+            {"title": "C", "type": "flashcard", "levels": [5]},
+            {"title": "D", "type": "flashcard", "levels": [{"question": "Q", "answer": "D"}]},
+        ]
+        body = "\n".join(json.dumps(l) for l in lines) + "\n"
+        r = self._import(client, auth_headers, test_deck.id, body, "jsonl")
+        assert r.status_code == 200, r.text
+        job = r.json()
+        assert job["status"] == "done"
+        assert job["imported_cards"] == 2
+        assert [e["row"] for e in job["errors"]] == [2, 3]
+        assert job["errors"][0]["error"] == "title must be a string"
+
+    def test_large_import_runs_in_background(self, client: TestClient, auth_headers: dict, test_deck, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_INLINE_MAX_BYTES", 16)
+        monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 1)
+
+        r = self._import(client, auth_headers, test_deck.id, CSV_BODY, "csv")
+        assert r.status_code == 202, r.text
+        job_id = r.json()["job_id"]
+
+        # TestClient выполняет background tasks до возврата ответа
+        status = client.get(f"/api/decks/{test_deck.id}/import/{job_id}", headers=auth_headers)
+        assert status.status_code == 200, status.text
+        assert status.json()["status"] == "done"
+        assert status.json()["imported_cards"] == 2
+
+    def test_bad_csv_header_fails_job(self, client: TestClient, auth_headers: dict, test_deck):
+        r = self._import(client, auth_headers, test_deck.id, "front,back\nQ,A\n", "csv")
+        assert r.status_code == 200, r.text
+        assert r.json()["status"] == "failed"
+        assert "header" in r.json()["error"]
+
+    def test_import_owner_only(self, client: TestClient, test_deck):
+        _, token = register_and_login(client)
+        r = self._import(client, {"Authorization": f"Bearer {token}"}, test_deck.id, CSV_BODY, "csv")
+        assert r.status_code == 403
+
+
+def test_parse_csv_groups_levels_by_title():
+    rows = list(iter_import_cards(io.StringIO(CSV_BODY), "csv"))
+    assert [r.row for r in rows] == [2, 4, 5]
+
+    title, card_type, contents = parse_card(rows[0].card)
+    assert (title, card_type) == ("Capital", "flashcard")
+    assert contents == [{"question": "France?", "answer": "Paris"}, {"question": "Germany?", "answer": "Berlin"}]
+
+    _, _, mcq = parse_card(rows[1].card)
+    assert [o["id"] for o in mcq[0]["options"]] == ["1", "2", "3"]
+
+    try:
+        parse_card(rows[2].card)
+    except CardValidationError as e:
+        assert str(e) == "Level 1: question is required"
+    else:
+        raise AssertionError("invalid card accepted")
+
+
+def test_parse_card_rejects_non_string_fields():
+    level = {"question": "Q", "answer": "A"}
+    for card in (
+        {"title": 123, "type": "flashcard", "levels": [level]},
+        {"title": "T", "type": ["flashcard"], "levels": [level]},
+        {"title": "T", "type": "flashcard", "levels": [["Q", "A"]]},
+        {"title": "T", "type": "flashcard", "levels": [{"question": {"text": "Q"}, "answer": "A"}]},
+    ):
+        try:
+            parse_card(card)
+        except CardValidationError:
+            pass
+        else:
+            raise AssertionError(f"invalid card accepted: {card}")
+
+
+def test_import_route_documents_inline_and_queued_responses():
+    from app.main import app
+
+    responses = app.openapi()["paths"]["/api/decks/{deck_id}/import"]["post"]["responses"]
+    for code in ("200", "202"):
+        assert responses[code]["content"]["application/json"]["schema"]["$ref"].endswith("/DeckImportJobOut")
@@ -21,6 +21,48 @@ class TestGetUserDecks:
         assert data[0]["title"] == "Test Deck"
         assert "deck_id" in data[0]
 
+    def test_list_decks_dedupes_orders_and_counts(self, client: TestClient, auth_headers: dict, db, test_user, user_group, test_deck):
+        from app.models.deck import Deck
+        from app.models.user_study_group import UserStudyGroup
+        from app.models.user_study_group_deck import UserStudyGroupDeck
+
+        first = Deck(owner_id=test_user.id, title="First", color="#000000", is_public=False)
+        db.add(first)
+        db.flush()
+        second_group = UserStudyGroup(user_id=test_user.id, title_override="Second")
+        db.add(second_group)
+        db.flush()
+
+        # test_deck (order 0) ещё и во второй группе; First — раньше всех
+        db.add(UserStudyGroupDeck(user_group_id=user_group.id, deck_id=first.id, order_index=5))
+        db.add(UserStudyGroupDeck(user_group_id=second_group.id, deck_id=first.id, order_index=-1))
+        db.add(UserStudyGroupDeck(user_group_id=second_group.id, deck_id=test_deck.id, order_index=3))
+
+        now = datetime.now(timezone.utc)
+        for i in range(2):
+            card = Card(deck_id=test_deck.id, title=f"C{i}", type="text", max_level=0)
+            db.add(card)
+            db.flush()
+            lvl = CardLevel(card_id=card.id, level_index=0, content={"question": "q", "answer": "a"})
+            db.add(lvl)
+            db.flush()
+            if i == 0:
+                db.add(CardProgress(
+                    user_id=test_user.id, card_id=card.id, card_level_id=lvl.id, is_active=True,
+                    stability=1.0, difficulty=5.0, last_reviewed=now, next_review=now,
+                ))
+        db.commit()
+
+        resp = client.get("/api/decks/", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+
+        assert [d["title"] for d in data] == ["First", "Test Deck"]
+        assert data[0]["card_count"] == 0 and data[0]["due_count"] == 0
+        assert data[1]["card_count"] == 2
+        assert data[1]["due_count"] == 1
+        assert int(resp.headers["X-DB-Queries"]) <= 6
+
 
 class TestCreateDeck:
     def test_create_deck_success(self, client: TestClient, auth_headers: dict):
@@ -64,6 +106,41 @@ class TestGetDeckCards:
         assert data[0]["title"] == "Card 1"
         assert len(data[0]["levels"]) == 2
 
+    def test_deck_with_cards_uses_constant_queries_and_ordered_levels(self, client: TestClient, auth_headers: dict, db, test_deck):
+        for i in range(10):
+            card = Card(deck_id=test_deck.id, title=f"Card {i}", type="text", max_level=2)
+            db.add(card)
+            db.flush()
+            # вставляем уровни в обратном порядке — ответ всё равно по level_index
+            for idx in (2, 0, 1):
+                db.add(CardLevel(card_id=card.id, level_index=idx, content={"question": f"Q{idx}", "answer": "A"}))
+        db.commit()
+
+        resp = client.get(f"/api/decks/{test_deck.id}", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        cards = resp.json()["cards"]
+        assert len(cards) == 10
+        assert all([l["level_index"] for l in c["levels"]] == [0, 1, 2] for c in cards)
+        assert int(resp.headers["X-DB-Queries"]) <= 5
+
+    def test_deck_cards_without_content(self, client: TestClient, auth_headers: dict, db, test_deck):
+        card = Card(deck_id=test_deck.id, title="Card 1", type="text", max_level=0)
+        db.add(card)
+        db.flush()
+        db.add(CardLevel(card_id=card.id, level_index=0, content={"question": "Q1", "answer": "A1"}))
+        db.commit()
+
+        resp = client.get(f"/api/decks/{test_deck.id}/cards?with_content=false", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()[0]["levels"] == [{"level_index": 0}]
+
+        resp = client.get(f"/api/decks/{test_deck.id}/with_cards?with_content=false", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["cards"][0]["levels"] == [{"level_index": 0}]
+
+        resp = client.get(f"/api/decks/{test_deck.id}/cards", headers=auth_headers)
+        assert resp.json()[0]["levels"] == [{"level_index": 0, "content": {"question": "Q1", "answer": "A1"}}]
+
 
 class TestGetDeckSession:
     def test_get_deck_session_success(self, client: TestClient, auth_headers: dict, db, test_deck, test_user):
@@ -94,13 +171,11 @@ class TestGetDeckSession:
         assert "active_card_level_id" in data[0]
         assert "active_level_index" in data[0]
 
-        # прогресс должен быть создан для обеих карточек
-        p1 = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card1.id, is_active=True).first()
-        p2 = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card2.id, is_active=True).first()
-        assert p1 is not None
-        assert p2 is not None
+        # новые карточки — виртуально на уровне 0
+        assert data[0]["active_card_level_id"] == str(lvl1.id)
+        assert data[0]["active_level_index"] == 0
 
-    def test_get_deck_session_creates_progress(self, client: TestClient, auth_headers: dict, db, test_deck, test_user):
+    def test_get_deck_session_does_not_create_progress(self, client: TestClient, auth_headers: dict, db, test_deck, test_user):
         card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=1)
         db.add(card)
         db.flush()
@@ -109,16 +184,38 @@ class TestGetDeckSession:
         db.add(lvl0)
         db.commit()
 
-        before = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).first()
-        assert before is None
-
         resp = client.get(f"/api/decks/{test_deck.id}/session", headers=auth_headers)
         assert resp.status_code == 200, resp.text
+        assert resp.json()[0]["active_card_level_id"] == str(lvl0.id)
+
+        db.expire_all()
+        assert db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id).count() == 0
 
+        # прогресс появляется только при первом ответе
+        resp = client.post(f"/api/cards/{card.id}/review", headers=auth_headers, json={"rating": "good"})
+        assert resp.status_code == 200, resp.text
         after = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card.id, is_active=True).first()
         assert after is not None
         assert after.card_level_id == lvl0.id
 
+    def test_get_deck_session_reports_active_level(self, client: TestClient, auth_headers: dict, db, test_deck, test_user):
+        card = Card(deck_id=test_deck.id, title="Card", type="text", max_level=2)
+        db.add(card)
+        db.flush()
+        lvl0 = CardLevel(card_id=card.id, level_index=0, content={"question": "Q0", "answer": "A0"})
+        lvl1 = CardLevel(card_id=card.id, level_index=1, content={"question": "Q1", "answer": "A1"})
+        db.add_all([lvl0, lvl1])
+        db.commit()
+
+        resp = client.post(f"/api/cards/{card.id}/level_up", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+
+        resp = client.get(f"/api/decks/{test_deck.id}/session", headers=auth_headers)
+        assert resp.status_code == 200, resp.text
+        item = resp.json()[0]
+        assert item["active_level_index"] == 1
+        assert item["active_card_level_id"] == str(lvl1.id)
+
     def test_review_uses_user_initial_stability(self, client: TestClient, auth_headers: dict, db, test_deck, test_user):
         # задаём кастомные initial_* и проверяем, что они реально используются при первом review
         s = db.query(UserLearningSettings).filter_by(user_id=test_user.id).first()
@@ -148,3 +245,324 @@ class TestGetDeckSession:
         assert float(data["stability"]) == 2.0 * 1.15
         assert data["next_review"]  # просто наличие
         assert datetime.fromisoformat(data["next_review"]).replace(tzinfo=timezone.utc) > now
+
+
+class TestPublicDeckSearch:
+    def _deck(self, db, owner, title, description=None, is_public=True):
+        from app.models.deck import Deck
+        deck = Deck(owner_id=owner.id, title=title, description=description, color="#000000", is_public=is_public)
+        db.add(deck)
+        db.flush()
+        return deck
+
+    def test_prefix_match_on_title_and_description(self, client: TestClient, db, test_user):
+        self._deck(db, test_user, "English irregular verbs")
+        self._deck(db, test_user, "Biology", description="Cells and english terms")
+        self._deck(db, test_user, "Private english", is_public=False)
+        db.commit()
+
+        resp = client.get("/api/decks/public/search", params={"q": "engl"})
+        assert resp.status_code == 200, resp.text
+        titles = [i["title"] for i in resp.json()["items"]]
+        # совпадение в title весомее, чем в description
+        assert titles == ["English irregular verbs", "Biology"]
+
+    def test_typo_in_description_word(self, client: TestClient, db, test_user):
+        self._deck(db, test_user, "Biology", description="Cells and photosynthesis")
+        db.commit()
+
+        resp = client.get("/api/decks/public/search", params={"q": "photosyntesis"})
+        assert [i["title"] for i in resp.json()["items"]] == ["Biology"]
+
+    def test_query_without_words_finds_nothing(self, client: TestClient, db, test_user):
+        self._deck(db, test_user, "Biology")
+        db.commit()
+
+        resp = client.get("/api/decks/public/search", params={"q": "!!!"})
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {"items": [], "next_cursor": None}
+
+    def test_keyset_pages_do_not_overlap(self, client: TestClient, db, test_user):
+        for i in range(5):
+            self._deck(db, test_user, f"Deck {i}")
+        db.commit()
+
+        first = client.get("/api/decks/public/search", params={"limit": 3}).json()
+        assert len(first["items"]) == 3 and first["next_cursor"]
+        second = client.get("/api/decks/public/search", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+        assert second["next_cursor"] is None
+
+        ids = [i["deck_id"] for i in first["items"] + second["items"]]
+        assert len(ids) == len(set(ids)) == 5
+
+    def test_counters_are_maintained(self, client: TestClient, db, test_deck):
+        for i in range(3):
+            db.add(Card(deck_id=test_deck.id, title=f"C{i}", type="text", max_level=0))
+        db.commit()
+
+        item = client.get("/api/decks/public/search").json()["items"][0]
+        assert item["card_count"] == 3
+        assert item["subscriber_count"] == 1
+
+    def test_invalid_cursor(self, client: TestClient):
+        assert client.get("/api/decks/public/search", params={"cursor": "???"}).status_code == 422
+
+
+def test_prefix_tsquery_keeps_only_word_tokens():
+    from app.services.deck_search import prefix_tsquery, encode_search_cursor, decode_search_cursor
+    import uuid
+
+    assert prefix_tsquery("Англ  сло!") == "англ:* & сло:*"
+    assert prefix_tsquery("a & b | !c:*") == "a:* & b:* & c:*"
+    assert prefix_tsquery("&&&") is None
+
+    deck_id = uuid.uuid4()
+    assert decode_search_cursor(encode_search_cursor(0.1234, deck_id)) == (0.1234, deck_id)
+
+
+class TestDeckEtag:
+    def _create_card(self, client: TestClient, auth_headers: dict, deck_id, title="Card"):
+        r = client.post(
+            "/api/cards/",
+            headers=auth_headers,
+            json={
+                "deck_id": str(deck_id),
+                "title": title,
+                "type": "flashcard",
+                "levels": [{"question": "Q0", "answer": "A0"}, {"question": "Q1", "answer": "A1"}],
+            },
+        )
+        assert r.status_code == 201, r.text
+        return r.json()["card_id"]
+
+    def test_not_modified_until_deck_changes(self, client: TestClient, auth_headers: dict, test_deck):
+        self._create_card(client, auth_headers, test_deck.id)
+        url = f"/api/decks/{test_deck.id}/with_cards"
+
+        first = client.get(url, headers=auth_headers)
+        assert first.status_code == 200, first.text
+        etag = first.headers["ETag"]
+
+        cached = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert int(cached.headers["X-DB-Queries"]) == 1
+
+        self._create_card(client, auth_headers, test_deck.id, title="Another")
+        changed = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert len(changed.json()["cards"]) == 2
+
+    def test_study_cards_etag_follows_progress(self, client: TestClient, auth_headers: dict, test_deck):
+        card_id = self._create_card(client, auth_headers, test_deck.id)
+        url = f"/api/decks/{test_deck.id}/study-cards?mode=ordered"
+
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+        assert client.post(f"/api/cards/{card_id}/level_up", headers=auth_headers).status_code == 200
+        after = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.json()["cards"][0]["activeLevel"] == 1
+
+    def test_random_without_seed_is_not_cached(self, client: TestClient, auth_headers: dict, test_deck):
+        self._create_card(client, auth_headers, test_deck.id)
+        r = client.get(f"/api/decks/{test_deck.id}/study-cards?mode=random", headers=auth_headers)
+        assert r.status_code == 200
+        assert "ETag" not in r.headers
+
+
+class TestStudyCardsPaging:
+    def _create_cards(self, client: TestClient, auth_headers: dict, deck_id, n: int) -> list[str]:
+        ids = []
+        for i in range(n):
+            r = client.post(
+                "/api/cards/",
+                headers=auth_headers,
+                json={"deck_id": str(deck_id), "title": f"Card {i}", "type": "flashcard", "levels": [{"question": "Q", "answer": "A"}]},
+            )
+            assert r.status_code == 201, r.text
+            ids.append(r.json()["card_id"])
+        return ids
+
+    def _walk(self, client: TestClient, auth_headers: dict, url: str) -> list[str]:
+        seen, cursor = [], None
+        while True:
+            r = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=auth_headers)
+            assert r.status_code == 200, r.text
+            body = r.json()
+            seen += [c["id"] for c in body["cards"]]
+            cursor = body["nextCursor"]
+            if cursor is None:
+                return seen
+
+    def test_seeded_random_pages_cover_deck_once(self, client: TestClient, auth_headers: dict, test_deck):
+        ids = self._create_cards(client, auth_headers, test_deck.id, 7)
+        url = f"/api/decks/{test_deck.id}/study-cards?mode=random&seed=42&limit=3"
+
+        first = self._walk(client, auth_headers, url)
+        assert sorted(first) == sorted(ids)
+        # тот же seed — тот же порядок
+        assert self._walk(client, auth_headers, url) == first
+
+    def test_random_without_seed_returns_seed(self, client: TestClient, auth_headers: dict, test_deck):
+        self._create_cards(client, auth_headers, test_deck.id, 3)
+        r = client.get(f"/api/decks/{test_deck.id}/study-cards?mode=random&limit=2", headers=auth_headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert isinstance(body["seed"], int)
+        assert body["nextCursor"] is not None
+
+        rest = client.get(
+            f"/api/decks/{test_deck.id}/study-cards?mode=random&limit=2&seed={body['seed']}&cursor={body['nextCursor']}",
+            headers=auth_headers,
+        )
+        assert rest.status_code == 200, rest.text
+        assert len(rest.json()["cards"]) == 1
+
+    def test_new_modes_skip_studied_cards(self, client: TestClient, auth_headers: dict, test_deck):
+        ids = self._create_cards(client, auth_headers, test_deck.id, 3)
+        r = client.post(f"/api/cards/{ids[1]}/review", headers=auth_headers, json={"rating": "good"})
+        assert r.status_code == 200, r.text
+
+        ordered = client.get(f"/api/decks/{test_deck.id}/study-cards?mode=new_ordered", headers=auth_headers).json()
+        assert [c["id"] for c in ordered["cards"]] == [ids[0], ids[2]]
+
+        shuffled = client.get(f"/api/decks/{test_deck.id}/study-cards?mode=new_random&seed=1", headers=auth_headers).json()
+        assert sorted(c["id"] for c in shuffled["cards"]) == sorted([ids[0], ids[2]])
+
+    def test_cursor_from_other_seed_is_rejected(self, client: TestClient, auth_headers: dict, test_deck):
+        self._create_cards(client, auth_headers, test_deck.id, 3)
+        body = client.get(f"/api/decks/{test_deck.id}/study-cards?mode=random&seed=1&limit=1", headers=auth_headers).json()
+        r = client.get(
+            f"/api/decks/{test_deck.id}/study-cards?mode=random&seed=2&limit=1&cursor={body['nextCursor']}",
+            headers=auth_headers,
+        )
+        assert r.status_code == 422
+
+
+def test_study_cursor_roundtrip_and_seed_check():
+    from uuid import uuid4
+    from app.services.study_cards import encode_study_cursor, decode_study_cursor
+
+    card_id = uuid4()
+    cursor = encode_study_cursor(key="0f3a", card_id=card_id, seed=7)
+    assert decode_study_cursor(cursor, mode="random", seed=7) == ("0f3a", card_id)
+    for bad_seed in (8, None):
+        try:
+            decode_study_cursor(cursor, mode="random", seed=bad_seed)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("cursor accepted for another seed")
+
+
+class TestDeckExport:
+    def _create_card(self, client: TestClient, auth_headers: dict, deck_id, title: str):
+        r = client.post(
+            "/api/cards/",
+            headers=auth_headers,
+            json={
+                "deck_id": str(deck_id),
+                "title": title,
+                "type": "flashcard",
+                "levels": [{"question": "Q0", "answer": "A0"}, {"question": "Q1", "answer": "A1"}],
+            },
+        )
+        assert r.status_code == 201, r.text
+        return r.json()["card_id"]
+
+    def test_export_streams_one_card_per_line(self, client: TestClient, auth_headers: dict, test_deck):
+        import json
+
+        ids = [self._create_card(client, auth_headers, test_deck.id, t) for t in ("A", "B")]
+        r = client.get(f"/api/decks/{test_deck.id}/export", headers={**auth_headers, "Accept-Encoding": "identity"})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        assert "content-encoding" not in r.headers
+
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert [c["card_id"] for c in lines] == ids
+        assert [l["level_index"] for l in lines[0]["levels"]] == [0, 1]
+
+    def test_export_gzip(self, client: TestClient, auth_headers: dict, test_deck):
+        self._create_card(client, auth_headers, test_deck.id, "A")
+        r = client.get(f"/api/decks/{test_deck.id}/export", headers={**auth_headers, "Accept-Encoding": "gzip"})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-encoding"] == "gzip"
+        # httpx распаковывает сам
+        assert r.text.count("\n") == 1
+
+    def test_export_unknown_deck(self, client: TestClient, auth_headers: dict):
+        from uuid import uuid4
+
+        r = client.get(f"/api/decks/{uuid4()}/export", headers=auth_headers)
+        assert r.status_code == 404
+
+
+def test_gzip_chunks_roundtrip():
+    import gzip
+    import os
+    from app.services.deck_export import gzip_chunks
+
+    lines = [os.urandom(32).hex().encode() + b"\n" for _ in range(5000)]
+    out = list(gzip_chunks(iter(lines), min_chunk=1024))
+    assert len(out) > 1
+    assert gzip.decompress(b"".join(out)) == b"".join(lines)
+
+
+class TestDeckStats:
+    def _create_card(self, client: TestClient, auth_headers: dict, deck_id, title: str):
+        r = client.post(
+            "/api/cards/",
+            headers=auth_headers,
+            json={
+                "deck_id": str(deck_id),
+                "title": title,
+                "type": "flashcard",
+                "levels": [{"question": "Q0", "answer": "A0"}, {"question": "Q1", "answer": "A1"}],
+            },
+        )
+        assert r.status_code == 201, r.text
+        return r.json()["card_id"]
+
+    def test_stats_of_new_deck(self, client: TestClient, auth_headers: dict, test_deck):
+        for t in ("A", "B"):
+            self._create_card(client, auth_headers, test_deck.id, t)
+
+        r = client.get(f"/api/decks/{test_deck.id}/stats", headers=auth_headers)
+        assert r.status_code == 200, r.text
+        stats = r.json()
+        assert stats["card_count"] == 2
+        assert stats["level_distribution"] == [{"level_index": 0, "cards": 2}]
+        assert stats["avg_stability"] is None
+        assert (stats["due_today"], stats["overdue"], stats["mature"], stats["reviews_30d"]) == (0, 0, 0, 0)
+
+    def test_stats_follow_reviews_and_level_up(self, client: TestClient, auth_headers: dict, test_deck):
+        a, b = [self._create_card(client, auth_headers, test_deck.id, t) for t in ("A", "B")]
+        url = f"/api/decks/{test_deck.id}/stats"
+        assert client.get(url, headers=auth_headers).json()["reviews_7d"] == 0  # попадает в кэш
+
+        r = client.post(f"/api/cards/{a}/review", headers=auth_headers, json={"rating": "good"})
+        assert r.status_code == 200, r.text
+        stats = client.get(url, headers=auth_headers).json()
+        assert (stats["reviews_7d"], stats["reviews_30d"]) == (1, 1)
+        assert stats["avg_stability"] is not None
+
+        r = client.post(f"/api/cards/{b}/level_up", headers=auth_headers)
+        assert r.status_code == 200, r.text
+        stats = client.get(url, headers=auth_headers).json()
+        assert stats["level_distribution"] == [{"level_index": 0, "cards": 1}, {"level_index": 1, "cards": 1}]
+
+    def test_stats_access(self, client: TestClient, auth_headers: dict, db, test_deck):
+        from uuid import uuid4
+        from backend.tests.conftest import register_and_login
+
+        assert client.get(f"/api/decks/{uuid4()}/stats", headers=auth_headers).status_code == 404
+
+        test_deck.is_public = False
+        db.commit()
+        _, token = register_and_login(client)
+        r = client.get(f"/api/decks/{test_deck.id}/stats", headers={"Authorization": f"Bearer {token}"})
+        assert r.status_code == 403
@@ -225,3 +225,54 @@ class TestGroupDeckLinks:
             headers={"Authorization": f"Bearer {token2}"},
         )
         assert r.status_code == 404, r.text
+
+
+class TestGroupDecksPayload:
+    def _fill_deck(self, db, deck, n_cards: int):
+        from app.models.card import Card
+        from app.models.card_level import CardLevel
+
+        for i in range(n_cards):
+            card = Card(deck_id=deck.id, title=f"Card {i}", type="text", max_level=1)
+            db.add(card)
+            db.flush()
+            db.add_all([
+                CardLevel(card_id=card.id, level_index=1, content={"question": "Q1", "answer": "A1"}),
+                CardLevel(card_id=card.id, level_index=0, content={"question": "Q0", "answer": "A0"}),
+            ])
+        db.commit()
+
+    def _subscribe(self, db, user_group) -> UUID:
+        # роут ищет группу по исходной StudyGroup
+        from app.models.study_group import StudyGroup
+
+        sg = StudyGroup(owner_id=user_group.user_id, title="Source")
+        db.add(sg)
+        db.flush()
+        user_group.source_group_id = sg.id
+        db.commit()
+        return sg.id
+
+    def test_include_modes_and_card_limit(self, client: TestClient, db, auth_headers, user_group, test_deck):
+        self._fill_deck(db, test_deck, 5)
+        url = f"/api/groups/{self._subscribe(db, user_group)}/decks"
+
+        summary = client.get(url, params={"include": "summary"}, headers=auth_headers)
+        assert summary.status_code == 200, summary.text
+        assert summary.json()[0]["cards"] == []
+
+        cards = client.get(url, headers=auth_headers).json()
+        assert len(cards[0]["cards"]) == 5
+        assert all(c["levels"] == [] for c in cards[0]["cards"])
+
+        limited = client.get(url, params={"include": "levels", "card_limit": 2}, headers=auth_headers)
+        assert limited.status_code == 200, limited.text
+        deck_cards = limited.json()[0]["cards"]
+        assert len(deck_cards) == 2
+        assert [l["level_index"] for l in deck_cards[0]["levels"]] == [0, 1]
+        assert int(limited.headers["X-DB-Queries"]) <= 4
+
+    def test_rejects_unknown_include(self, client: TestClient, db, auth_headers, user_group):
+        group_id = self._subscribe(db, user_group)
+        r = client.get(f"/api/groups/{group_id}/decks", params={"include": "all"}, headers=auth_headers)
+        assert r.status_code == 422
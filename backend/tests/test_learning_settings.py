@@ -0,0 +1,65 @@
+import time
+
+from app.core.cache import TTLCache
+from app.models.user_learning_settings import UserLearningSettings
+from app.services.learning_settings import (
+    get_learning_settings,
+    invalidate_learning_settings,
+)
+from app.services import learning_settings
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "a" становится самым свежим
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+
+class TestLearningSettingsProvider:
+    def test_creates_once_and_caches(self, db, test_user):
+        invalidate_learning_settings(test_user.id)
+
+        first = get_learning_settings(db, test_user.id)
+        db.commit()
+        second = get_learning_settings(db, test_user.id)
+
+        assert first is second
+        assert first.initial_stability == 1.0
+        assert db.query(UserLearningSettings).filter_by(user_id=test_user.id).count() == 1
+
+    def test_orm_update_invalidates_cache(self, db, test_user):
+        get_learning_settings(db, test_user.id)
+        db.commit()
+
+        row = db.query(UserLearningSettings).filter_by(user_id=test_user.id).one()
+        row.initial_stability = 2.5
+        db.commit()
+
+        assert learning_settings._cache.get(test_user.id) is None
+        assert get_learning_settings(db, test_user.id).initial_stability == 2.5
+
+    def test_cached_only_after_commit(self, db, test_user):
+        invalidate_learning_settings(test_user.id)
+
+        get_learning_settings(db, test_user.id)
+        assert learning_settings._cache.get(test_user.id) is None
+        db.rollback()
+        # откаченный upsert не закэширован, строки нет
+        assert learning_settings._cache.get(test_user.id) is None
+        assert db.query(UserLearningSettings).filter_by(user_id=test_user.id).count() == 0
+
+        snapshot = get_learning_settings(db, test_user.id)
+        db.commit()
+        assert learning_settings._cache.get(test_user.id) is snapshot
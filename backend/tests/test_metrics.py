@@ -0,0 +1,74 @@
+"""Метрики Prometheus (/metrics) — без БД."""
+import threading
+
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, Gauge, PASSWORD_HASH_DURATION
+from app.core.security import hash_password, verify_password
+
+
+def _detached(metric):
+    # тестовые метрики не должны попадать в общий /metrics
+    metrics.REGISTRY.remove(metric)
+    return metric
+
+
+class TestCounter:
+    def test_sums_shards_from_all_threads(self):
+        c = _detached(Counter("test_events_total", "Test.", ("kind",)))
+
+        def work():
+            for _ in range(1000):
+                c.inc("a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        c.inc("b", amount=2)
+
+        assert c.value("a") == 4000
+        assert 'test_events_total{kind="a"} 4000' in c.render()
+        assert 'test_events_total{kind="b"} 2' in c.render()
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        h = _detached(Histogram("test_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0)))
+        for v in (0.05, 0.5, 0.5, 3.0):
+            h.observe(v, "/x")
+
+        lines = h.render()
+        assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'test_latency_seconds_count{route="/x"} 4' in lines
+        assert 'test_latency_seconds_sum{route="/x"} 4.05' in lines
+
+
+class TestGauge:
+    def test_reads_callback_and_escapes_labels(self):
+        g = _detached(Gauge("test_gauge", "Test.", ("name",), callback=lambda: [(('a"b',), 3)]))
+        assert 'test_gauge{name="a\\"b"} 3' in g.render()
+
+
+class TestMetricsEndpoint:
+    def test_exposes_route_latency_and_pool_gauges(self, client):
+        client.get("/health")
+        r = client.get("/metrics")
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        body = r.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+        assert 'db_pool_checked_out{engine="sync"}' in body
+        assert "# TYPE reviews_total counter" in body
+
+    def test_unmatched_paths_share_one_label(self, client):
+        client.get("/no/such/path/123")
+        assert 'route="/no/such/path/123"' not in client.get("/metrics").text
+
+    def test_password_hashing_is_timed(self):
+        before = PASSWORD_HASH_DURATION.count("verify")
+        assert verify_password("secret", hash_password("secret"))
+        assert PASSWORD_HASH_DURATION.count("verify") == before + 1
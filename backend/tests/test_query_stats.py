@@ -0,0 +1,72 @@
+"""Счётчик SQL-запросов на HTTP-запрос (без Postgres: sqlite + маленькое приложение)."""
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.middleware import RequestStatsMiddleware
+from app.db.instrumentation import install_query_stats, begin_query_stats, end_query_stats, current_query_stats
+
+sqlite_engine = create_engine("sqlite://")
+install_query_stats(sqlite_engine)
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestStatsMiddleware)
+
+    @app.get("/items/{n}")
+    def run_queries(n: int):
+        with sqlite_engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("select 1"))
+        return {"ok": True}
+
+    return app
+
+
+class TestQueryStatsCounter:
+    def test_counts_only_inside_request_scope(self):
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("select 1"))
+        assert current_query_stats() is None
+
+        stats, token = begin_query_stats()
+        try:
+            with sqlite_engine.connect() as conn:
+                conn.execute(text("select 1"))
+                conn.execute(text("select 2"))
+        finally:
+            end_query_stats(token)
+
+        assert stats.count == 2
+        assert stats.duration >= 0
+        assert current_query_stats() is None
+
+
+class TestRequestStatsMiddleware:
+    def test_headers_report_queries_from_sync_route(self):
+        client = TestClient(_make_app())
+
+        r = client.get("/items/3")
+
+        assert r.status_code == 200
+        assert r.headers["X-DB-Queries"] == "3"
+        assert 'desc="3 queries"' in r.headers["Server-Timing"]
+        assert "app;dur=" in r.headers["Server-Timing"]
+
+    def test_log_line_uses_route_template_and_warns_over_threshold(self, caplog, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "DB_QUERY_WARN_THRESHOLD", 2)
+        client = TestClient(_make_app())
+
+        with caplog.at_level(logging.INFO, logger="app.requests"):
+            client.get("/items/1")
+            client.get("/items/5")
+
+        ok, noisy = [r for r in caplog.records if r.name == "app.requests"]
+        assert ok.levelno == logging.INFO
+        assert noisy.levelno == logging.WARNING
+        assert noisy.route == "/items/{n}"
+        assert noisy.db_queries == 5
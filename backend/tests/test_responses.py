@@ -0,0 +1,55 @@
+"""Быстрый JSON-путь (app.core.responses.fast_json) — без БД."""
+import json
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import Response
+
+from app.core.config import settings
+from app.core.responses import fast_json
+from app.schemas.card_review import CardForReview
+
+
+def _card() -> CardForReview:
+    return CardForReview(
+        card_id=uuid.uuid4(),
+        deck_id=uuid.uuid4(),
+        title="Card",
+        type="flashcard",
+        card_level_id=uuid.uuid4(),
+        level_index=0,
+        content={"question": "Q", "answer": "A"},
+        stability=1.5,
+        difficulty=5.0,
+        next_review=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+class TestFastJson:
+    def test_matches_pydantic_json_mode(self):
+        cards = [_card(), _card()]
+        out = fast_json(cards)
+        assert isinstance(out, Response)
+        assert out.media_type == "application/json"
+        assert json.loads(out.body) == [c.model_dump(mode="json") for c in cards]
+
+    def test_plain_rows_serialize_like_models(self):
+        # горячие эндпоинты отдают dict-ы из строк БД — JSON должен совпадать с моделью
+        card = _card()
+        assert fast_json([dict(card)]).body == fast_json([card]).body
+
+    def test_copies_route_headers(self):
+        route_response = Response()
+        route_response.headers["ETag"] = '"c1-p1-abc"'
+        out = fast_json({"cards": []}, route_response)
+        assert out.headers["etag"] == '"c1-p1-abc"'
+        assert out.headers["content-length"] == str(len(out.body))
+
+    def test_passes_through_ready_response(self):
+        not_modified = Response(status_code=304)
+        assert fast_json(not_modified) is not_modified
+
+    def test_disabled_by_setting(self, monkeypatch):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+        cards = [_card()]
+        assert fast_json(cards) is cards
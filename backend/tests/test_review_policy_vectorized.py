@@ -0,0 +1,195 @@
+import random
+from collections import namedtuple
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+from app.core.enums import ReviewRating
+from app.domain.review.policy import ReviewPolicy
+from app.domain.review.dto import LearningSettingsSnapshot
+from app.domain.review.entities import CardLevelProgressState
+from app.domain.review.vectorized import (
+    RATINGS,
+    VectorizedReviewPolicy,
+    days_to_microseconds,
+    rating_codes,
+    retention_factors,
+    to_datetime64,
+    from_datetime64,
+)
+from app.services.bulk_reschedule import replay_chunk, reschedule_progress
+
+
+SETTINGS = LearningSettingsSnapshot(
+    desired_retention=0.9,
+    initial_stability=1.0,
+    initial_difficulty=5.0,
+    promote_stability_multiplier=0.85,
+    promote_difficulty_delta=0.5,
+)
+
+
+class TestVectorizedReviewPolicy:
+    def test_matches_scalar_bit_for_bit(self):
+        rng = random.Random(42)
+        n = 5000
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        stability = [rng.choice([rng.uniform(0, 5), rng.uniform(0, 5000), rng.random() * 1e-3]) for _ in range(n)]
+        difficulty = [rng.uniform(0, 11) for _ in range(n)]
+        last_reviewed = [None if rng.random() < 0.2 else base + timedelta(seconds=rng.randint(0, 10**8)) for _ in range(n)]
+        ratings = [rng.choice(RATINGS) for _ in range(n)]
+        now = [base + timedelta(days=200, microseconds=rng.randint(0, 10**13)) for _ in range(n)]
+
+        s, d, lr, nr = VectorizedReviewPolicy().apply_review(
+            stability=np.array(stability),
+            difficulty=np.array(difficulty),
+            last_reviewed=to_datetime64(last_reviewed),
+            rating=rating_codes(ratings),
+            now=to_datetime64(now),
+        )
+        next_review = from_datetime64(nr)
+        last = from_datetime64(lr)
+
+        policy = ReviewPolicy()
+        for i in range(n):
+            expected = policy.apply_review(
+                state=CardLevelProgressState(stability=stability[i], difficulty=difficulty[i], last_reviewed=last_reviewed[i]),
+                rating=ratings[i],
+                settings=SETTINGS,
+                now=now[i],
+            )
+            assert s[i] == expected.stability
+            assert d[i] == expected.difficulty
+            assert last[i] == expected.last_reviewed
+            assert next_review[i] == expected.next_review
+
+    def test_desired_retention_matches_scalar(self):
+        from dataclasses import replace
+
+        rng = random.Random(7)
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        retention = [rng.choice([0.8, 0.85, 0.9, 0.95, 0.97]) for _ in range(1000)]
+        stability = [rng.uniform(0, 500) for _ in range(1000)]
+
+        _, _, _, nr = VectorizedReviewPolicy().apply_review(
+            stability=np.array(stability),
+            difficulty=np.full(1000, 5.0),
+            last_reviewed=to_datetime64([base] * 1000),
+            rating=rating_codes([ReviewRating.good] * 1000),
+            now=to_datetime64([base] * 1000),
+            retention_factor=retention_factors(retention),
+        )
+
+        policy = ReviewPolicy()
+        for i, next_review in enumerate(from_datetime64(nr)):
+            expected = policy.apply_review(
+                state=CardLevelProgressState(stability=stability[i], difficulty=5.0, last_reviewed=base),
+                rating=ReviewRating.good,
+                settings=replace(SETTINGS, desired_retention=retention[i]),
+                now=base,
+            )
+            assert next_review == expected.next_review
+
+        # выше целевая вероятность — короче интервал
+        assert retention_factors([0.95])[0] < 1.0 == retention_factors([0.9])[0] < retention_factors([0.8])[0]
+
+    def test_days_to_microseconds_matches_timedelta(self):
+        # ровно половина микросекунды — проверяем half-even как у timedelta
+        days = np.array([(k + 0.5) / 86400e6 for k in range(200)] + [0.0035, 1.15, 1.35 ** 20, 12345.678901])
+        expected = [timedelta(days=float(x)) // timedelta(microseconds=1) for x in days]
+        assert days_to_microseconds(days).tolist() == expected
+
+
+class TestReplayChunk:
+    def test_replay_equals_sequential_scalar_reviews(self):
+        Row = namedtuple(
+            "Row",
+            "id user_id card_level_id start_stability start_difficulty created_at "
+            "initial_stability initial_difficulty desired_retention",
+            defaults=(None, None, None, None, None, None),
+        )
+        Hist = namedtuple("Hist", "rating reviewed_at")
+
+        base = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+        rows = [
+            Row(id=1, user_id="u", card_level_id="a", initial_stability=1.0, initial_difficulty=5.0),
+            Row(id=2, user_id="u", card_level_id="b", initial_stability=None, initial_difficulty=None),
+            Row(id=3, user_id="u", card_level_id="no-history", initial_stability=1.0, initial_difficulty=5.0),
+        ]
+        history = {
+            ("u", "a"): [Hist(ReviewRating.again, base), Hist(ReviewRating.good, base + timedelta(hours=1))],
+            ("u", "b"): [Hist(ReviewRating.easy, base + timedelta(days=k)) for k in range(5)],
+        }
+
+        values = {v["id"]: v for v in replay_chunk(rows, history, VectorizedReviewPolicy())}
+        assert set(values) == {1, 2}
+
+        policy = ReviewPolicy()
+        for row_id, key in ((1, ("u", "a")), (2, ("u", "b"))):
+            state = CardLevelProgressState(stability=1.0, difficulty=5.0)
+            for h in history[key]:
+                state = policy.apply_review(state=state, rating=h.rating, settings=SETTINGS, now=h.reviewed_at)
+            assert values[row_id]["stability"] == state.stability
+            assert values[row_id]["difficulty"] == state.difficulty
+            assert values[row_id]["next_review"] == state.next_review
+
+    def test_replay_starts_promoted_level_from_stored_state(self):
+        Row = namedtuple(
+            "Row",
+            "id user_id card_level_id start_stability start_difficulty created_at "
+            "initial_stability initial_difficulty desired_retention",
+        )
+        Hist = namedtuple("Hist", "rating reviewed_at")
+
+        promoted_at = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+        row = Row(1, "u", "l1", 8.5, 5.5, promoted_at, 1.0, 5.0, 0.95)
+        history = {("u", "l1"): [Hist(ReviewRating.again, promoted_at + timedelta(days=8))]}
+
+        (value,) = replay_chunk([row], history, VectorizedReviewPolicy())
+
+        from dataclasses import replace
+        state = ReviewPolicy().apply_review(
+            state=CardLevelProgressState(stability=8.5, difficulty=5.5, last_reviewed=promoted_at),
+            rating=ReviewRating.again,
+            settings=replace(SETTINGS, desired_retention=0.95),
+            now=promoted_at + timedelta(days=8),
+        )
+        assert (value["stability"], value["difficulty"], value["next_review"]) == (
+            state.stability, state.difficulty, state.next_review,
+        )
+
+
+class TestRescheduleProgress:
+    def test_promoted_level_survives_reschedule(self, client, auth_headers, db, test_user, test_deck):
+        from app.db.session import SessionLocal
+        from app.models.card_progress import CardProgress
+
+        r = client.post(
+            "/api/cards/",
+            headers=auth_headers,
+            json={
+                "deck_id": str(test_deck.id),
+                "title": "Promoted",
+                "type": "flashcard",
+                "levels": [{"question": "Q0", "answer": "A0"}, {"question": "Q1", "answer": "A1"}],
+            },
+        )
+        assert r.status_code == 201, r.text
+        card_id = r.json()["card_id"]
+
+        for _ in range(3):
+            assert client.post(f"/api/cards/{card_id}/review", headers=auth_headers, json={"rating": "easy"}).status_code == 200
+        assert client.post(f"/api/cards/{card_id}/level_up", headers=auth_headers).status_code == 200
+        assert client.post(f"/api/cards/{card_id}/review", headers=auth_headers, json={"rating": "good"}).status_code == 200
+
+        def active():
+            db.expire_all()
+            p = db.query(CardProgress).filter_by(user_id=test_user.id, card_id=card_id, is_active=True).one()
+            return p.stability, p.difficulty, p.next_review
+
+        before = active()
+        stats = reschedule_progress(SessionLocal, user_id=test_user.id)
+        assert stats.rows_seen == 2  # уровень 0 и повышенный уровень 1 со стартом
+        # реплей от сохранённого старта даёт то же состояние, а не сброс к initial_stability
+        assert active() == before